@@ -1,9 +1,13 @@
 """
 환경변수 설정 및 관리
 """
+from pathlib import Path
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
+# backend/ 디렉토리 (설정의 상대 경로 기준)
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
 
 class Settings(BaseSettings):
     """애플리케이션 설정"""
@@ -30,9 +34,53 @@ class Settings(BaseSettings):
     # LLM Settings
     model_name: str = "gpt-4o-mini"
     embedding_model: str = "jhgan/ko-sroberta-multitask"
+    embedding_backend: str = "torch"  # torch | onnx (data/export_onnx.py로 내보낸 모델)
+    embedding_onnx_path: str = "data/models/ko-sroberta-onnx"  # 내보낸 ONNX 모델 디렉토리
+    embedding_onnx_file: str = "onnx/model_qint8_avx2.onnx"  # 디렉토리 안의 ONNX 파일 (int8 양자화)
+    embedding_batch_enabled: bool = True  # 동시 요청의 쿼리 임베딩을 모아서 한 번에 encode
+    embedding_batch_max_size: int = 16  # 한 배치의 최대 쿼리 수
+    embedding_batch_max_wait_ms: float = 5  # 첫 쿼리 도착 후 배치를 모으는 시간(ms)
     max_tokens: int = 500
+    prompt_token_budget: int = 3000  # 답변 프롬프트 입력 토큰 예산 (시스템+검색 결과+질문 뒤 남는 만큼 최근 대화 포함)
+    rewrite_prompt_token_budget: int = 1500  # 쿼리 재구성 프롬프트 입력 토큰 예산
     temperature: float = 0.3
     
+    # LLM Limits
+    llm_max_concurrency: int = 8  # 동시에 실행되는 OpenAI 호출 수
+    llm_max_queue: int = 32  # 자리를 기다릴 수 있는 호출 수 (넘치면 503)
+    llm_queue_timeout: float = 10  # 자리를 기다리는 최대 시간(초), 넘으면 503
+    llm_timeout: float = 30  # OpenAI 호출 하나의 최대 시간(초)
+    llm_retry_after: int = 5  # 503 응답의 Retry-After(초)
+    
+    # Database
+    db_max_workers: int = 16  # async 핸들러용 Supabase 호출 스레드 수
+    
+    # Cache
+    curriculum_cache_ttl: int = 3600  # 학번별 교육과정 스냅샷 유지 시간(초), 0이면 만료 없음
+    query_embedding_cache_size: int = 1024  # 쿼리 임베딩 LRU 캐시 크기, 0이면 캐시 안 함
+    query_embedding_cache_ttl: int = 86400  # 쿼리 임베딩 유지 시간(초), 0이면 만료 없음
+    rewrite_cache_size: int = 512  # 멀티턴 검색 쿼리 재구성 결과 캐시 크기
+    answer_cache_size: int = 512  # 일반 질문 시맨틱 답변 캐시 크기, 0이면 캐시 안 함
+    answer_cache_ttl: int = 21600  # 캐시된 답변 유지 시간(초), 0이면 만료 없음
+    answer_cache_threshold: float = 0.92  # 캐시 적중으로 볼 질문 임베딩 코사인 유사도 (질문 속 숫자는 정확히 같아야 함)
+    llm_response_cache_path: str = "data/cache/llm_responses.sqlite3"  # 프롬프트 해시 → LLM 응답 SQLite (비어 있으면 사용 안 함)
+    llm_response_cache_ttl: int = 604800  # 저장된 LLM 응답 유지 시간(초), 0이면 만료 없음
+    llm_response_cache_max_entries: int = 10000  # 최대 항목 수 (넘으면 오래 안 쓴 것부터 삭제)
+    llm_response_cache_bypass: bool = False  # 평가 실행용: LLM 응답 캐시 조회/저장 건너뜀
+    
+    # Vector Search
+    retrieval_mode: str = "vector"  # vector | bm25(임베딩 없이 어휘 검색) | hybrid(RRF 결합)
+    category_routing_enabled: bool = True  # 질문 키워드로 문서 카테고리를 좁혀 검색
+    vector_index_enabled: bool = True  # documents를 메모리에 올려 인프로세스 검색 (실패 시 RPC)
+    vector_index_path: str = "data/index"  # 임베딩 아티팩트 디렉토리 (backend/ 기준, 비어 있으면 항상 DB에서 로드)
+    vector_index_dtype: str = "float16"  # 아티팩트 행렬 타입 (float16 | float32)
+    
+    # Warmup
+    warmup_admission_years: str = ""  # 시작 시 캐시를 채울 학번 (예: "2024,2025"), 비어 있으면 DB의 전체 학번
+    
+    # Batch
+    batch_audit_workers: int = 4  # 졸업사정 일괄 계산 스레드 수
+    
     # Redis
     redis_host: str = "localhost"
     redis_port: int = 6379
@@ -43,6 +91,12 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
+def resolve_path(path: str) -> Path:
+    """설정의 경로 → 절대 경로 (상대 경로는 backend/ 기준)"""
+    path = Path(path)
+    return path if path.is_absolute() else BACKEND_DIR / path
+
+
 @lru_cache()
 def get_settings() -> Settings:
     """설정 싱글톤 인스턴스 반환"""
@@ -0,0 +1,120 @@
+# backend/app/database/repository.py
+"""
+Supabase 데이터 접근 계층
+
+서비스들이 쓰는 테이블/RPC 조회를 한 곳에 모은다.
+supabase 클라이언트는 동기 방식이므로 async 핸들러에서는 a* 메서드로
+전용 스레드 풀에서 실행해 이벤트 루프를 막지 않는다.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+from supabase import Client
+from app.config import settings
+from app.database.supabase_client import supabase
+
+
+class SupabaseRepository:
+    """Supabase 테이블/RPC 조회 (동기 + 비동기)"""
+
+    def __init__(self, client: Client, max_workers: int = 16):
+        self.client = client
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="supabase"
+        )
+
+    # ===== 실행 =====
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """동기 함수를 DB 전용 스레드 풀에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        """스레드 풀 종료"""
+        self._executor.shutdown(wait=False)
+
+    # ===== 교육과정 =====
+    def fetch_curriculums(self, admission_year: int) -> List[Dict]:
+        """학번의 curriculums 전체"""
+        result = self.client.table('curriculums')\
+            .select('*')\
+            .eq('admission_year', admission_year)\
+            .execute()
+        return result.data or []
+
+    def fetch_graduation_requirements(self, admission_year: int) -> List[Dict]:
+        """학번의 graduation_requirements 전체"""
+        result = self.client.table('graduation_requirements')\
+            .select('*')\
+            .eq('admission_year', admission_year)\
+            .execute()
+        return result.data or []
+
+    def fetch_admission_years(self) -> List[int]:
+        """졸업요건이 등록된 학번 목록"""
+        result = self.client.table('graduation_requirements')\
+            .select('admission_year')\
+            .execute()
+        return sorted(set(r['admission_year'] for r in result.data or []))
+
+    def fetch_course_name(self, course_code: str) -> Optional[str]:
+        """과목 코드 → 과목명 (학번 무관, 첫 번째 행)"""
+        result = self.client.table('curriculums')\
+            .select('course_name')\
+            .eq('course_code', course_code)\
+            .limit(1)\
+            .execute()
+        return result.data[0]['course_name'] if result.data else None
+
+    # ===== 동일대체 =====
+    def fetch_equivalent_courses(self) -> List[Dict]:
+        """equivalent_courses 전체"""
+        result = self.client.table('equivalent_courses')\
+            .select('*')\
+            .execute()
+        return result.data or []
+
+    # ===== 벡터 검색 =====
+    def fetch_documents(
+        self,
+        columns: str = 'id, content, metadata, embedding',
+        page_size: int = 500
+    ) -> List[Dict]:
+        """documents 전체 - 페이지 단위로 조회"""
+        rows = []
+        start = 0
+        while True:
+            result = self.client.table('documents')\
+                .select(columns)\
+                .order('id')\
+                .range(start, start + page_size - 1)\
+                .execute()
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+            start += page_size
+
+    def match_documents(
+        self,
+        query_embedding: List[float],
+        match_count: int,
+        filter_json: Optional[Dict] = None
+    ) -> List[Dict]:
+        """match_documents RPC"""
+        result = self.client.rpc(
+            'match_documents',
+            {
+                'query_embedding': query_embedding,
+                'match_count': match_count,
+                'filter': filter_json or {}
+            }
+        ).execute()
+        return result.data or []
+
+
+
+# 전역 저장소
+repository = SupabaseRepository(supabase, max_workers=settings.db_max_workers)
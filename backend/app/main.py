@@ -1,8 +1,12 @@
 """
 FastAPI 메인 애플리케이션
 """
+import asyncio
+import json
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime
 from contextlib import asynccontextmanager
 
@@ -14,7 +18,17 @@ from app.models.schemas import (
     UserProfile
 )
 from app.models.session import session_store
+from app.database.repository import repository
 from app.services.chatbot import chatbot
+from app.services.llm_limiter import LLMOverloadedError, llm_limiter
+from app.services.llm_usage import llm_usage
+from app.services.llm_response_cache import llm_response_cache
+from app.services.embedding_cache import query_embedding_cache
+from app.services.answer_cache import answer_cache
+from app.services.query_rewriter import rewrite_cache
+from app.services.vector_service import get_loaded_vector_service, get_vector_service
+from app.services.embedding_model import check_embedding_backend
+from app.services.warmup import warmup_state
 from app.routes import graduation
 
 
@@ -27,9 +41,19 @@ async def lifespan(app: FastAPI):
     print(f"📍 환경: {settings.environment}")
     print(f"🤖 LLM 모델: {settings.model_name}")
     
+    # 임베딩 실행 방식에 필요한 패키지가 없으면 워밍업 전에 바로 실패
+    check_embedding_backend()
+    
+    # 워밍업은 백그라운드에서 (끝날 때까지 /ready 는 503)
+    warmup_task = asyncio.create_task(warmup_state.arun(chatbot))
+    
     yield
     
-    # 종료 시
+    # 종료 시 (태스크 취소로는 워밍업 스레드가 멈추지 않음 → 남은 단계는 stop()으로 건너뜀)
+    if not warmup_task.done():
+        warmup_state.stop()
+        warmup_task.cancel()
+    repository.shutdown()
     print("👋 애플리케이션 종료")
 
 
@@ -71,6 +95,129 @@ async def health_check():
     )
 
 
+def _prepare_chat(request: ChatRequest):
+    """
+    세션 준비: 세션 생성/갱신 → 프로필 결정 → 사용자 메시지 저장
+    
+    Returns:
+        (session_id, user_profile, history_for_llm)
+    """
+    # 세션 관리 (기존 코드)
+    session_id = request.session_id
+    
+    if not session_id:
+        session_id = session_store.create_session(None)
+        print(f"  ✅ 새 세션 생성: {session_id}")
+    else:
+        session = session_store.get_session(session_id)
+        if not session:
+            session_id = session_store.create_session(None)
+            print(f"  ✅ 세션 만료, 새로 생성: {session_id}")
+        elif request.user_profile:
+            session_store.update_profile(session_id, request.user_profile)
+    
+    # 세션에서 사용자 프로필 가져오기
+    session = session_store.get_session(session_id)
+    session_profile = session.get('user_profile') if session else None
+    
+    if session_profile:
+        is_dummy = (
+            session_profile.admission_year == 2020 and
+            any(c.course_code.startswith('CSE') for c in session_profile.courses_taken)
+        )
+        
+        if is_dummy:
+            print(f"⚠️ 더미 프로필 감지, 무시: {session_profile.admission_year}학번")
+            session_profile = None
+            
+    user_profile = request.user_profile if request.user_profile else session_profile
+    
+    session_store.add_message(session_id, {
+        "role": "user",
+        "content": request.message,
+        "timestamp": datetime.now()
+    })
+    
+    session_messages = session.get('history', []) if session else []
+    
+    history_for_llm = []
+    for msg in session_messages[:-1]:
+        history_for_llm.append({
+            "role": msg["role"],
+            "content": msg["content"]
+        })
+    
+    print(f"\n💬 대화 이력 ({len(history_for_llm)}개 메시지):")
+    for msg in history_for_llm[-6:]:  # 최근 6개만 출력
+        print(f"  {msg['role']}: {msg['content'][:50]}...")
+    
+    print(f"\n📨 요청 정보:")
+    print(f"  session_id: {session_id}")
+    print(f"  현재 메시지: {request.message}")
+    print(f"  user_profile: {user_profile}")
+    
+    return session_id, user_profile, history_for_llm
+
+
+def _finish_chat(session_id: str, result: dict):
+    """챗봇 결과를 세션에 반영 (추출된 프로필 + 답변 메시지)"""
+    if isinstance(result, dict) and 'user_profile' in result and result['user_profile']:
+        session_store.update_profile(session_id, result['user_profile'])
+        print(f"  ✅ 세션에 프로필 저장: {result['user_profile'].admission_year}학번")
+    
+    # 세션에 메시지 저장
+    session_store.add_message(session_id, {
+        "role": "assistant",
+        "content": result['message'],
+        "timestamp": datetime.now()
+    })
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """SSE 이벤트 한 건 포맷"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+@app.get("/ready")
+async def ready():
+    """준비 상태 (워밍업 완료 전이나 필수 컴포넌트 실패 시 503)"""
+    report = warmup_state.report()
+    return JSONResponse(
+        status_code=200 if report["ready"] else 503,
+        content=report
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    운영 지표 (읽기 전용, 디버그 모드가 아니어도 제공)
+    
+    캐시 적중률, 임베딩 배처 큐/배치 크기, 검색 지연 시간, LLM 동시성/토큰 사용량.
+    임베딩 모델이 아직 로드되지 않았으면 모델 관련 지표는 loaded: false.
+    """
+    vector_service = get_loaded_vector_service()
+    if vector_service is None:
+        embedding_batcher = {"loaded": False}
+        retrieval = {"loaded": False}
+    else:
+        batcher = vector_service.batcher
+        embedding_batcher = {"enabled": False} if batcher is None else {"enabled": True, **batcher.stats()}
+        retrieval = vector_service.latency_stats()
+    
+    return {
+        "embedding_cache": query_embedding_cache.stats(),
+        "embedding_batcher": embedding_batcher,
+        "retrieval": retrieval,
+        "answer_cache": answer_cache.stats(),
+        "rewrite_cache": rewrite_cache.stats(),
+        "llm_limiter": llm_limiter.stats(),
+        "llm_usage": llm_usage.stats(),
+        "llm_response_cache": await run_in_threadpool(llm_response_cache.stats)
+    }
+
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """챗봇 대화 엔드포인트"""
@@ -79,83 +226,31 @@ async def chat(request: ChatRequest):
         print(f"📬 새 요청 도착!")
         print(f"{'='*50}")
         
-        # 세션 관리 (기존 코드)
-        session_id = request.session_id
-        
-        if not session_id:
-            session_id = session_store.create_session(None)
-            print(f"  ✅ 새 세션 생성: {session_id}")
-        else:
-            session = session_store.get_session(session_id)
-            if not session:
-                session_id = session_store.create_session(None)
-                print(f"  ✅ 세션 만료, 새로 생성: {session_id}")
-            elif request.user_profile:
-                session_store.update_profile(session_id, request.user_profile)
-        
-        # 세션에서 사용자 프로필 가져오기
-        session = session_store.get_session(session_id)
-        session_profile = session.get('user_profile') if session else None
-        
-        if session_profile:
-            is_dummy = (
-                session_profile.admission_year == 2020 and
-                any(c.course_code.startswith('CSE') for c in session_profile.courses_taken)
-            )
-            
-            if is_dummy:
-                print(f"⚠️ 더미 프로필 감지, 무시: {session_profile.admission_year}학번")
-                session_profile = None
-                
-        user_profile = request.user_profile if request.user_profile else session_profile
-        
-        session_store.add_message(session_id, {
-            "role": "user",
-            "content": request.message,
-            "timestamp": datetime.now()
-        })
-        
-        session_messages = session.get('history', []) if session else []
-        
-        history_for_llm = []
-        for msg in session_messages[:-1]:
-            history_for_llm.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
-        
-        print(f"\n💬 대화 이력 ({len(history_for_llm)}개 메시지):")
-        for msg in history_for_llm[-6:]:  # 최근 6개만 출력
-            print(f"  {msg['role']}: {msg['content'][:50]}...")
-        
-        print(f"\n📨 요청 정보:")
-        print(f"  session_id: {session_id}")
-        print(f"  현재 메시지: {request.message}")
-        print(f"  user_profile: {user_profile}")
+        session_id, user_profile, history_for_llm = await run_in_threadpool(_prepare_chat, request)
         
-        # 챗봇 호출
-        result = chatbot.chat(
+        # 챗봇 호출 (LLM은 ainvoke + 동시성 제한, DB/임베딩은 스레드에서)
+        result = await chatbot.achat(
             message=request.message,
             user_profile=user_profile,
             history=history_for_llm
         )
 
-        if isinstance(result, dict) and 'user_profile' in result and result['user_profile']:
-            session_store.update_profile(session_id, result['user_profile'])
-            print(f"  ✅ 세션에 프로필 저장: {result['user_profile'].admission_year}학번")
-        
-        # 세션에 메시지 저장
-        session_store.add_message(session_id, {
-            "role": "assistant",
-            "content": result['message'],
-            "timestamp": datetime.now()
-        })
+        await run_in_threadpool(_finish_chat, session_id, result)
         
         return ChatResponse(
             message=result['message'],
             sources=result.get('sources', []),
             query_type=result.get('query_type'),
-            session_id=session_id
+            session_id=session_id,
+            token_usage=result.get('token_usage')
+        )
+    
+    except LLMOverloadedError as e:
+        print(f"⚠️ LLM 과부하로 요청 거절: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="요청이 많아 잠시 후 다시 시도해주세요",
+            headers={"Retry-After": str(e.retry_after)}
         )
     
     except Exception as e:
@@ -169,6 +264,104 @@ async def chat(request: ChatRequest):
         )
 
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    챗봇 대화 엔드포인트 (SSE 스트리밍)
+    
+    이벤트 순서:
+        - general: meta(출처) → token ... → done
+        - curriculum: message → done
+        - 오류: error (LLM 과부하면 retry_after 포함)
+    
+    done 이벤트는 /chat 응답과 같은 필드(message, sources, query_type, session_id, token_usage)를 가진다.
+    LLM 대기열이 이미 가득 차 있으면 스트림을 열지 않고 503 + Retry-After.
+    """
+    print(f"\n{'='*50}")
+    print(f"📬 새 스트리밍 요청 도착!")
+    print(f"{'='*50}")
+    
+    if llm_limiter.is_saturated():
+        print("⚠️ LLM 과부하로 스트리밍 요청 거절")
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "요청이 많아 잠시 후 다시 시도해주세요"},
+            headers={"Retry-After": str(llm_limiter.retry_after)}
+        )
+    
+    session_id, user_profile, history_for_llm = await run_in_threadpool(_prepare_chat, request)
+    
+    async def event_stream():
+        try:
+            async for event, data in chatbot.achat_stream(
+                message=request.message,
+                user_profile=user_profile,
+                history=history_for_llm
+            ):
+                if event == "done":
+                    await run_in_threadpool(_finish_chat, session_id, data)
+                    yield _sse_event("done", {
+                        "message": data['message'],
+                        "sources": data.get('sources', []),
+                        "query_type": data.get('query_type'),
+                        "session_id": session_id,
+                        "token_usage": data.get('token_usage')
+                    })
+                    continue
+                
+                if event in ("meta", "message"):
+                    data = {**data, "session_id": session_id}
+                yield _sse_event(event, data)
+        
+        except LLMOverloadedError as e:
+            print(f"⚠️ LLM 과부하로 스트리밍 중단: {e}")
+            yield _sse_event("error", {
+                "detail": "요청이 많아 잠시 후 다시 시도해주세요",
+                "retry_after": e.retry_after,
+                "session_id": session_id
+            })
+        
+        except Exception as e:
+            print(f"❌ 챗봇 스트리밍 오류: {e}")
+            import traceback
+            traceback.print_exc()
+            
+            yield _sse_event("error", {
+                "detail": f"챗봇 처리 중 오류가 발생했습니다: {str(e)}",
+                "session_id": session_id
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@app.post("/documents/reload")
+async def reload_documents(from_db: bool = False):
+    """
+    문서 재임베딩 후 로컬 벡터 인덱스 다시 로드 + 시맨틱 답변 캐시 무효화
+    
+    - 기본: 임베딩 아티팩트(create_embeddings.py가 갱신)에서 로드
+    - from_db=true: documents 테이블에서 받아 아티팩트도 갱신
+    """
+    vector_service = get_vector_service()
+    loaded = await run_in_threadpool(vector_service.load_index, from_db)
+    if not loaded:
+        # 인덱스를 쓰지 않는 경우(RPC 검색)에도 이전 답변은 버림
+        answer_cache.clear()
+    
+    return {
+        "index_loaded": loaded,
+        "documents": len(vector_service.index) if vector_service.index is not None else 0,
+        "version": vector_service.index.version if vector_service.index is not None else None
+    }
+
+
 @app.post("/session/create")
 async def create_session(user_profile: UserProfile = None):
     """새 세션 생성"""
@@ -226,6 +419,11 @@ if settings.debug:
                 for sid, data in session_store.sessions.items()
             }
         }
+    
+    @app.delete("/debug/llm-response-cache")
+    async def clear_llm_response_cache():
+        """LLM 응답 영구 캐시 비우기 (디버그용)"""
+        return {"deleted": await run_in_threadpool(llm_response_cache.clear)}
 
 
 if __name__ == "__main__":
@@ -80,6 +80,7 @@ class ChatResponse(BaseModel):
     sources: List[Dict[str, Any]] = Field(default_factory=list)
     query_type: Optional[str] = None  # "curriculum", "general", "hybrid"
     session_id: Optional[str] = None
+    token_usage: Optional[Dict[str, int]] = None  # 답변 프롬프트 토큰 수 (general 질문만)
 
 
 class HealthCheck(BaseModel):
@@ -2,11 +2,16 @@
 졸업사정 관련 API 엔드포인트
 """
 
+import json
+import time
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from app.services.curriculum_service import curriculum_service
 from app.services.equivalent_course_service import equivalent_course_service
+from app.services.curriculum_cache import curriculum_cache
 from app.models.schemas import UserProfile, CourseInput
 
 router = APIRouter(
@@ -39,6 +44,12 @@ class CalculateRequest(BaseModel):
         }
 
 
+class BatchCalculateRequest(BaseModel):
+    """남은 학점 일괄 계산 요청 (학년/코호트 단위)"""
+    requests: List[CalculateRequest]
+    stream: bool = False  # True면 NDJSON 스트리밍
+
+
 class NotTakenRequest(BaseModel):
     """미이수 필수 과목 조회 요청"""
     admission_year: int
@@ -47,6 +58,12 @@ class NotTakenRequest(BaseModel):
     requirement_type: Optional[str] = None  # "전공필수", "공통교양" 등
 
 
+class CourseLookupRequest(BaseModel):
+    """과목 일괄 조회 요청"""
+    admission_year: int
+    course_codes: List[str]
+
+
 # ===== API 엔드포인트 =====
 
 @router.post("/calculate")
@@ -62,6 +79,7 @@ async def calculate_remaining_credits(request: CalculateRequest):
             courses_taken=request.courses_taken
         )
         
+        await curriculum_service.aprefetch(request.admission_year)
         result = curriculum_service.calculate_remaining_credits(user_profile)
         
         return {
@@ -73,6 +91,60 @@ async def calculate_remaining_credits(request: CalculateRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/calculate/batch")
+async def calculate_remaining_credits_batch(request: BatchCalculateRequest):
+    """
+    남은 학점 일괄 계산
+    
+    여러 학생의 졸업사정을 한 번에 계산합니다. 학번별 데이터는 한 번만 불러오고,
+    계산은 스레드 풀에서 병렬로 수행해 입력 순서대로 반환합니다.
+    stream=true면 한 줄에 한 학생씩 NDJSON으로 보내고 마지막 줄에 처리량을 보냅니다.
+    """
+    user_profiles = [
+        UserProfile(
+            admission_year=item.admission_year,
+            courses_taken=item.courses_taken
+        )
+        for item in request.requests
+    ]
+    
+    if request.stream:
+        def generate():
+            started = time.perf_counter()
+            for result in curriculum_service.iter_remaining_credits_batch(user_profiles):
+                yield json.dumps(result, ensure_ascii=False, default=str) + "\n"
+            
+            summary = _batch_summary(len(user_profiles), time.perf_counter() - started)
+            yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
+        
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+    
+    try:
+        started = time.perf_counter()
+        results = await run_in_threadpool(
+            curriculum_service.calculate_remaining_credits_batch,
+            user_profiles
+        )
+        
+        return {
+            "success": True,
+            "data": results,
+            "summary": _batch_summary(len(user_profiles), time.perf_counter() - started)
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _batch_summary(count: int, elapsed: float) -> Dict[str, Any]:
+    """일괄 계산 처리량"""
+    return {
+        "students": count,
+        "elapsed_seconds": round(elapsed, 4),
+        "students_per_second": round(count / elapsed, 1) if elapsed > 0 else None
+    }
+
+
 @router.post("/not-taken")
 async def get_not_taken_courses(request: NotTakenRequest):
     """
@@ -86,6 +158,7 @@ async def get_not_taken_courses(request: NotTakenRequest):
             courses_taken=request.courses_taken
         )
         
+        await curriculum_service.aprefetch(request.admission_year)
         not_taken = curriculum_service.get_required_courses_not_taken(
             user_profile,
             course_area=request.course_area,
@@ -122,6 +195,7 @@ async def get_requirements(
     특정 입학년도의 졸업 요건을 반환합니다.
     """
     try:
+        await curriculum_service.aprefetch(admission_year)
         requirements = curriculum_service.get_graduation_requirements(admission_year)
         
         # 필터링
@@ -140,6 +214,30 @@ async def get_requirements(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/courses/batch")
+async def get_courses_batch(request: CourseLookupRequest):
+    """
+    과목 정보 일괄 조회
+    
+    여러 과목 코드를 한 번에 조회합니다. 입력 순서를 유지하고,
+    교육과정에 없는 코드는 unknown_codes로 반환합니다.
+    """
+    try:
+        await curriculum_service.aprefetch(request.admission_year)
+        result = curriculum_service.get_courses_by_codes(
+            request.admission_year,
+            request.course_codes
+        )
+        
+        return {
+            "success": True,
+            "data": result
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/courses/{course_code}")
 async def get_course_info(course_code: str, admission_year: int):
     """
@@ -148,6 +246,7 @@ async def get_course_info(course_code: str, admission_year: int):
     특정 과목의 상세 정보를 반환합니다.
     """
     try:
+        await curriculum_service.aprefetch(admission_year)
         course_info = curriculum_service._get_course_info(admission_year, course_code)
         
         if not course_info:
@@ -178,6 +277,8 @@ async def get_equivalent_course(course_code: str):
     구 과목 코드로 신 과목 코드를 찾거나, 그 반대를 수행합니다.
     """
     try:
+        await equivalent_course_service.aload()
+        
         # 구 → 신
         equiv = equivalent_course_service.get_equivalent_course(course_code)
         
@@ -196,6 +297,49 @@ async def get_equivalent_course(course_code: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/equivalent/reload")
+async def reload_equivalent_courses():
+    """
+    동일대체 교과목 그래프 재로딩
+    
+    equivalent_courses 테이블이 변경된 후 호출합니다.
+    """
+    try:
+        stats = await run_in_threadpool(equivalent_course_service.reload)
+        
+        return {
+            "success": True,
+            "data": stats
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/cache/refresh")
+async def refresh_cache(admission_year: Optional[int] = None):
+    """
+    교육과정 캐시 새로고침
+    
+    curriculums / graduation_requirements / equivalent_courses 테이블이
+    변경된 후 호출합니다. admission_year를 주면 해당 학번만 새로고침합니다.
+    """
+    try:
+        curriculum = curriculum_cache.refresh(admission_year)
+        equivalent = await run_in_threadpool(equivalent_course_service.reload)
+        
+        return {
+            "success": True,
+            "data": {
+                "curriculum": curriculum,
+                "equivalent": equivalent
+            }
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/health")
 async def health_check():
     """
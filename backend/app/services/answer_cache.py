@@ -0,0 +1,138 @@
+"""
+일반 질문 시맨틱 답변 캐시
+
+"개강 언제야?"와 "1학기 시작일 알려줘"처럼 표현만 다른 질문은 같은 문서와 답변으로 이어지므로
+질문 임베딩의 코사인 유사도가 임계값 이상이면 저장된 답변을 LLM 호출 없이 재사용한다.
+대화 이력이 없는 질문만 대상으로 한다.
+
+"1학기 개강일"/"2학기 개강일", "2023학번"/"2024학번"처럼 숫자만 다른 질문은 임베딩이 거의 같으므로
+질문에 든 숫자(학기, 학번, 학년 등)가 정확히 같은 항목만 적중으로 본다.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.config import settings
+
+_NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def numeric_tokens(text: str) -> tuple:
+    """질문 속 숫자 목록 (순서 무관, 앞의 0 제거) - 같아야 캐시 적중"""
+    return tuple(sorted(str(int(n)) for n in _NUMBER_PATTERN.findall(text or '')))
+
+
+class SemanticAnswerCache:
+    """질문 임베딩 → 답변 (크기/TTL 제한, 코사인 임계값)"""
+
+    def __init__(self, max_size: int = 512, ttl_seconds: int = 21600, threshold: float = 0.92):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+
+        # 항목 번호 → (저장 시각, 정규화된 임베딩, 결과, 질문 속 숫자)
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        # 조회용 임베딩 행렬 (항목이 바뀌면 다시 만듦)
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[int] = []
+        self._matrix_numbers: List[tuple] = []
+
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, query_embedding: List[float], query_text: str) -> Optional[Dict[str, Any]]:
+        """숫자가 같은 질문 중 가장 비슷한 질문의 답변 (임계값 미만이면 None)"""
+        if self.max_size <= 0:
+            return None
+
+        query = _normalize(query_embedding)
+        numbers = numeric_tokens(query_text)
+
+        with self._lock:
+            self._drop_expired()
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._matrix_ids = list(self._entries)
+                self._matrix = np.vstack([self._entries[i][1] for i in self._matrix_ids])
+                self._matrix_numbers = [self._entries[i][3] for i in self._matrix_ids]
+
+            scores = self._matrix @ query
+            # 숫자가 다른 질문은 후보에서 제외
+            same_numbers = np.array([n == numbers for n in self._matrix_numbers])
+            scores = np.where(same_numbers, scores, -np.inf)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            entry_id = self._matrix_ids[best]
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return dict(self._entries[entry_id][2], similarity=float(scores[best]))
+
+    def store(self, query_embedding: List[float], query_text: str, result: Dict[str, Any]):
+        """답변 저장 (가장 오래 안 쓴 항목부터 제거)"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[self._next_id] = (
+                time.time(),
+                _normalize(query_embedding),
+                dict(result),
+                numeric_tokens(query_text)
+            )
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self):
+        """전체 무효화 (문서 재임베딩/인덱스 재로딩 시)"""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+        print("🔄 시맨틱 답변 캐시 초기화")
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    def _drop_expired(self):
+        if self.ttl_seconds <= 0:
+            return
+        deadline = time.time() - self.ttl_seconds
+        expired = [i for i, entry in self._entries.items() if entry[0] < deadline]
+        for i in expired:
+            del self._entries[i]
+        if expired:
+            self._matrix = None
+
+
+def _normalize(embedding: List[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+# 전역 캐시
+answer_cache = SemanticAnswerCache(
+    max_size=settings.answer_cache_size,
+    ttl_seconds=settings.answer_cache_ttl,
+    threshold=settings.answer_cache_threshold
+)
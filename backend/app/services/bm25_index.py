@@ -0,0 +1,153 @@
+"""
+BM25 어휘 검색 인덱스
+
+전화번호, 강의실, 버스 노선, 장학금 이름처럼 키워드가 분명한 질문은
+임베딩 모델 없이 text_data 문서에서 바로 찾는다.
+한글은 글자 bigram, 영문/숫자는 단어 단위로 토큰화한다.
+"""
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from app.services.text_documents import load_text_directory
+from app.services.vector_index import metadata_contains
+
+_TOKEN_PATTERN = re.compile(r'[가-힣]+|[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """한글 글자 bigram + 영문/숫자 단어"""
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if run[0].isascii():
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class BM25Index:
+    """문서 목록 → BM25 역색인"""
+
+    def __init__(self, documents: List[Dict], k1: float = 1.5, b: float = 0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+
+        # 토큰 → [(문서 위치, 빈도)]
+        self.postings: Dict[str, List[tuple]] = {}
+        self.doc_lengths: List[int] = []
+
+        for i, doc in enumerate(documents):
+            metadata = doc.get('metadata') or {}
+            # 제목/카테고리도 본문과 함께 색인
+            text = ' '.join([
+                metadata.get('category', ''),
+                metadata.get('title', ''),
+                doc.get('content', '')
+            ])
+            counts = Counter(tokenize(text))
+            self.doc_lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self.postings.setdefault(token, []).append((i, tf))
+
+        self.avg_doc_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0
+
+        n = len(documents)
+        self.idf: Dict[str, float] = {
+            token: math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for token, posting in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(
+        self,
+        query: str,
+        k: int = 3,
+        filter_json: Optional[Dict] = None,
+        categories: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        BM25 top-k (categories가 있으면 해당 카테고리 문서만)
+
+        Returns:
+            [{"id", "content", "metadata", "similarity", "bm25_score"}, ...]
+            similarity는 1위 점수 대비 비율 (0~1)
+        """
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)):
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+            for i, tf in self.postings[token]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[i] / self.avg_doc_length)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if categories:
+            scores = {
+                i: score for i, score in scores.items()
+                if (self.documents[i].get('metadata') or {}).get('category') in categories
+            }
+
+        if filter_json:
+            scores = {
+                i: score for i, score in scores.items()
+                if metadata_contains(self.documents[i].get('metadata') or {}, filter_json)
+            }
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        if not ranked:
+            return []
+
+        top_score = ranked[0][1]
+        return [
+            {
+                "id": self.documents[i].get('id'),
+                "content": self.documents[i].get('content', ''),
+                "metadata": self.documents[i].get('metadata') or {},
+                "similarity": score / top_score,
+                "bm25_score": score
+            }
+            for i, score in ranked
+        ]
+
+
+def fuse_results(result_lists: List[List[Dict]], k: int = 3, rrf_k: int = 60) -> List[Dict[str, Any]]:
+    """
+    여러 검색 결과를 Reciprocal Rank Fusion으로 합침
+
+    같은 문서 판단: (카테고리, 제목, 본문)
+    먼저 나온 목록의 결과 형식을 유지하고 fused_score를 추가한다.
+    """
+    fused: Dict[tuple, Dict] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            metadata = result.get('metadata') or {}
+            key = (metadata.get('category'), metadata.get('title'), result.get('content'))
+            if key not in fused:
+                fused[key] = {**result, "fused_score": 0.0}
+            fused[key]['fused_score'] += 1 / (rrf_k + rank)
+
+    return sorted(fused.values(), key=lambda r: -r['fused_score'])[:k]
+
+
+# 전역 인덱스 (처음 사용할 때 text_data에서 생성)
+_bm25_index: Optional[BM25Index] = None
+_bm25_lock = threading.Lock()
+
+
+def get_bm25_index() -> BM25Index:
+    """BM25 인덱스 싱글톤 (임베딩 모델 없이 사용 가능)"""
+    global _bm25_index
+    if _bm25_index is None:
+        with _bm25_lock:
+            if _bm25_index is None:
+                index = BM25Index(load_text_directory())
+                print(f"✅ BM25 인덱스 생성: {len(index)}개 문서")
+                _bm25_index = index
+    return _bm25_index
@@ -1,35 +1,132 @@
 """
 챗봇 메인 로직 - 모든 서비스 통합
 """
-from typing import Dict, Any, Optional, List
+import asyncio
+import threading
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from app.config import settings
 from app.models.schemas import UserProfile, ChatMessage
 from app.services.query_router import query_router
-from app.services.vector_service import get_vector_service
+from app.services.vector_service import VectorSearchService, get_vector_service
+from app.services.answer_cache import answer_cache
+from app.services.llm_limiter import LLMOverloadedError, llm_limiter
+from app.services.token_budget import budget_prompt
+from app.services.llm_usage import extract_usage, llm_usage
+from app.services.llm_response_cache import llm_response_cache, make_key
+from app.services.bm25_index import fuse_results
+from app.services.query_rewriter import needs_rewrite, rewrite_cache
 from app.services.curriculum_service import curriculum_service
+from app.services.curriculum_cache import CurriculumSnapshot, curriculum_cache
+from app.services.equivalent_course_service import equivalent_course_service
 from app.services.entity_extractor import entity_extractor
 
 
+# ===== 프롬프트 =====
+# 프로바이더 프리픽스 캐시가 적중하도록 바뀌지 않는 지시문을 맨 앞에 두고,
+# 요청마다 달라지는 부분(대화 이력, 검색 결과, 질문)은 뒤에 붙인다.
+ANSWER_SYSTEM_PROMPT = """당신은 순천대학교 컴퓨터공학과 안내 챗봇입니다.
+주어진 정보를 바탕으로 학생의 질문에 친절하고 정확하게 답변해주세요.
+
+답변 규칙:
+1. 존댓말을 사용하고 친근하게 답변하세요
+2. 주어진 정보에 없는 내용은 "검색된 정보에서 찾을 수 없어요"라고 솔직히 말하세요
+3. 답변은 간결하게 핵심만 전달하세요
+4. 필요시 이모지를 활용해 친근함을 더하세요
+5. 마크다운 문법(**, ##, - 등)을 사용하지 마세요. 순수 텍스트와 이모지만 사용하세요
+6. 검색된 정보를 그대로 나열하지 말고, 질문에 맞춰 재구성하세요
+7. 이전 대화 맥락을 고려하여 답변하세요. "그거", "그 과목" 같은 표현이 나오면 이전 대화에서 언급된 내용을 참조하세요
+"""
+
+# 마지막 user 메시지 (검색 결과 + 현재 질문)
+ANSWER_USER_TEMPLATE = """검색된 정보:
+{context}
+
+질문: {message}"""
+
+REWRITE_SYSTEM_PROMPT = """당신은 검색 쿼리를 개선하는 전문가입니다.
+    이전 대화를 보고, 사용자의 현재 질문을 벡터 검색에 적합한 명확한 쿼리로 재구성하세요.
+
+    규칙:
+    1. "그거", "그 과목", "그것" 같은 대명사를 이전 대화의 구체적인 명사로 바꾸세요
+    2. 이전에 언급된 과목명, 주제를 포함하세요
+    3. 검색에 유용한 핵심 키워드만 남기세요
+    4. 한 줄로 간결하게 작성하세요
+    5. 재구성된 쿼리만 출력하세요 (설명 없이)
+
+    예시 1 (과목):
+    이전 대화:
+    학생: 그림 관련 교양 추천해줘
+    챗봇: 미술의 이해를 추천합니다
+
+    현재 질문: 과목코드 어떻게 돼?
+    출력: 미술의 이해 과목코드
+
+    예시 2 (시설):
+    이전 대화:
+    학생: 도서관 위치 어디야?
+    챗봇: 중앙도서관은 본관 옆에 있어요
+
+    현재 질문: 거기 운영시간은?
+    출력: 중앙도서관 운영시간
+
+    예시 3 (연락처):
+    이전 대화:
+    학생: 학생지원팀 연락처 알려줘
+    챗봇: 학생지원팀은 061-750-3114입니다
+
+    현재 질문: 거기 위치는?
+    출력: 학생지원팀 위치
+
+    예시 4 (일반):
+    이전 대화:
+    학생: 철학 교양 추천해줘
+    챗봇: 철학으로 문화읽기 추천해요
+
+    현재 질문: 다른거 없어?
+    출력: 철학 교양과목 추천"""
+
+REWRITE_USER_TEMPLATE = """이전 대화:
+    {history_text}
+
+    현재 질문: {message}
+
+    재구성된 검색 쿼리:"""
+
+
 class SchoolChatbot:
     """학교 챗봇 메인 클래스"""
     
     # ===== 초기화 =====
     def __init__(self):
-        # LLM 초기화
+        # LLM은 처음 사용할 때(또는 워밍업에서) 생성
         self.llm = None
-        self.vector_service = get_vector_service()
+        self._llm_lock = threading.Lock()
+        
+        # 동기 래퍼(chat)용 이벤트 루프 (처음 호출할 때 백그라운드 스레드에서 시작)
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_loop_lock = threading.Lock()
+        
+    
+    @property
+    def vector_service(self) -> VectorSearchService:
+        """벡터 서비스 (임베딩 모델은 워밍업 또는 첫 검색에서 로드)"""
+        return get_vector_service()
     
     def _get_llm(self) -> ChatOpenAI:
         """LLM 인스턴스 가져오기 (싱글톤)"""
         if self.llm is None:
-            self.llm = ChatOpenAI(
-                model=settings.model_name,
-                temperature=settings.temperature,
-                max_tokens=settings.max_tokens,
-                openai_api_key=settings.openai_api_key
-            )
+            with self._llm_lock:
+                if self.llm is None:
+                    self.llm = ChatOpenAI(
+                        model=settings.model_name,
+                        temperature=settings.temperature,
+                        max_tokens=settings.max_tokens,
+                        openai_api_key=settings.openai_api_key,
+                        timeout=settings.llm_timeout,
+                        stream_usage=True
+                    )
         return self.llm
     
     # ===== 메인 로직 =====
@@ -39,66 +136,146 @@ class SchoolChatbot:
         user_profile: Optional[UserProfile] = None,
         history: List[ChatMessage] = None
     ) -> Dict[str, Any]:
-        """메인 챗봇 로직"""
+        """
+        메인 챗봇 로직 (동기 래퍼 - 테스트/스크립트용, 서버는 achat 사용)
+        
+        LLM 싱글톤의 비동기 HTTP 커넥션 풀은 처음 쓴 이벤트 루프에 묶이므로
+        호출마다 asyncio.run으로 새 루프를 만들지 않고 오래 사는 루프 하나에서 실행한다.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.achat(message, user_profile, history), self._get_sync_loop()
+        )
+        return future.result()
+    
+    def _get_sync_loop(self) -> asyncio.AbstractEventLoop:
+        """동기 래퍼 전용 이벤트 루프 (데몬 스레드에서 계속 실행)"""
+        if self._sync_loop is None:
+            with self._sync_loop_lock:
+                if self._sync_loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(
+                        target=loop.run_forever, name="chatbot-sync-loop", daemon=True
+                    ).start()
+                    self._sync_loop = loop
+        return self._sync_loop
+    
+    async def achat(
+        self,
+        message: str,
+        user_profile: Optional[UserProfile] = None,
+        history: List[ChatMessage] = None
+    ) -> Dict[str, Any]:
+        """
+        메인 챗봇 로직
+        
+        LLM 대기열이 가득 차면 LLMOverloadedError (API에서 503 + Retry-After)
+        """
         
         if history is None:
             history = []
         
         # 1. 질문 분류
         query_type = query_router.classify(message)
-        needs_profile = query_router.needs_user_profile(message)
         
         # 2. general 질문 처리 (벡터 DB)
         if query_type == "general":
-            return self._handle_general_query(message, history)
+            return await self._ahandle_general_query(message, history)
         
-        # 3. curriculum 질문 처리 (관계형 DB)
+        # 3. curriculum 질문 처리 (관계형 DB, 동기 조회는 스레드에서)
         if query_type == "curriculum":
+            return await asyncio.to_thread(self._route_curriculum_query, message, user_profile, history)
+    
+        # 4. 기본값 (혹시 모를 경우)
+        else:
+            return await self._ahandle_general_query(message, history)
+        
+    async def achat_stream(
+        self,
+        message: str,
+        user_profile: Optional[UserProfile] = None,
+        history: List[ChatMessage] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        스트리밍 챗봇 로직 (SSE 이벤트 생성)
+        
+        - general: meta(출처, 질문 유형) → token ... → done
+        - curriculum 등 결정적 답변: message 한 번 → done
+        
+        done 이벤트의 데이터는 achat()과 같은 형식의 최종 결과다.
+        """
+        
+        if history is None:
+            history = []
+        
+        query_type = query_router.classify(message)
+        
+        if query_type == "curriculum":
+            result = await asyncio.to_thread(self._route_curriculum_query, message, user_profile, history)
+            yield "message", self._public_result(result)
+            yield "done", result
+            return
+        
+        async for event in self._astream_general_query(message, history):
+            yield event
+    
+    def _route_curriculum_query(
+        self,
+        message: str,
+        user_profile: Optional[UserProfile],
+        history: List
+    ) -> Dict[str, Any]:
+        """curriculum 질문: 메시지/세션에서 프로필을 정해 처리"""
+        
+        # 메시지에서 정보 추출
+        extracted = entity_extractor.extract_course_info(message)
+        
+        # 3-1. 학번 + 과목 정보 충분하면 → UserProfile 생성
+        if extracted['has_enough_info']:
+            user_profile = UserProfile(
+                admission_year=extracted['admission_year'],
+                courses_taken=extracted['courses']
+            )
+            print(f"✅ UserProfile 자동 생성: {extracted['admission_year']}학번, {len(extracted['courses'])}과목")
             
-            # 메시지에서 정보 추출
-            extracted = entity_extractor.extract_course_info(message)
+            result = self._handle_curriculum_query(message, user_profile, history)
+            result['user_profile'] = user_profile
             
-            # 3-1. 학번 + 과목 정보 충분하면 → UserProfile 생성
-            if extracted['has_enough_info']:
-                user_profile = UserProfile(
-                    admission_year=extracted['admission_year'],
-                    courses_taken=extracted['courses']
-                )
-                print(f"✅ UserProfile 자동 생성: {extracted['admission_year']}학번, {len(extracted['courses'])}과목")
-                
-                result = self._handle_curriculum_query(message, user_profile, history)
-                result['user_profile'] = user_profile
-                return result
+            # 교육과정에 없는 과목 코드 안내
+            if extracted['unknown_codes']:
+                unknown = ", ".join(extracted['unknown_codes'])
+                result['message'] = f"⚠️ {extracted['admission_year']}학번 교육과정에서 찾을 수 없는 과목 코드: {unknown}\n\n" + result['message']
             
-            # 3-2. 학번만 있음 → 교육과정 조회 or 동일대체 가능
-            elif extracted['admission_year']:
-                print(f"✅ 입학년도만 있음: {extracted['admission_year']}학번")
-                
-                user_profile = UserProfile(
-                    admission_year=extracted['admission_year'],
-                    courses_taken=[]
-                )
-                
-                return self._handle_curriculum_query(message, user_profile, history)
+            return result
+        
+        # 3-2. 학번만 있음 → 교육과정 조회 or 동일대체 가능
+        elif extracted['admission_year']:
+            print(f"✅ 입학년도만 있음: {extracted['admission_year']}학번")
             
-            # 3-3. 기존 user_profile 있음 → 그대로 사용
-            elif user_profile:
-                print(f"✅ 기존 UserProfile 사용: {user_profile.admission_year}학번")
-                return self._handle_curriculum_query(message, user_profile, history)
+            user_profile = UserProfile(
+                admission_year=extracted['admission_year'],
+                courses_taken=[]
+            )
             
-            # 3-4. 정보 부족 → 안내 메시지
-            else:
-                print("❌ 정보 부족: 안내 메시지 반환")
-                
-                curriculum_intent = any(kw in message for kw in [
-                    '전공필수', '전공선택', '교양필수', '교양선택',
-                    '전필', '전선', '교필', '교선',
-                    '뭐야', '알려줘', '리스트', '목록'
-                ])
-                
-                if curriculum_intent:
-                    return {
-            "message": """교육과정 정보를 알려드리려면 입학년도가 필요해요! 😊
+            return self._handle_curriculum_query(message, user_profile, history)
+        
+        # 3-3. 기존 user_profile 있음 → 그대로 사용
+        elif user_profile:
+            print(f"✅ 기존 UserProfile 사용: {user_profile.admission_year}학번")
+            return self._handle_curriculum_query(message, user_profile, history)
+        
+        # 3-4. 정보 부족 → 안내 메시지
+        else:
+            print("❌ 정보 부족: 안내 메시지 반환")
+            
+            curriculum_intent = any(kw in message for kw in [
+                '전공필수', '전공선택', '교양필수', '교양선택',
+                '전필', '전선', '교필', '교선',
+                '뭐야', '알려줘', '리스트', '목록'
+            ])
+            
+            if curriculum_intent:
+                return {
+                    "message": """교육과정 정보를 알려드리려면 입학년도가 필요해요! 😊
 
 몇 학번이신가요?
 
@@ -107,12 +284,12 @@ class SchoolChatbot:
 "25학번 교양 필수 알려줘"
 "2024학번인데 전공선택 과목 리스트 보여줘"
 """,
-            "query_type": query_type,
-            "sources": [],
-            "needs_profile": True
-        }
-                
-                return {
+                    "query_type": "curriculum",
+                    "sources": [],
+                    "needs_profile": True
+                }
+            
+            return {
                 "message": """개인 맞춤 답변을 위해 다음 정보가 필요해요! 😊
 
 📅 입학년도: 몇 학번이신가요?
@@ -124,14 +301,18 @@ class SchoolChatbot:
 또는
 "24학번, CS0614, XG0800 들었어"
 """,
-                "query_type": query_type,
+                "query_type": "curriculum",
                 "sources": [],
                 "needs_profile": True
             }
-    
-        # 4. 기본값 (혹시 모를 경우)
-        else:
-            return self._handle_general_query(message, history)
+
+    def _public_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """클라이언트로 보낼 결과 (세션 내부용 필드 제외)"""
+        return {
+            "message": result['message'],
+            "query_type": result.get('query_type'),
+            "sources": result.get('sources', [])
+        }
         
     # ===== 3가지 핵심 기능 =====        
     # 1. 개인 졸업사정 → 폼 반환
@@ -229,8 +410,6 @@ class SchoolChatbot:
     ) -> Dict[str, Any]:
         """동일대체 과목 질문 처리"""
         
-        from app.database.supabase_client import supabase
-        
         # 1. 과목 코드/명 추출
         course_codes = entity_extractor.extract_course_codes(message)
         course_names = entity_extractor.extract_course_names(message)
@@ -275,28 +454,12 @@ class SchoolChatbot:
                 "needs_profile": False
             }
         
-        # 3. 동일대체 정보 조회
-        try:
-            # 3-1. 이 과목이 옛날 과목인지 확인 (old_course_code)
-            old_result = supabase.table('equivalent_courses')\
-                .select('*')\
-                .eq('old_course_code', target_code)\
-                .execute()
-            
-            # 3-2. 이 과목이 새 과목인지 확인 (new_course_code)
-            new_result = supabase.table('equivalent_courses')\
-                .select('*')\
-                .eq('new_course_code', target_code)\
-                .execute()
-            
-        except Exception as e:
-            print(f"❌ 동일대체 정보 조회 실패: {e}")
-            return {
-                "message": "동일대체 정보를 조회하는 중 오류가 발생했어요. 😥",
-                "query_type": "curriculum",
-                "sources": [],
-                "needs_profile": False
-            }
+        # 3. 동일대체 정보 조회 (메모리 그래프)
+        # 3-1. 이 과목이 옛날 과목인지 확인 (old_course_code)
+        old_mappings = equivalent_course_service.get_mappings(target_code, "old_to_new")
+        
+        # 3-2. 이 과목이 새 과목인지 확인 (new_course_code)
+        new_mappings = equivalent_course_service.get_mappings(target_code, "new_to_old")
         
         # 4. 답변 생성
         answer = f"{target_course['course_name']} ({target_code})에 대한 동일대체 정보에요!\n\n"
@@ -304,9 +467,9 @@ class SchoolChatbot:
         has_info = False
         
         # 4-1. 현재 과목 → 새 과목으로 변경됨
-        if old_result.data:
+        if old_mappings:
             has_info = True
-            for item in old_result.data:
+            for item in old_mappings:
                 mapping_type = item['mapping_type']
                 effective_year = item['effective_year']
                 new_code = item['new_course_code']
@@ -318,9 +481,9 @@ class SchoolChatbot:
                 answer += f"  (매핑 유형: {mapping_type})\n\n"
         
         # 4-2. 현재 과목 ← 옛날 과목에서 변경됨
-        if new_result.data:
+        if new_mappings:
             has_info = True
-            for item in new_result.data:
+            for item in new_mappings:
                 mapping_type = item['mapping_type']
                 effective_year = item['effective_year']
                 old_code = item['old_course_code']
@@ -352,99 +515,22 @@ class SchoolChatbot:
         course_area: str,
         requirement_type: str
     ) -> Dict[str, Any]:
-        """요건별 전체 과목 리스트 반환"""
+        """
+        요건별 전체 과목 리스트 반환
+        
+        답변은 (학번, 영역, 요건)에만 의존하므로 학번 스냅샷에 메모이즈한다.
+        (스냅샷이 새로 로드/무효화되면 함께 다시 생성, 요건 없음 답변도 포함)
+        """
         
         try:
-            from app.database.supabase_client import supabase
-            
-            # DB에서 해당 요건의 모든 과목 조회
-            result = supabase.table('curriculums')\
-                .select('*')\
-                .eq('admission_year', admission_year)\
-                .eq('course_area', course_area)\
-                .eq('requirement_type', requirement_type)\
-                .order('grade')\
-                .order('semester')\
-                .order('course_code')\
-                .execute()
-            
-            # 과목이 없으면 = 해당 학번에 이 요건이 없음
-            if not result.data:
-                # 해당 학번의 사용 가능한 요건 조회
-                available_result = supabase.table('curriculums')\
-                    .select('requirement_type')\
-                    .eq('admission_year', admission_year)\
-                    .eq('course_area', course_area)\
-                    .execute()
-                
-                available_types = list(set([r['requirement_type'] for r in available_result.data]))
-                
-                message = f"{admission_year}학번에는 '{requirement_type}' 요건이 없어요. 😥\n\n"
-                
-                if available_types:
-                    message += f"💡 {admission_year}학번 {course_area} 요건:\n"
-                    for req_type in sorted(available_types):
-                        message += f"  • {req_type}\n"
-                    message += f"\n위 요건 중 하나를 선택해서 질문해주세요!"
-                else:
-                    message += f"{admission_year}학번 {course_area} 정보를 찾을 수 없어요."
-                
-                return {
-                    "message": message,
-                    "query_type": "curriculum",
-                    "sources": [],
-                    "needs_profile": False
-                }
-            
-            # 중복 제거
-            seen = set()
-            unique_courses = []
-            
-            for course in result.data:
-                code = course['course_code']
-                if code not in seen:
-                    seen.add(code)
-                    unique_courses.append(course)
+            snapshot = curriculum_cache.get_snapshot(admission_year)
+            if snapshot.version < 0:
+                raise RuntimeError(f"{admission_year}학번 교육과정 스냅샷 로딩 실패")
             
-            print(f"  총 {len(result.data)}개 → 중복 제거 후 {len(unique_courses)}개")
-            
-            # 포맷팅
-            answer = f"{admission_year}학번 {requirement_type} 과목 목록이에요!\n\n"
-            
-            current_grade = None
-            for course in unique_courses:  # ← unique_courses 사용!
-                grade = course.get('grade')
-                semester = course.get('semester')
-                
-                # 학년별 그룹화
-                if grade != current_grade:
-                    current_grade = grade
-                    answer += f"\n🧑‍🎓 {grade}학년\n"
-                
-                # 과목 정보
-                answer += f"  • {course['course_code']} {course['course_name']} ({course['credit']}학점)"
-                
-                if semester:
-                    answer += f" - {semester}학기 권장"
-                
-                answer += "\n"
-            
-            # 총 과목 수와 학점
-            total_courses = len(unique_courses)
-            total_credits = sum(c['credit'] for c in unique_courses)
-            
-            # 필요 학점 정보 추가
-            # 필요 학점 정보 추가
-            if '선택' in requirement_type:
-                required_credits = self._get_required_credits(admission_year, requirement_type)
-                
-                if required_credits:
-                    answer += f"\n💡 총 {total_courses}개 과목 ({total_credits}학점) 중 선택하여 {required_credits}학점을 채우면 돼요!"
-                else:
-                    answer += f"\n💡 총 {total_courses}개 과목 ({total_credits}학점) 중 선택하여 이수하면 돼요!"
-            else:
-                # 전공필수, 교양필수 등 - 모두 이수
-                answer += f"\n💡 총 {total_courses}개 과목, {total_credits}학점 모두 이수해야 해요!"
+            answer = snapshot.get_derived(
+                ('requirement_list', course_area, requirement_type),
+                lambda: self._build_requirement_list(snapshot, course_area, requirement_type)
+            )
             
             return {
                 "message": answer,
@@ -464,82 +550,423 @@ class SchoolChatbot:
                 "sources": [],
                 "needs_profile": False
             }    
+    
+    def _build_requirement_list(
+        self,
+        snapshot: CurriculumSnapshot,
+        course_area: str,
+        requirement_type: str
+    ) -> str:
+        """스냅샷에서 요건별 과목 목록 답변 생성 (학년 → 학기 → 과목코드 순)"""
+        
+        admission_year = snapshot.admission_year
+        courses = sorted(
+            snapshot.get_courses(course_area=course_area, requirement_type=requirement_type),
+            key=lambda c: (
+                _nulls_last(c.get('grade')),
+                _nulls_last(c.get('semester')),
+                _nulls_last(c.get('course_code'))
+            )
+        )
+        
+        # 과목이 없으면 = 해당 학번에 이 요건이 없음
+        if not courses:
+            # 해당 학번의 사용 가능한 요건
+            available_types = {
+                row['requirement_type']
+                for row in snapshot.get_courses(course_area=course_area)
+                if row.get('requirement_type')
+            }
+            
+            message = f"{admission_year}학번에는 '{requirement_type}' 요건이 없어요. 😥\n\n"
+            
+            if available_types:
+                message += f"💡 {admission_year}학번 {course_area} 요건:\n"
+                for req_type in sorted(available_types):
+                    message += f"  • {req_type}\n"
+                message += f"\n위 요건 중 하나를 선택해서 질문해주세요!"
+            else:
+                message += f"{admission_year}학번 {course_area} 정보를 찾을 수 없어요."
+            
+            return message
+        
+        # 중복 제거
+        seen = set()
+        unique_courses = []
+        
+        for course in courses:
+            code = course['course_code']
+            if code not in seen:
+                seen.add(code)
+                unique_courses.append(course)
+        
+        print(f"  총 {len(courses)}개 → 중복 제거 후 {len(unique_courses)}개")
+        
+        # 포맷팅
+        answer = f"{admission_year}학번 {requirement_type} 과목 목록이에요!\n\n"
+        
+        current_grade = None
+        for course in unique_courses:
+            grade = course.get('grade')
+            semester = course.get('semester')
+            
+            # 학년별 그룹화
+            if grade != current_grade:
+                current_grade = grade
+                answer += f"\n🧑‍🎓 {grade}학년\n"
+            
+            # 과목 정보
+            answer += f"  • {course['course_code']} {course['course_name']} ({course['credit']}학점)"
+            
+            if semester:
+                answer += f" - {semester}학기 권장"
+            
+            answer += "\n"
+        
+        # 총 과목 수와 학점
+        total_courses = len(unique_courses)
+        total_credits = sum(c['credit'] for c in unique_courses)
+        
+        # 필요 학점 정보 추가
+        if '선택' in requirement_type:
+            required_credits = snapshot.get_required_credits(requirement_type)
+            
+            if required_credits:
+                answer += f"\n💡 총 {total_courses}개 과목 ({total_credits}학점) 중 선택하여 {required_credits}학점을 채우면 돼요!"
+            else:
+                answer += f"\n💡 총 {total_courses}개 과목 ({total_credits}학점) 중 선택하여 이수하면 돼요!"
+        else:
+            # 전공필수, 교양필수 등 - 모두 이수
+            answer += f"\n💡 총 {total_courses}개 과목, {total_credits}학점 모두 이수해야 해요!"
+        
+        return answer
         
     # ===== 일반 정보 =====
-    def _handle_general_query(self, message: str, history: List = None) -> Dict[str, Any]:
+    async def _ahandle_general_query(self, message: str, history: List = None) -> Dict[str, Any]:
         """일반 정보 질문 처리 (벡터 검색)"""
         
+        cached = await asyncio.to_thread(self._get_cached_answer, message, history)
+        if cached:
+            return cached
+        
+        prepared = await self._aprepare_general_query(message, history)
+        
+        if not prepared['search_results']:
+            return self._no_search_result_response()
+        
+        # LLM 호출 (응답 캐시 → 동시성 제한 + 타임아웃)
+        token_usage = prepared['token_usage']
+        try:
+            answer, usage = await self._ainvoke_llm("answer", prepared['prompt'], prepared['inputs'])
+            token_usage = {**token_usage, **usage}
+        except LLMOverloadedError:
+            raise
+        except Exception as e:
+            print(f"❌ LLM 호출 실패: {e}")
+            import traceback
+            traceback.print_exc()
+            
+            answer = self._llm_error_answer(prepared)
+        else:
+            await asyncio.to_thread(self._store_answer, message, history, answer, prepared['search_results'])
+        
+        return {
+            "message": answer,
+            "query_type": "general",
+            "sources": prepared['search_results'],
+            "needs_profile": False,
+            "token_usage": token_usage
+        }
+    
+    async def _astream_general_query(
+        self,
+        message: str,
+        history: List = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """일반 정보 질문 처리 (LLM 토큰 스트리밍)"""
+        
+        cached = await asyncio.to_thread(self._get_cached_answer, message, history)
+        if cached:
+            yield "message", self._public_result(cached)
+            yield "done", cached
+            return
+        
+        prepared = await self._aprepare_general_query(message, history)
+        
+        if not prepared['search_results']:
+            result = self._no_search_result_response()
+            yield "message", self._public_result(result)
+            yield "done", result
+            return
+        
+        # 검색이 끝나면 출처부터 전송
+        yield "meta", {
+            "query_type": "general",
+            "sources": prepared['search_results']
+        }
+        
+        prompt, inputs = prepared['prompt'], prepared['inputs']
+        token_usage = prepared['token_usage']
+        cache_key = self._llm_cache_key("answer", prompt, inputs)
+        cached_response = await asyncio.to_thread(llm_response_cache.get, cache_key)
+        try:
+            if cached_response is not None:
+                # 같은 프롬프트의 저장된 응답 → 한 번에 전송
+                print("⚡ LLM 응답 캐시 적중 (answer)")
+                answer = cached_response['content']
+                token_usage = {**token_usage, "llm_cache_hit": 1}
+                yield "token", {"text": answer}
+            else:
+                chain = prompt | self._get_llm()
+                chunks = []
+                usage = {}
+                async for chunk in llm_limiter.stream(lambda: chain.astream(inputs)):
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        yield "token", {"text": chunk.content}
+                    if chunk.usage_metadata:
+                        # 사용량은 마지막 청크에만 옴 (stream_usage=True)
+                        usage = self._record_usage("answer", chunk)
+                        token_usage = {**token_usage, **usage}
+                answer = "".join(chunks)
+                if answer:
+                    await asyncio.to_thread(
+                        llm_response_cache.put, cache_key, "answer", {"content": answer, "usage": usage}
+                    )
+            await asyncio.to_thread(self._store_answer, message, history, answer, prepared['search_results'])
+        except LLMOverloadedError:
+            raise
+        except Exception as e:
+            print(f"❌ LLM 스트리밍 실패: {e}")
+            import traceback
+            traceback.print_exc()
+            
+            answer = self._llm_error_answer(prepared)
+            yield "message", {"message": answer}
+        
+        yield "done", {
+            "message": answer,
+            "query_type": "general",
+            "sources": prepared['search_results'],
+            "needs_profile": False,
+            "token_usage": token_usage
+        }
+    
+    async def _ainvoke_llm(
+        self,
+        kind: str,
+        prompt: ChatPromptTemplate,
+        inputs: Dict[str, Any]
+    ) -> Tuple[str, Dict[str, int]]:
+        """
+        LLM 호출 (응답 캐시 → 동시성 제한 + 타임아웃)
+        
+        Returns:
+            (응답 텍스트, 토큰 사용량) - 캐시 적중이면 사용량은 {"llm_cache_hit": 1}
+        """
+        cache_key = self._llm_cache_key(kind, prompt, inputs)
+        cached = await asyncio.to_thread(llm_response_cache.get, cache_key)
+        if cached is not None:
+            print(f"⚡ LLM 응답 캐시 적중 ({kind})")
+            return cached['content'], {"llm_cache_hit": 1}
+        
+        chain = prompt | self._get_llm()
+        response = await llm_limiter.run(lambda: chain.ainvoke(inputs))
+        usage = self._record_usage(kind, response)
+        
+        if response.content:
+            await asyncio.to_thread(
+                llm_response_cache.put, cache_key, kind, {"content": response.content, "usage": usage}
+            )
+        return response.content, usage
+    
+    def _llm_cache_key(self, kind: str, prompt: ChatPromptTemplate, inputs: Dict[str, Any]) -> str:
+        """LLM 응답 캐시 키 (모델 설정 + 완성된 프롬프트 메시지)"""
+        messages = [(m.type, m.content) for m in prompt.format_messages(**inputs)]
+        params = {
+            "model": settings.model_name,
+            "temperature": settings.temperature,
+            "max_tokens": settings.max_tokens
+        }
+        return make_key(kind, params, messages)
+    
+    def _record_usage(self, kind: str, response) -> Dict[str, int]:
+        """실제 토큰 사용량(캐시된 입력 포함) 기록"""
+        usage = extract_usage(response)
+        llm_usage.record(kind, usage)
+        if usage.get('cached_tokens'):
+            print(f"  → 프롬프트 캐시 적중: {usage['cached_tokens']}/{usage['api_prompt_tokens']} 토큰")
+        return usage
+    
+    def _get_cached_answer(self, message: str, history: List = None) -> Optional[Dict[str, Any]]:
+        """시맨틱 캐시 조회 (대화 이력이 없는 질문만)"""
+        if history:
+            return None
+        
+        try:
+            cached = answer_cache.lookup(self.vector_service.embed_query(message), message)
+        except Exception as e:
+            print(f"⚠️ 답변 캐시 조회 실패 (무시): {e}")
+            return None
+        
+        if not cached:
+            return None
+        
+        print(f"⚡ 답변 캐시 적중 (유사도 {cached['similarity']:.3f})")
+        return {
+            "message": cached['message'],
+            "query_type": "general",
+            "sources": cached['sources'],
+            "needs_profile": False
+        }
+    
+    def _store_answer(self, message: str, history: List, answer: str, sources: List[Dict]):
+        """LLM 답변을 시맨틱 캐시에 저장 (대화 이력이 없는 질문만)"""
+        if history or not answer:
+            return
+        
+        try:
+            answer_cache.store(
+                self.vector_service.embed_query(message),
+                message,
+                {"message": answer, "sources": sources}
+            )
+        except Exception as e:
+            print(f"⚠️ 답변 캐시 저장 실패 (무시): {e}")
+    
+    async def _aprepare_general_query(self, message: str, history: List = None) -> Dict[str, Any]:
+        """
+        일반 질문 준비: 쿼리 재구성 → 벡터 검색 → 답변 프롬프트 구성
+        
+        Returns:
+            {"search_results": [...], "context": "...", "prompt": ChatPromptTemplate, "inputs": {...}, "token_usage": {...}}
+        """
+        
         #이전 질문 저장
         if history is None:
             history = []
         
-        # 이전 대화 있다면 쿼리 재구성    
+        # 검색 (필요할 때만 쿼리 재구성)
+        search_results = await self._aretrieve_general(message, history)
+        
+        if not search_results:
+            return {
+                "search_results": [],
+                "context": "",
+                "prompt": None,
+                "inputs": None,
+                "token_usage": None
+            }
+        
+        # 검색 결과를 컨텍스트로 사용
+        context = self.vector_service.format_search_results(search_results)
+        
+        # LLM 프롬프트: 고정 지시문 → 이전 대화 → 검색 결과 + 현재 질문
+        messages = [("system", ANSWER_SYSTEM_PROMPT)]
+        
+        # 이전 대화 이력 (토큰 예산 안에 들어가는 최근 대화만)
+        # 마지막 user 메시지는 템플릿 문구까지 포함해서 셈 (실제로 보내는 그대로)
+        history, token_usage = budget_prompt(
+            ANSWER_SYSTEM_PROMPT, "", history,
+            ANSWER_USER_TEMPLATE.format(context=context, message=message),
+            settings.prompt_token_budget
+        )
+        if token_usage['history_dropped']:
+            print(f"  → 대화 이력 {token_usage['history_dropped']}개 제외 (토큰 예산 {settings.prompt_token_budget})")
+        
+        for msg in history:
+            # 템플릿으로 해석되지 않도록 중괄호 이스케이프
+            content = msg["content"].replace("{", "{{").replace("}", "}}")
+            if msg["role"] == "user":
+                messages.append(("user", content))
+            elif msg["role"] == "assistant":
+                messages.append(("assistant", content))
+                
+        # 검색 결과 + 현재 질문 (템플릿 변수로 넘겨 중괄호가 있어도 안전)
+        messages.append(("user", ANSWER_USER_TEMPLATE))
+        
+        prompt = ChatPromptTemplate.from_messages(messages)
+        
+        return {
+            "search_results": search_results,
+            "context": context,
+            "prompt": prompt,
+            "inputs": {"context": context, "message": message},
+            "token_usage": token_usage
+        }
+    
+    async def _aretrieve_general(self, message: str, history: List) -> List[Dict[str, Any]]:
+        """
+        일반 질문 검색
+        
+        - 이력이 없거나 지시어/생략이 없는 질문: 원문 그대로 검색 (LLM 재구성 생략)
+        - 재구성이 필요한 질문: 재구성(LLM, 캐시)과 원문 검색을 동시에 → 두 결과를 RRF로 결합
+        """
+        if not history:
+            return await asyncio.to_thread(self._retrieve, message)
+        
+        if not needs_rewrite(message):
+            print("  → 쿼리 재구성 생략 (지시어/생략 없음)")
+            return await asyncio.to_thread(self._retrieve, message)
+        
+        search_query = rewrite_cache.get(history, message)
+        if search_query is not None:
+            print(f"  → 쿼리 재구성 캐시 적중: {search_query}")
+            raw_results = await asyncio.to_thread(self._retrieve, message)
+        else:
+            # 원문 검색은 재구성 LLM 호출과 동시에
+            raw_task = asyncio.create_task(asyncio.to_thread(self._retrieve, message))
+            search_query = await self._arewrite_query(message, history)
+            raw_results = await raw_task
+            
+            if search_query != message:
+                rewrite_cache.put(history, message, search_query)
+        
+        if search_query == message:
+            return raw_results
+        
+        rewritten_results = await asyncio.to_thread(self._retrieve, search_query)
+        return fuse_results([rewritten_results, raw_results], k=3)
+    
+    def _retrieve(self, search_query: str) -> List[Dict[str, Any]]:
+        """벡터 검색 (질문 카테고리로 검색 범위 축소)"""
+        categories = []
+        if settings.category_routing_enabled:
+            categories = query_router.detect_categories(search_query)
+            if categories:
+                print(f"  → 카테고리 라우팅: {categories}")
+        
+        return self.vector_service.search(search_query, k=3, category_filter=categories or None)
+    
+    async def _arewrite_query(self, message: str, history: List) -> str:
+        """이전 대화를 보고 검색 쿼리 재구성 (LLM, 실패 시 원본)"""
+        
         search_query = message
         
         # 이전 대화가 있을 때만
         if history:  
             try:
-                # 대화 이력 텍스트로 변환
+                # 대화 이력 텍스트로 변환 (최근 4개 중 토큰 예산 안에 들어가는 것만)
+                # 질문은 템플릿 문구까지 포함해서 셈 (이력 자리는 비워 둠)
+                recent_history, _ = budget_prompt(
+                    REWRITE_SYSTEM_PROMPT, "", history[-4:],
+                    REWRITE_USER_TEMPLATE.format(history_text="", message=message),
+                    settings.rewrite_prompt_token_budget
+                )
                 history_text = ""
-                for msg in history[-4:]:  # 최근 4개만
+                for msg in recent_history:
                     role = "학생" if msg["role"] == "user" else "챗봇"
                     history_text += f"{role}: {msg['content']}\n"
                 
-                # 쿼리 재구성 프롬프트
+                # 쿼리 재구성 프롬프트 (고정 지시문 → 대화/질문)
                 rewrite_prompt = ChatPromptTemplate.from_messages([
-                    ("system", """당신은 검색 쿼리를 개선하는 전문가입니다.
-    이전 대화를 보고, 사용자의 현재 질문을 벡터 검색에 적합한 명확한 쿼리로 재구성하세요.
-
-    규칙:
-    1. "그거", "그 과목", "그것" 같은 대명사를 이전 대화의 구체적인 명사로 바꾸세요
-    2. 이전에 언급된 과목명, 주제를 포함하세요
-    3. 검색에 유용한 핵심 키워드만 남기세요
-    4. 한 줄로 간결하게 작성하세요
-    5. 재구성된 쿼리만 출력하세요 (설명 없이)
-
-    예시 1 (과목):
-    이전 대화:
-    학생: 그림 관련 교양 추천해줘
-    챗봇: 미술의 이해를 추천합니다
-
-    현재 질문: 과목코드 어떻게 돼?
-    출력: 미술의 이해 과목코드
-
-    예시 2 (시설):
-    이전 대화:
-    학생: 도서관 위치 어디야?
-    챗봇: 중앙도서관은 본관 옆에 있어요
-
-    현재 질문: 거기 운영시간은?
-    출력: 중앙도서관 운영시간
-
-    예시 3 (연락처):
-    이전 대화:
-    학생: 학생지원팀 연락처 알려줘
-    챗봇: 학생지원팀은 061-750-3114입니다
-
-    현재 질문: 거기 위치는?
-    출력: 학생지원팀 위치
-
-    예시 4 (일반):
-    이전 대화:
-    학생: 철학 교양 추천해줘
-    챗봇: 철학으로 문화읽기 추천해요
-
-    현재 질문: 다른거 없어?
-    출력: 철학 교양과목 추천"""),
-        ("user", f"""이전 대화:
-    {history_text}
-
-    현재 질문: {message}
-
-    재구성된 검색 쿼리:""")
+                    ("system", REWRITE_SYSTEM_PROMPT),
+                    ("user", REWRITE_USER_TEMPLATE)
                 ])
                 
-                llm = self._get_llm()
-                rewrite_chain = rewrite_prompt | llm
-                rewrite_response = rewrite_chain.invoke({})
-                search_query = rewrite_response.content.strip()
+                rewrite_inputs = {"history_text": history_text, "message": message}
+                rewritten, _ = await self._ainvoke_llm("rewrite", rewrite_prompt, rewrite_inputs)
+                search_query = rewritten.strip()
                 
                 print(f"\n🔍 쿼리 재구성:")
                 print(f"  원본: {message}")
@@ -549,74 +976,23 @@ class SchoolChatbot:
                 print(f"⚠️ 쿼리 재구성 실패, 원본 사용: {e}")
                 search_query = message
         
-        # 벡터 검색
-        search_results = self.vector_service.search(search_query, k=3)
-        
-        if not search_results:
-            return {
-                "message": "죄송해요, 관련 정보를 찾을 수 없어요. 다른 질문을 해주시겠어요? 🤔",
-                "query_type": "general",
-                "sources": [],
-                "needs_profile": False
-            }
-        
-        # 검색 결과를 컨텍스트로 사용
-        context = self.vector_service.format_search_results(search_results)
-        
-        # LLM 프롬프트
-        messages = [
-        ("system", f"""당신은 순천대학교 컴퓨터공학과 안내 챗봇입니다.
-주어진 정보를 바탕으로 학생의 질문에 친절하고 정확하게 답변해주세요.
-
-답변 규칙:
-1. 존댓말을 사용하고 친근하게 답변하세요
-2. 주어진 정보에 없는 내용은 "검색된 정보에서 찾을 수 없어요"라고 솔직히 말하세요
-3. 답변은 간결하게 핵심만 전달하세요
-4. 필요시 이모지를 활용해 친근함을 더하세요
-5. 마크다운 문법(**, ##, - 등)을 사용하지 마세요. 순수 텍스트와 이모지만 사용하세요
-6. 검색된 정보를 그대로 나열하지 말고, 질문에 맞춰 재구성하세요
-7. 이전 대화 맥락을 고려하여 답변하세요. "그거", "그 과목" 같은 표현이 나오면 이전 대화에서 언급된 내용을 참조하세요
-
-검색된 정보:
-{context}
-""")
-    ]
-        # 이전 대화 이력
-        for msg in history:
-            if msg["role"] == "user":
-                messages.append(("user", msg["content"]))
-            elif msg["role"] == "assistant":
-                messages.append(("assistant", msg["content"]))
-                
-        # 현재 질문        
-        messages.append(("user", message))
-        
-        prompt = ChatPromptTemplate.from_messages(messages)
-        
-        # LLM 호출
-        llm = self._get_llm()
-        chain = prompt | llm
-        
-        try:
-            response = chain.invoke({})
-            answer = response.content
-        except Exception as e:
-            print(f"❌ LLM 호출 실패: {e}")
-            import traceback
-            traceback.print_exc()
-            
-            # 검색 결과가 있으면 최소한의 정보라도 제공
-            if search_results:
-                answer = f"검색 결과를 찾았지만 답변 생성 중 오류가 발생했어요.\n\n검색된 정보:\n{context[:200]}..."
-            else:
-                answer = "죄송해요, 답변 생성 중 오류가 발생했어요. 다시 시도해주세요. 😅"
-        
+        return search_query
+    
+    def _no_search_result_response(self) -> Dict[str, Any]:
+        """검색 결과가 없을 때 응답"""
         return {
-            "message": answer,
+            "message": "죄송해요, 관련 정보를 찾을 수 없어요. 다른 질문을 해주시겠어요? 🤔",
             "query_type": "general",
-            "sources": search_results,
+            "sources": [],
             "needs_profile": False
         }
+    
+    def _llm_error_answer(self, prepared: Dict[str, Any]) -> str:
+        """LLM 호출 실패 시 답변"""
+        # 검색 결과가 있으면 최소한의 정보라도 제공
+        if prepared['search_results']:
+            return f"검색 결과를 찾았지만 답변 생성 중 오류가 발생했어요.\n\n검색된 정보:\n{prepared['context'][:200]}..."
+        return "죄송해요, 답변 생성 중 오류가 발생했어요. 다시 시도해주세요. 😅"
 
     # ===== 유틸리티 =====
     def _extract_requirement_type(self, message: str) -> Dict[str, str]:
@@ -658,30 +1034,11 @@ class SchoolChatbot:
             'type': req_type,
             'area': course_area
         }
-        
-    def _get_required_credits(self, admission_year: int, requirement_type: str) -> int:
-        """요건별 필요 학점 반환 - DB에서 조회"""
-        
-        from app.database.supabase_client import supabase
-        
-        try:
-            # DB에서 학번별 요건 정보 조회
-            result = supabase.table('graduation_requirements')\
-                .select('required_credits')\
-                .eq('admission_year', admission_year)\
-                .eq('requirement_type', requirement_type)\
-                .execute()
-            
-            if result.data:
-                return result.data[0]['required_credits']
-            
-            # DB에 없으면 None 반환 (기본값 사용 안 함!)
-            print(f"⚠️ {admission_year}학번에는 {requirement_type} 정보가 없음")
-            return None
-            
-        except Exception as e:
-            print(f"❌ 필요 학점 조회 실패: {e}")
-            return None
-        
+
+
+def _nulls_last(value):
+    """정렬 키: None은 뒤로 (DB order와 같게)"""
+    return (value is None, value if value is not None else 0)
+
 
 chatbot = SchoolChatbot()
\ No newline at end of file
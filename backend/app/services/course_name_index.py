@@ -0,0 +1,132 @@
+"""
+과목명 인메모리 검색 인덱스
+
+학번별 교육과정 과목명을 정규화(띄어쓰기 제거 + 소문자)해서
+문자 bigram 역색인으로 후보를 좁히고, 오타는 편집 거리로 보정한다.
+"""
+from typing import Dict, List, Optional, Set, Tuple
+
+
+def normalize(text: str) -> str:
+    """띄어쓰기 제거 + 소문자"""
+    return text.replace(' ', '').lower()
+
+
+def _bigrams(text: str) -> Set[str]:
+    if len(text) < 2:
+        return {text}
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Levenshtein 거리"""
+    if len(a) < len(b):
+        a, b = b, a
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        previous = current
+    return previous[-1]
+
+
+class CourseNameIndex:
+    """과목명 → 교육과정 행 검색 인덱스"""
+
+    def __init__(
+        self,
+        rows: List[Dict],
+        min_partial_score: float = 0.6,
+        min_fuzzy_score: float = 0.75,
+        max_fuzzy_candidates: int = 20
+    ):
+        self.min_partial_score = min_partial_score
+        self.min_fuzzy_score = min_fuzzy_score
+        self.max_fuzzy_candidates = max_fuzzy_candidates
+
+        # 정규화된 과목명 → 첫 번째 행
+        self.rows_by_name: Dict[str, Dict] = {}
+        for row in rows:
+            if row.get('course_name') and row.get('course_code'):
+                self.rows_by_name.setdefault(normalize(row['course_name']), row)
+
+        self.names: List[str] = list(self.rows_by_name)
+
+        # bigram → 과목명 위치
+        self.postings: Dict[str, Set[int]] = {}
+        for i, name in enumerate(self.names):
+            for gram in _bigrams(name):
+                self.postings.setdefault(gram, set()).add(i)
+
+    def search(self, course_name: str) -> Optional[Tuple[Dict, float]]:
+        """
+        과목명 검색
+
+        Returns:
+            (교육과정 행, 점수) or None
+            - 1.0: 정확히 일치
+            - 부분 일치: 검색어 길이 / 과목명 길이 (0.6 이상)
+            - 오타 보정: 1 - 편집거리 / 긴 쪽 길이 (0.75 이상)
+        """
+        query = normalize(course_name)
+
+        if len(query) < 2:
+            return None
+
+        # === 1단계: 정확한 이름 매칭 ===
+        if query in self.rows_by_name:
+            return self.rows_by_name[query], 1.0
+
+        grams = _bigrams(query)
+
+        # === 2단계: 부분 매칭 (검색어의 bigram을 모두 가진 과목명만) ===
+        candidates = None
+        for gram in grams:
+            posting = self.postings.get(gram, set())
+            candidates = posting if candidates is None else candidates & posting
+            if not candidates:
+                break
+
+        best_index = None
+        best_score = 0
+        for i in sorted(candidates or ()):
+            name = self.names[i]
+            if query in name:
+                score = len(query) / len(name)
+                if score > best_score:
+                    best_score = score
+                    best_index = i
+
+        if best_index is not None and best_score >= self.min_partial_score:
+            return self.rows_by_name[self.names[best_index]], best_score
+
+        # === 3단계: 오타 보정 (bigram이 많이 겹치는 후보만 편집 거리 계산) ===
+        if len(query) < 3:
+            return None
+
+        overlap: Dict[int, int] = {}
+        for gram in grams:
+            for i in self.postings.get(gram, ()):
+                overlap[i] = overlap.get(i, 0) + 1
+
+        candidates = sorted(overlap, key=lambda i: (-overlap[i], i))[:self.max_fuzzy_candidates]
+
+        best_index = None
+        best_score = 0
+        for i in candidates:
+            name = self.names[i]
+            score = 1 - _edit_distance(query, name) / max(len(query), len(name))
+            if score > best_score:
+                best_score = score
+                best_index = i
+
+        if best_index is not None and best_score >= self.min_fuzzy_score:
+            return self.rows_by_name[self.names[best_index]], round(best_score, 3)
+
+        return None
@@ -0,0 +1,212 @@
+"""
+학번별 교육과정 스냅샷 캐시
+
+curriculums + graduation_requirements 는 학기 단위로만 바뀌므로
+학번별로 한 번에 불러와 메모리에서 조회한다.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from app.config import settings
+from app.database.repository import repository
+
+# 로딩 실패 후 재시도까지 기다리는 시간 (그동안은 빈 스냅샷 반환, DB 장애 시 요청마다 재조회 방지)
+LOAD_RETRY_SECONDS = 30
+
+
+class CurriculumSnapshot:
+    """특정 학번의 교육과정 + 졸업요건 스냅샷"""
+
+    def __init__(
+        self,
+        admission_year: int,
+        curriculums: List[Dict],
+        requirements: List[Dict],
+        version: int = 0
+    ):
+        self.admission_year = admission_year
+        self.curriculums = curriculums
+        self.requirements = requirements
+        self.version = version
+        self.loaded_at = time.time()
+
+        # 과목 코드 → 첫 번째 행
+        self.courses_by_code: Dict[str, Dict] = {}
+        for row in curriculums:
+            if row.get('course_code'):
+                self.courses_by_code.setdefault(row['course_code'], row)
+
+        # 스냅샷에서 파생된 구조 (인덱스 등) → 스냅샷과 함께 무효화
+        self._derived: Dict[Hashable, Any] = {}
+        self._derived_lock = threading.Lock()
+
+    def get_derived(self, key: Hashable, builder: Callable[[], Any]) -> Any:
+        """
+        스냅샷 데이터로 만든 파생 구조 조회 (없으면 한 번만 생성)
+
+        Example:
+            snapshot.get_derived(('requirement_index', 3), build_index)
+        """
+        if key in self._derived:
+            return self._derived[key]
+
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = builder()
+            return self._derived[key]
+
+    def is_expired(self, ttl_seconds: int) -> bool:
+        """TTL 만료 여부 (0 이하면 만료 없음)"""
+        if ttl_seconds <= 0:
+            return False
+        return time.time() - self.loaded_at > ttl_seconds
+
+    # ===== 졸업요건 =====
+    def get_requirement(
+        self,
+        requirement_type: str,
+        course_area: Optional[str] = None
+    ) -> Optional[Dict]:
+        """요건 행 하나 조회 (첫 번째 일치 행)"""
+        for req in self.requirements:
+            if req.get('requirement_type') != requirement_type:
+                continue
+            if course_area and req.get('course_area') != course_area:
+                continue
+            return req
+        return None
+
+    def get_required_credits(
+        self,
+        requirement_type: str,
+        course_area: Optional[str] = None
+    ) -> Optional[int]:
+        """요건별 필요 학점"""
+        req = self.get_requirement(requirement_type, course_area)
+        return req['required_credits'] if req else None
+
+    def get_total_graduation_credits(self) -> Optional[int]:
+        """총 졸업 학점"""
+        return self.get_required_credits('총졸업학점', course_area='전체')
+
+    # ===== 교육과정 =====
+    def get_course(self, course_code: str) -> Optional[Dict]:
+        """과목 상세 정보 (복사본)"""
+        row = self.courses_by_code.get(course_code)
+        return dict(row) if row else None
+
+    def get_courses(
+        self,
+        course_area: Optional[str] = None,
+        requirement_type: Optional[str] = None,
+        track: Optional[str] = None,
+        track_prefix: Optional[str] = None
+    ) -> List[Dict]:
+        """조건에 맞는 교육과정 행 목록"""
+        rows = []
+        for row in self.curriculums:
+            if course_area and row.get('course_area') != course_area:
+                continue
+            if requirement_type and row.get('requirement_type') != requirement_type:
+                continue
+            if track and row.get('track') != track:
+                continue
+            if track_prefix and not (row.get('track') or '').startswith(track_prefix):
+                continue
+            rows.append(row)
+        return rows
+
+
+class CurriculumCache:
+    """학번별 스냅샷 캐시 (TTL + 버전 기반 무효화)"""
+
+    def __init__(self, ttl_seconds: int = 3600):
+        self.ttl_seconds = ttl_seconds
+        self._snapshots: Dict[int, CurriculumSnapshot] = {}
+        self._lock = threading.Lock()
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """스냅샷을 로드/무효화할 때마다 증가하는 캐시 버전"""
+        return self._version
+
+    def get_snapshot(self, admission_year: int) -> CurriculumSnapshot:
+        """
+        학번 스냅샷 반환 (없거나 만료됐으면 한 번에 로드)
+
+        로딩에 실패하면 LOAD_RETRY_SECONDS 동안은 재시도하지 않고 빈 스냅샷(version=-1)을 반환한다.
+        """
+        snapshot = self._snapshots.get(admission_year)
+        if snapshot and self._is_valid(snapshot):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshots.get(admission_year)
+            if snapshot and self._is_valid(snapshot):
+                return snapshot
+
+            snapshot = self._load(admission_year)
+            if snapshot is None:
+                # 실패한 빈 스냅샷도 캐시 → LOAD_RETRY_SECONDS 뒤에 재시도
+                snapshot = CurriculumSnapshot(admission_year, [], [], version=-1)
+
+            self._snapshots[admission_year] = snapshot
+            return snapshot
+
+    async def aget_snapshot(self, admission_year: int) -> CurriculumSnapshot:
+        """get_snapshot의 async 버전 (로드가 필요할 때만 DB 스레드 풀에서 실행)"""
+        snapshot = self._snapshots.get(admission_year)
+        if snapshot and self._is_valid(snapshot):
+            return snapshot
+
+        return await repository.run(self.get_snapshot, admission_year)
+
+    def refresh(self, admission_year: Optional[int] = None) -> Dict:
+        """
+        스냅샷 무효화 (수동 새로고침)
+
+        Args:
+            admission_year: 특정 학번만 무효화 (None이면 전체)
+        """
+        with self._lock:
+            self._version += 1
+            if admission_year is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(admission_year, None)
+
+        print(f"🔄 교육과정 캐시 무효화: {admission_year or '전체'} (v{self._version})")
+        return {
+            "version": self._version,
+            "admission_year": admission_year,
+            "cached_years": sorted(year for year, s in self._snapshots.items() if s.version >= 0)
+        }
+
+    def _is_valid(self, snapshot: CurriculumSnapshot) -> bool:
+        if snapshot.version < 0:
+            return time.time() - snapshot.loaded_at < LOAD_RETRY_SECONDS
+        return not snapshot.is_expired(self.ttl_seconds)
+
+    def _load(self, admission_year: int) -> Optional[CurriculumSnapshot]:
+        """curriculums + graduation_requirements 일괄 조회"""
+        try:
+            curriculums = repository.fetch_curriculums(admission_year)
+            requirements = repository.fetch_graduation_requirements(admission_year)
+        except Exception as e:
+            print(f"❌ {admission_year}학번 교육과정 스냅샷 로딩 실패 ({LOAD_RETRY_SECONDS}초 뒤 재시도): {e}")
+            return None
+
+        self._version += 1
+        snapshot = CurriculumSnapshot(
+            admission_year,
+            curriculums,
+            requirements,
+            version=self._version
+        )
+        print(f"✅ {admission_year}학번 스냅샷 로딩: 교육과정 {len(snapshot.curriculums)}개, 졸업요건 {len(snapshot.requirements)}개")
+        return snapshot
+
+
+# 전역 캐시
+curriculum_cache = CurriculumCache(ttl_seconds=settings.curriculum_cache_ttl)
@@ -1,10 +1,13 @@
 """
 교육과정 계산 서비스
 """
-from typing import Dict, List, Any, Optional
-from app.database.supabase_client import supabase
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Any, Optional
+from app.config import settings
 from app.models.schemas import UserProfile
 from app.services.equivalent_course_service import equivalent_course_service
+from app.services.curriculum_cache import curriculum_cache
+from app.services.requirement_index import RequirementIndex
 from app.rules.graduation_rules import get_rules, get_overflow_target_key
 
 
@@ -18,44 +21,36 @@ class CurriculumService:
         admission_year: int
     ) -> List[Dict[str, Any]]:
         """졸업요건 전체 조회"""
-        try:
-            result = supabase.table('graduation_requirements')\
-                .select('*')\
-                .eq('admission_year', admission_year)\
-                .execute()
-            
-            if not result.data:
-                print(f"⚠️ {admission_year}학번 졸업요건을 찾을 수 없습니다.")
-                return []
-            
-            return result.data
-            
-        except Exception as e:
-            print(f"❌ 졸업요건 조회 실패: {e}")
+        snapshot = curriculum_cache.get_snapshot(admission_year)
+        
+        if not snapshot.requirements:
+            print(f"⚠️ {admission_year}학번 졸업요건을 찾을 수 없습니다.")
             return []
+        
+        return [dict(req) for req in snapshot.requirements]
     
     #2. 총 졸업 학점
     def get_total_graduation_credits(self, admission_year: int) -> int:
         """총 졸업 학점 조회"""
-        try:
-            result = supabase.table('graduation_requirements')\
-                .select('required_credits')\
-                .eq('admission_year', admission_year)\
-                .eq('course_area', '전체')\
-                .eq('requirement_type', '총졸업학점')\
-                .single()\
-                .execute()
-            
-            if result.data:
-                return result.data['required_credits']
-            
-            # DB에 없으면 기본값
-            print(f"⚠️ {admission_year}학번 총 졸업학점 정보 없음, 기본값 140 사용")
-            return 140
-            
-        except Exception as e:
-            print(f"❌ 총 졸업학점 조회 실패: {e}")
-            return 140
+        snapshot = curriculum_cache.get_snapshot(admission_year)
+        total_credits = snapshot.get_total_graduation_credits()
+        
+        if total_credits:
+            return total_credits
+        
+        # DB에 없으면 기본값
+        print(f"⚠️ {admission_year}학번 총 졸업학점 정보 없음, 기본값 140 사용")
+        return 140
+          
+    #3. 비동기 사전 로드
+    async def aprefetch(self, admission_year: int):
+        """
+        async 핸들러용: 학번 스냅샷과 동일대체 그래프를 이벤트 루프 밖에서 미리 로드
+        
+        이후 계산/조회는 메모리에서만 수행된다.
+        """
+        await curriculum_cache.aget_snapshot(admission_year)
+        await equivalent_course_service.aload()
           
     # ===== 핵심 계산 =====
     #1. 졸업사정 계산
@@ -69,56 +64,20 @@ class CurriculumService:
         admission_year = user_profile.admission_year
         courses_taken = user_profile.courses_taken
         
-        # ===== 1. 졸업요건 조회 =====
-        requirements = self.get_graduation_requirements(admission_year)
+        # ===== 1. 졸업요건 인덱스 조회 (학번별로 한 번만 컴파일) =====
+        index = self.get_requirement_index(admission_year)
         
-        if not requirements:
+        if not index:
             return {
                 "error": f"{admission_year}학번의 졸업요건을 찾을 수 없습니다.",
                 "message": "학번을 확인해주세요."
             }
         
         # 총 졸업 학점
-        total_graduation_credits = self.get_total_graduation_credits(admission_year)
+        total_graduation_credits = index.total_credits
         
-        # ===== 2. 요건 구조화 (전공/교양 분리) =====
-        major_requirements = {} #전공필수, 전공선택
-        liberal_arts_requirements = {} #교양(특랙별)
-        
-        for req in requirements:
-            course_area = req['course_area']
-            req_type = req['requirement_type']
-            track = req.get('track')
-            
-            # 요건 정보 구조화
-            requirement_info = {
-                'required': req['required_credits'],
-                'min_credits': req.get('min_credits', req['required_credits']),
-                'max_credits': req.get('max_credits', req['required_credits']),
-                'taken': 0,
-                'remaining': req['required_credits'],
-                'required_all': req.get('required_all', []),
-                'required_one_of': req.get('required_one_of', []),
-                'selectable_codes': req.get('selectable_course_codes', []),
-                'taken_courses': [],
-            }
-            
-            # 선택 가능 과목 동적 조회 (DB에 없으면)
-            if not requirement_info['selectable_codes'] and not requirement_info['required_all']:
-                if req_type in ['전공선택', '심화교양']:
-                    dynamic_codes = self.get_selectable_courses(
-                        admission_year, 
-                        course_area, 
-                        req_type
-                    )
-                    requirement_info['selectable_codes'] = dynamic_codes
-            
-            # 전공/교양 분류
-            if course_area == '전공':
-                major_requirements[req_type] = requirement_info
-            elif course_area == '교양':
-                key = track if track else req_type
-                liberal_arts_requirements[key] = requirement_info
+        # ===== 2. 요건 구조 복사 (전공/교양 분리) =====
+        major_requirements, liberal_arts_requirements = index.new_state()
         
         # ===== 3. 이수 학점 계산 =====
         total_taken = 0 #전체 이수 학점
@@ -146,56 +105,32 @@ class CurriculumService:
             if course_area == '전공':
                 major_taken += credit
                 
+                # 필수 → 선택 과목 순으로 매칭 (동일대체 포함)
+                match = None
                 if req_type and req_type in major_requirements:
-                    req_info = major_requirements[req_type]
-                    is_matched = False
-                    
-                    # 필수 과목 매칭
-                    for required_code in req_info['required_all']:
-                        if equivalent_course_service.is_equivalent(course_code, required_code):
-                            req_info['taken'] += credit
-                            req_info['taken_courses'].append(course_info)
-                            is_matched = True
-                            break
-                    
-                    # 선택 과목 매칭
-                    if not is_matched:
-                        for selectable_code in req_info['selectable_codes']:
-                            if equivalent_course_service.is_equivalent(course_code, selectable_code):
-                                req_info['taken'] += credit
-                                req_info['taken_courses'].append(course_info)
-                                is_matched = True
-                                break
-                    
-                    # 매칭 실패 → 일반선택
-                    if not is_matched:
-                        unmatched_courses.append(course_info)
+                    match = index.match_major(course_code, req_type)
+                
+                if match:
+                    req_info = major_requirements[match[1]]
+                    req_info['taken'] += credit
+                    req_info['taken_courses'].append(course_info)
                 else:
+                    # 매칭 실패 → 일반선택
                     unmatched_courses.append(course_info)
             
             # ===== 3-2. 교양 과목 처리 =====
             elif course_area == '교양':
                 liberal_arts_taken += credit
-                matched = False
                 
-                for track_name, track_info in liberal_arts_requirements.items():
-                    selectable = track_info['selectable_codes']
-                    required_all = track_info['required_all']
-                    required_one_of = track_info['required_one_of']
-                    
-                    all_codes = required_all + required_one_of + selectable
-                    for req_code in all_codes:
-                        if equivalent_course_service.is_equivalent(course_code, req_code):
-                            track_info['taken'] += credit
-                            track_info['taken_courses'].append(course_info)
-                            matched = True
-                            break
-                    
-                    if matched:
-                        break
-                    
-                # 매칭 실패 → 일반선택
-                if not matched:
+                # 트랙 순서상 첫 번째 매칭
+                match = index.match_liberal_arts(course_code)
+                
+                if match:
+                    track_info = liberal_arts_requirements[match[1]]
+                    track_info['taken'] += credit
+                    track_info['taken_courses'].append(course_info)
+                else:
+                    # 매칭 실패 → 일반선택
                     unmatched_courses.append(course_info)
             # ===== 3-3. 전공도 교양도 아닌 과목 → 일반선택 =====
             else:
@@ -270,7 +205,121 @@ class CurriculumService:
         
         return result
 
-    #2. 선택 가능 과목 동적 조회
+    #2. 졸업사정 일괄 계산
+    def iter_remaining_credits_batch(
+        self,
+        user_profiles: List[UserProfile],
+        max_workers: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        여러 학생의 졸업사정을 병렬 계산 (입력 순서대로 반환)
+        
+        학번별 스냅샷/인덱스는 시작 전에 한 번씩만 로드한다.
+        
+        Yields:
+            {"index": 0, "success": True, "data": {...}}
+        """
+        # 1. 학번별 데이터 미리 로드
+        for admission_year in sorted({p.admission_year for p in user_profiles}):
+            self.get_requirement_index(admission_year)
+        
+        # 2. 스레드 풀에서 계산
+        with ThreadPoolExecutor(max_workers=max_workers or settings.batch_audit_workers) as executor:
+            results = executor.map(self._calculate_safely, user_profiles)
+            
+            for i, result in enumerate(results):
+                yield {"index": i, **result}
+    
+    def calculate_remaining_credits_batch(
+        self,
+        user_profiles: List[UserProfile],
+        max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """여러 학생의 졸업사정 일괄 계산"""
+        return list(self.iter_remaining_credits_batch(user_profiles, max_workers))
+    
+    def _calculate_safely(self, user_profile: UserProfile) -> Dict[str, Any]:
+        """한 학생 계산 실패가 전체 배치를 멈추지 않도록 감싸기"""
+        try:
+            result = self.calculate_remaining_credits(user_profile)
+            return {"success": 'error' not in result, "data": result}
+        except Exception as e:
+            print(f"❌ 졸업사정 계산 실패 ({user_profile.admission_year}학번): {e}")
+            return {"success": False, "data": {"error": str(e)}}
+    
+    #3. 졸업요건 인덱스
+    def get_requirement_index(self, admission_year: int) -> Optional[RequirementIndex]:
+        """
+        학번별 졸업요건 매칭 인덱스 (스냅샷/동일대체 그래프가 바뀌면 다시 컴파일)
+        """
+        snapshot = curriculum_cache.get_snapshot(admission_year)
+        
+        if not snapshot.requirements:
+            print(f"⚠️ {admission_year}학번 졸업요건을 찾을 수 없습니다.")
+            return None
+        
+        graph = equivalent_course_service.graph
+        return snapshot.get_derived(
+            ('requirement_index', graph.version),
+            lambda: self._compile_requirements(admission_year, snapshot.requirements, graph.canonical_id)
+        )
+    
+    def _compile_requirements(
+        self,
+        admission_year: int,
+        requirements: List[Dict],
+        canonical_id
+    ) -> RequirementIndex:
+        """졸업요건 행 → 요건 구조 + 매칭 인덱스"""
+        major_requirements = {} #전공필수, 전공선택
+        liberal_arts_requirements = {} #교양(특랙별)
+        
+        for req in requirements:
+            course_area = req['course_area']
+            req_type = req['requirement_type']
+            track = req.get('track')
+            
+            # 요건 정보 구조화
+            requirement_info = {
+                'required': req['required_credits'],
+                'min_credits': req.get('min_credits', req['required_credits']),
+                'max_credits': req.get('max_credits', req['required_credits']),
+                'taken': 0,
+                'remaining': req['required_credits'],
+                'required_all': req.get('required_all', []),
+                'required_one_of': req.get('required_one_of', []),
+                'selectable_codes': req.get('selectable_course_codes', []),
+                'taken_courses': [],
+            }
+            
+            # 선택 가능 과목 동적 조회 (DB에 없으면)
+            if not requirement_info['selectable_codes'] and not requirement_info['required_all']:
+                if req_type in ['전공선택', '심화교양']:
+                    dynamic_codes = self.get_selectable_courses(
+                        admission_year, 
+                        course_area, 
+                        req_type
+                    )
+                    requirement_info['selectable_codes'] = dynamic_codes
+            
+            # 전공/교양 분류
+            if course_area == '전공':
+                major_requirements[req_type] = requirement_info
+            elif course_area == '교양':
+                key = track if track else req_type
+                liberal_arts_requirements[key] = requirement_info
+        
+        index = RequirementIndex(
+            admission_year,
+            self.get_total_graduation_credits(admission_year),
+            major_requirements,
+            liberal_arts_requirements,
+            canonical_id
+        )
+        print(f"✅ {admission_year}학번 졸업요건 인덱스 컴파일: {len(index.entries)}개 과목")
+        return index
+
+    #4. 선택 가능 과목 동적 조회
     def get_selectable_courses(
             self,
             admission_year: int,
@@ -278,58 +327,24 @@ class CurriculumService:
             requirement_type: str
         ) -> List[str]:
             """
-            선택 가능한 과목 코드 목록 (동적 조회)
+            선택 가능한 과목 코드 목록 (스냅샷에서 조회)
             """
-            try:
-                # ===== 특수 케이스: 추가선택 =====
-                if requirement_type == '추가선택':
-                    codes = []
-                    
-                    # 1. 브릿지 과목 (기초교양/브릿지)
-                    bridge_result = supabase.table('curriculums')\
-                        .select('course_code')\
-                        .eq('admission_year', admission_year)\
-                        .eq('course_area', '교양')\
-                        .eq('requirement_type', '기초교양')\
-                        .eq('track', '브릿지')\
-                        .execute()
-                    
-                    if bridge_result.data:
-                        codes.extend([row['course_code'] for row in bridge_result.data if row['course_code']])
-                    
-                    # 2. 자유선택 과목 (창의교양/자유선택*)
-                    free_result = supabase.table('curriculums')\
-                        .select('course_code')\
-                        .eq('admission_year', admission_year)\
-                        .eq('course_area', '교양')\
-                        .eq('requirement_type', '창의교양')\
-                        .like('track', '자유선택%')\
-                        .execute()
-                    
-                    if free_result.data:
-                        codes.extend([row['course_code'] for row in free_result.data if row['course_code']])
-                    
-                    # 중복 제거
-                    return list(set(codes))
-                
-                # ===== 일반 케이스: 전공선택, 심화교양 등 =====
-                result = supabase.table('curriculums')\
-                    .select('course_code')\
-                    .eq('admission_year', admission_year)\
-                    .eq('course_area', course_area)\
-                    .eq('requirement_type', requirement_type)\
-                    .execute()
+            snapshot = curriculum_cache.get_snapshot(admission_year)
+            
+            # ===== 특수 케이스: 추가선택 =====
+            if requirement_type == '추가선택':
+                # 1. 브릿지 과목 (기초교양/브릿지)
+                rows = snapshot.get_courses('교양', '기초교양', track='브릿지')
                 
-                if result.data:
-                    # 중복 제거
-                    codes = list(set([row['course_code'] for row in result.data if row['course_code']]))
-                    return codes
-                return []
-            except Exception as e:
-                print(f"❌ 선택 가능 과목 조회 실패 ({requirement_type}): {e}")
-                import traceback
-                traceback.print_exc()
-                return []
+                # 2. 자유선택 과목 (창의교양/자유선택*)
+                rows += snapshot.get_courses('교양', '창의교양', track_prefix='자유선택')
+            
+            # ===== 일반 케이스: 전공선택, 심화교양 등 =====
+            else:
+                rows = snapshot.get_courses(course_area, requirement_type)
+            
+            # 중복 제거
+            return list(set([row['course_code'] for row in rows if row['course_code']]))
             
     # ===== OverFlow처리 ===== 
     #1. 메인 로직
@@ -460,72 +475,74 @@ class CurriculumService:
         """
         특정 과목의 상세 정보 조회 (학점, 학년, 학기 등)
         """
-        try:
-            result = supabase.table('curriculums')\
-                .select('*')\
-                .eq('admission_year', admission_year)\
-                .eq('course_code', course_code)\
-                .limit(1)\
-                .execute()
-            
-            if result.data:
-                return result.data[0]
-            return None
-        except Exception as e:
-            print(f"❌ 과목 정보 조회 실패 ({course_code}): {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+        return curriculum_cache.get_snapshot(admission_year).get_course(course_code)
+
+    #2. 과목 상세 정보 일괄 조회
+    def get_courses_by_codes(
+        self,
+        admission_year: int,
+        course_codes: List[str]
+    ) -> Dict[str, List]:
+        """
+        여러 과목 코드의 상세 정보를 한 번에 조회 (학번 스냅샷 1회)
+        
+        Returns:
+            {
+                "courses": [...],           # 입력 순서 유지, 중복 제거
+                "unknown_codes": ["XX0000"] # 교육과정에 없는 코드
+            }
+        """
+        snapshot = curriculum_cache.get_snapshot(admission_year)
+        
+        courses = []
+        unknown_codes = []
+        
+        for code in dict.fromkeys(code.upper() for code in course_codes if code):
+            course_info = snapshot.get_course(code)
+            
+            if course_info:
+                courses.append(course_info)
+            else:
+                unknown_codes.append(code)
+        
+        return {
+            "courses": courses,
+            "unknown_codes": unknown_codes
+        }
 
-    #2. 동일대체 코드 조회
+    #3. 동일대체 코드 조회
     def _get_alternative_codes(
         self, 
         course_code: str,
         admission_year: int = None 
     ) -> List[Dict]:
         """
-        동일대체 교과목 목록 조회 (입학년도 이후만)
+        동일대체 교과목 목록 조회 (입학년도 이후만, 체인 전체)
         """
-        try:
-            # DB 조회
-            query = supabase.table('equivalent_courses')\
-                .select('new_course_code, new_course_name, mapping_type, effective_year')\
-                .eq('old_course_code', course_code)
+        # 중복 제거
+        seen = set()
+        alternatives = []
+        
+        for row in equivalent_course_service.get_successor_mappings(course_code):
+            new_code = row['new_course_code']
+            effective_year = row.get('effective_year')
             
             # 입학년도 이후만 필터링
-            if admission_year:
-                query = query.gt('effective_year', admission_year)
-            
-            result = query.execute()
-            
-            if not result.data:
-                return []
-            
-            # 중복 제거
-            seen = set()
-            alternatives = []
-                
-            for row in result.data:
-                new_code = row['new_course_code']
-                
-                if new_code not in seen:
-                    seen.add(new_code)
-                    alternatives.append({
-                        'code': new_code,
-                        'name': row['new_course_name'],
-                        'type': row['mapping_type'],
-                        'year': row.get('effective_year')
-                    })
-                
-                return alternatives
+            if admission_year and (effective_year is None or effective_year <= admission_year):
+                continue
             
-        except Exception as e:
-            print(f"❌ 동일대체 교과목 조회 실패 ({course_code}): {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+            if new_code not in seen:
+                seen.add(new_code)
+                alternatives.append({
+                    'code': new_code,
+                    'name': row['new_course_name'],
+                    'type': row['mapping_type'],
+                    'year': effective_year
+                })
+        
+        return alternatives
         
-    #3. 미이수 필수 과목    
+    #4. 미이수 필수 과목    
     def get_required_courses_not_taken(
         self, 
         user_profile: UserProfile,
@@ -538,18 +555,16 @@ class CurriculumService:
         admission_year = user_profile.admission_year
         courses_taken = user_profile.courses_taken
         
-        # ===== 1. 이수한 과목 코드 수집 (동일대체 포함) =====
-        taken_codes = set()
+        # ===== 1. 이수한 과목 동일 ID 수집 (동일대체 체인 전체 포함) =====
+        taken_ids = set()
         
         for course in courses_taken:
-            taken_codes.add(course.course_code)
+            canonical = equivalent_course_service.canonical_id(course.course_code)
+            taken_ids.add(canonical)
             
-            # 동일대체 교과목 확인 (구 코드 → 신 코드)
-            equiv = equivalent_course_service.get_equivalent_course(course.course_code)
-            if equiv:
-                # 구 과목 들었으면 신 과목도 이수로 간주
-                taken_codes.add(equiv['new_course_code'])
-                print(f"  🔄 동일대체: {course.course_code} → {equiv['new_course_code']}")
+            if canonical != course.course_code:
+                # 구 과목 들었으면 체인상의 신 과목도 이수로 간주
+                print(f"  🔄 동일대체: {course.course_code} → {canonical}")
         
         # ===== 2. 필수 과목 조회 =====
         requirements = self.get_graduation_requirements(admission_year)
@@ -568,10 +583,10 @@ class CurriculumService:
             # 필수 과목 순회
             for course_code in required_all:
                 # 이미 이수했으면 제외
-                if course_code in taken_codes:
+                if equivalent_course_service.canonical_id(course_code) in taken_ids:
                     continue
                 
-                # 과목 정보 조회
+                # 과목 정보 조회 (스냅샷)
                 course_info = self._get_course_info(admission_year, course_code)
                 
                 if course_info:
@@ -0,0 +1,103 @@
+"""
+쿼리 임베딩 마이크로 배처
+
+동시에 들어온 요청들이 각자 model.encode(query)를 부르는 대신
+몇 ms 안에 도착한 쿼리를 모아 encode([...]) 한 번으로 처리하고 결과를 나눠준다.
+(CPU에서도 배치 추론이 쿼리당 처리량이 높음)
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+
+class EmbeddingBatcher:
+    """쿼리 임베딩 요청 → 배치 encode"""
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5
+    ):
+        self.encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        # 지표
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch = 0
+        self.batch_size_counts: Dict[int, int] = {}
+        self.encode_ms_total = 0.0
+
+    def encode(self, text: str) -> List[float]:
+        """쿼리 하나 임베딩 (배치에 합류해서 결과를 기다림)"""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def stats(self) -> Dict:
+        """큐 깊이 + 배치 크기 지표"""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_observed_batch,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "avg_encode_ms": round(self.encode_ms_total / self.batches, 2) if self.batches else 0.0
+        }
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name="embedding-batcher",
+                    daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            # 첫 요청이 올 때까지 대기 → 그 뒤 max_wait 동안 더 모음
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+
+    def _process(self, batch: List[tuple]):
+        texts = [text for text, _ in batch]
+        started = time.perf_counter()
+        try:
+            embeddings = self.encode_batch(texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.encode_ms_total += (time.perf_counter() - started) * 1000
+        self.batches += 1
+        self.items += len(batch)
+        self.max_observed_batch = max(self.max_observed_batch, len(batch))
+        self.batch_size_counts[len(batch)] = self.batch_size_counts.get(len(batch), 0) + 1
+
+        for (_, future), embedding in zip(batch, embeddings):
+            future.set_result(embedding)
@@ -0,0 +1,109 @@
+"""
+쿼리 임베딩 LRU 캐시
+
+학생들이 자주 묻는 질문(개강일, 도서관 운영시간, 통학버스 등)은 반복되므로
+정규화한 쿼리 문자열로 임베딩을 캐시해서 SentenceTransformer 호출을 건너뛴다.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+from app.config import settings
+
+
+def normalize_query(query: str) -> str:
+    """
+    캐시 키용 정규화: 앞뒤 공백 제거 + 연속 공백 하나로
+
+    대소문자는 유지 (모델이 "HCI"와 "hci"를 다르게 임베딩하므로 같은 키로 묶지 않음)
+    """
+    return re.sub(r'\s+', ' ', query).strip()
+
+
+class QueryEmbeddingCache:
+    """크기/TTL 제한이 있는 쿼리 임베딩 LRU 캐시"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: int = 86400):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        # (모델명, 정규화된 쿼리) → (저장 시각, 원문 쿼리의 임베딩)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(
+        self,
+        query: str,
+        encoder: Callable[[str], object],
+        model_name: str = None
+    ) -> List[float]:
+        """
+        캐시된 임베딩 반환 (없으면 encoder로 계산 후 저장)
+
+        Args:
+            query: 검색 쿼리 (원문)
+            encoder: 쿼리 → 임베딩 (예: SentenceTransformer.encode)
+            model_name: 모델명 (기본: settings.embedding_model)
+        """
+        key = (model_name or settings.embedding_model, normalize_query(query))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and not self._is_expired(entry[0]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[1])
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+
+        # 모델 호출은 락 밖에서 (동시에 다른 쿼리 조회 가능)
+        # 정규화된 문자열은 키로만 쓰고, 임베딩은 원문으로 계산 (캐시 유무와 관계없이 같은 결과)
+        embedding = encoder(query)
+        if hasattr(embedding, 'tolist'):
+            embedding = embedding.tolist()
+
+        if self.max_size > 0:
+            with self._lock:
+                self._entries[key] = (time.time(), embedding)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+        return list(embedding)
+
+    def clear(self):
+        """캐시 비우기 (통계는 유지)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """캐시 크기 + 적중률"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    def _is_expired(self, stored_at: float) -> bool:
+        if self.ttl_seconds <= 0:
+            return False
+        return time.time() - stored_at > self.ttl_seconds
+
+
+# 전역 캐시 (VectorSearchService, create_embeddings 공용)
+query_embedding_cache = QueryEmbeddingCache(
+    max_size=settings.query_embedding_cache_size,
+    ttl_seconds=settings.query_embedding_cache_ttl
+)
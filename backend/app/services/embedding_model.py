@@ -0,0 +1,69 @@
+"""
+임베딩 모델 로더
+
+settings.embedding_backend 로 PyTorch / ONNX(int8 양자화) 실행 방식을 고른다.
+ONNX 모델은 data/export_onnx.py 로 미리 내보내 둔다.
+ONNX 실행에는 optimum[onnxruntime]이 필요하다 (pip install -r requirements-onnx.txt).
+"""
+from pathlib import Path
+from sentence_transformers import SentenceTransformer
+from app.config import resolve_path, settings
+
+
+def resolve_onnx_path() -> Path:
+    """ONNX 모델 디렉토리 (상대 경로는 backend/ 기준)"""
+    return resolve_path(settings.embedding_onnx_path)
+
+
+EMBEDDING_BACKENDS = ("torch", "onnx")
+
+
+def check_embedding_backend():
+    """
+    임베딩 실행 방식 설정/패키지 확인 (앱 시작 시 호출, 문제가 있으면 바로 실패)
+
+    Raises:
+        RuntimeError: 알 수 없는 backend 또는 onnx에 필요한 패키지 없음
+    """
+    backend = settings.embedding_backend
+    if backend not in EMBEDDING_BACKENDS:
+        raise RuntimeError(f"EMBEDDING_BACKEND={backend} 는 지원하지 않습니다 ({', '.join(EMBEDDING_BACKENDS)})")
+
+    if backend == "onnx":
+        try:
+            import onnxruntime  # noqa: F401
+            import optimum.onnxruntime  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError(
+                f"EMBEDDING_BACKEND=onnx 에는 optimum[onnxruntime] 패키지가 필요합니다 ({e.name} 없음). "
+                "pip install -r requirements-onnx.txt 로 설치하세요"
+            ) from e
+
+
+def load_embedding_model() -> SentenceTransformer:
+    """
+    설정에 맞는 SentenceTransformer 로드
+
+    - torch: settings.embedding_model 그대로
+    - onnx: settings.embedding_onnx_path(backend/ 기준) 의 내보낸 모델 + settings.embedding_onnx_file
+      (경로가 없으면 torch로 대체)
+    """
+    check_embedding_backend()
+    backend = settings.embedding_backend
+
+    if backend == "onnx":
+        model_path = resolve_onnx_path()
+        onnx_file = model_path / settings.embedding_onnx_file
+
+        if onnx_file.exists():
+            print(f"🔧 임베딩 모델 로딩 (ONNX): {onnx_file}")
+            return SentenceTransformer(
+                str(model_path),
+                backend="onnx",
+                model_kwargs={"file_name": settings.embedding_onnx_file}
+            )
+
+        print(f"⚠️ ONNX 모델 없음 ({onnx_file}), PyTorch 사용 - data/export_onnx.py 로 먼저 내보내세요")
+
+    print(f"🔧 임베딩 모델 로딩: {settings.embedding_model}")
+    return SentenceTransformer(settings.embedding_model)
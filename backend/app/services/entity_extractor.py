@@ -2,9 +2,11 @@
 사용자 메시지에서 정보 추출
 """
 import re
-from typing import List, Optional, Dict, Any
-from app.database.supabase_client import supabase
+from typing import List, Optional, Dict, Any, Tuple
 from app.models.schemas import CourseInput
+from app.services.curriculum_service import curriculum_service
+from app.services.curriculum_cache import curriculum_cache
+from app.services.course_name_index import CourseNameIndex
 
 
 class EntityExtractor:
@@ -38,10 +40,10 @@ class EntityExtractor:
         return None
     
     def extract_course_codes(self, message: str) -> List[str]:
-        """과목 코드 추출 (CS0614, XG0800 등)"""
+        """과목 코드 추출 (CS0614, XG0800 등) - 메시지 순서 유지"""
         pattern = r'\b[A-Za-z]{2}\d{4}\b'
         codes = re.findall(pattern, message, re.IGNORECASE)
-        return [code.upper() for code in set(codes)]
+        return list(dict.fromkeys(code.upper() for code in codes))
     
     def extract_course_names(self, message: str) -> List[str]:
         """
@@ -125,78 +127,83 @@ class EntityExtractor:
         admission_year: int
     ) -> Optional[Dict]:
         """
-        과목명으로 검색 (DB 띄어쓰기 이미 제거됨)
+        과목명으로 검색 (학번별 인메모리 과목명 인덱스)
         """
-        try:
-            # 정규화: 띄어쓰기 제거 + 소문자
-            def normalize(text: str) -> str:
-                return text.replace(' ', '').lower()
-            
-            course_name_normalized = normalize(course_name)
-            
-            if len(course_name_normalized) < 2:
-                return None
-            
-            # === 1단계: 정확한 이름 매칭 (DB도 띄어쓰기 없음) ===
-            result = supabase.table('curriculums')\
-                .select('*')\
-                .eq('admission_year', admission_year)\
-                .eq('course_name', course_name_normalized)\
-                .limit(1)\
-                .execute()
-            
-            if result.data:
-                return result.data[0]
-            
-            # === 2단계: LIKE 검색 (대소문자 무시) ===
-            result = supabase.table('curriculums')\
-                .select('*')\
-                .eq('admission_year', admission_year)\
-                .ilike('course_name', course_name_normalized)\
-                .limit(1)\
-                .execute()
-            
-            if result.data:
-                return result.data[0]
-            
-            # === 3단계: 부분 매칭 (유연하게) ===
-            result = supabase.table('curriculums')\
-                .select('*')\
-                .eq('admission_year', admission_year)\
-                .ilike('course_name', f'%{course_name_normalized}%')\
-                .limit(10)\
-                .execute()
-            
-            if not result.data:
-                return None
-            
-            # 가장 유사한 것 찾기
-            best_match = None
-            best_score = 0
-            
-            for row in result.data:
-                db_name_normalized = normalize(row['course_name'])
-                
-                # 완전 일치
-                if course_name_normalized == db_name_normalized:
-                    return row
-                
-                # 부분 일치
-                if course_name_normalized in db_name_normalized:
-                    score = len(course_name_normalized) / len(db_name_normalized)
-                    if score > best_score:
-                        best_score = score
-                        best_match = row
-            
-            # 유사도 60% 이상
-            if best_match and best_score >= 0.6:
-                return best_match
-            
-            return None
+        match = self.match_course_name(course_name, admission_year)
+        return match[0] if match else None
+    
+    def match_course_name(
+        self,
+        course_name: str,
+        admission_year: int
+    ) -> Optional[Tuple[Dict, float]]:
+        """
+        과목명 → (교육과정 행, 유사도 점수)
         
-        except Exception as e:
-            print(f"❌ 과목명 검색 실패 {course_name}: {e}")
+        정확 일치 → 부분 일치(60% 이상) → 오타 보정 순으로 찾는다.
+        """
+        match = self._get_name_index(admission_year).search(course_name)
+        
+        if not match:
             return None
+        
+        row, score = match
+        return dict(row), score
+    
+    def search_courses_by_names(
+        self,
+        course_names: List[str],
+        admission_year: int
+    ) -> List[Tuple[str, Optional[Dict], float]]:
+        """
+        과목명 여러 개를 한 번에 검색 (인덱스 1회 조회)
+        
+        Returns:
+            [(입력 과목명, 교육과정 행 or None, 점수), ...]
+        """
+        index = self._get_name_index(admission_year)
+        
+        results = []
+        for name in course_names:
+            match = index.search(name)
+            if match:
+                results.append((name, dict(match[0]), match[1]))
+            else:
+                results.append((name, None, 0.0))
+        
+        return results
+    
+    def _get_name_index(self, admission_year: int) -> CourseNameIndex:
+        """학번 스냅샷에서 과목명 인덱스 (스냅샷과 함께 무효화)"""
+        snapshot = curriculum_cache.get_snapshot(admission_year)
+        return snapshot.get_derived(
+            'course_name_index',
+            lambda: CourseNameIndex(snapshot.curriculums)
+        )
+    
+    def lookup_courses(
+        self,
+        course_codes: List[str],
+        admission_year: int
+    ) -> Dict[str, Any]:
+        """
+        과목 코드 여러 개 → 상세 정보 일괄 조회
+        
+        Returns:
+            {
+                "courses": [CourseInput, ...],  # 입력 순서 유지
+                "unknown_codes": ["XX0000"]     # 찾을 수 없는 코드
+            }
+        """
+        result = curriculum_service.get_courses_by_codes(admission_year, course_codes)
+        
+        for code in result['unknown_codes']:
+            print(f"⚠️ 과목을 찾을 수 없음: {code}")
+        
+        return {
+            "courses": [self._to_course_input(row) for row in result['courses']],
+            "unknown_codes": result['unknown_codes']
+        }
     
     def get_course_details(
         self, 
@@ -204,33 +211,17 @@ class EntityExtractor:
         admission_year: int
     ) -> List[CourseInput]:
         """과목 코드 → 상세 정보 조회"""
-        courses = []
-        
-        for code in course_codes:
-            try:
-                result = supabase.table('curriculums')\
-                    .select('*')\
-                    .eq('admission_year', admission_year)\
-                    .eq('course_code', code)\
-                    .limit(1)\
-                    .execute()
-                
-                if result.data:
-                    data = result.data[0]
-                    courses.append(CourseInput(
-                        course_code=data['course_code'],
-                        course_name=data['course_name'],
-                        credit=data['credit'],
-                        course_area=data['course_area'],
-                        requirement_type=data.get('requirement_type')
-                    ))
-                else:
-                    print(f"⚠️ 과목을 찾을 수 없음: {code}")
-            
-            except Exception as e:
-                print(f"❌ 과목 조회 실패 {code}: {e}")
-        
-        return courses
+        return self.lookup_courses(course_codes, admission_year)['courses']
+    
+    def _to_course_input(self, row: Dict) -> CourseInput:
+        """curriculums 행 → CourseInput"""
+        return CourseInput(
+            course_code=row['course_code'],
+            course_name=row['course_name'],
+            credit=row['credit'],
+            course_area=row['course_area'],
+            requirement_type=row.get('requirement_type')
+        )
     
     def extract_course_info(
         self, 
@@ -245,6 +236,7 @@ class EntityExtractor:
                 "admission_year": None,
                 "course_codes": [],
                 "courses": [],
+                "unknown_codes": [],
                 "has_enough_info": False
             }
             
@@ -253,28 +245,23 @@ class EntityExtractor:
         
         courses = []
         found_codes = set()
+        unknown_codes = []
         
-        # 1. 과목 코드로 조회
+        # 1. 과목 코드로 일괄 조회
         if course_codes:
-            courses.extend(self.get_course_details(course_codes, admission_year))
+            lookup = self.lookup_courses(course_codes, admission_year)
+            courses.extend(lookup['courses'])
+            unknown_codes = lookup['unknown_codes']
             found_codes.update(course_codes)
         
-        # 2. 과목명으로 검색
+        # 2. 과목명으로 검색 (한 번에)
         if course_names:
-            for name in course_names:
+            for name, match, score in self.search_courses_by_names(course_names, admission_year):
                 # 이미 찾은 과목은 스킵
-                match = self.search_course_by_name(name, admission_year)
-                
                 if match and match['course_code'] not in found_codes:
-                    courses.append(CourseInput(
-                        course_code=match['course_code'],
-                        course_name=match['course_name'],
-                        credit=match['credit'],
-                        course_area=match['course_area'],
-                        requirement_type=match.get('requirement_type')
-                    ))
+                    courses.append(self._to_course_input(match))
                     found_codes.add(match['course_code'])
-                    print(f"  ✅ '{name}' → {match['course_code']} {match['course_name']}")
+                    print(f"  ✅ '{name}' → {match['course_code']} {match['course_name']} ({score:.2f})")
                 else:
                     print(f"  ⚠️ '{name}' 매칭 실패")
         
@@ -282,6 +269,7 @@ class EntityExtractor:
             "admission_year": admission_year,
             "course_codes": list(found_codes),
             "courses": courses,
+            "unknown_codes": unknown_codes,
             "has_enough_info": admission_year is not None and len(courses) > 0
         }
         
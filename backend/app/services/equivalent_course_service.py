@@ -1,13 +1,172 @@
 """
 동일대체교과목 서비스
 """
+import threading
+import time
 from typing import Dict, List, Optional
-from app.database.supabase_client import supabase
+from app.database.repository import repository
+
+# 로딩 실패 후 다시 시도하기까지 대기 시간(초) - 그동안은 빈 그래프로 응답 (장애 시 요청마다 DB 호출 방지)
+LOAD_RETRY_SECONDS = 30
+
+
+class EquivalenceGraph:
+    """
+    equivalent_courses 테이블 전체를 메모리에 올린 그래프
+    
+    - forward: 구 코드 → 매핑 행 목록 (구→신)
+    - backward: 신 코드 → 매핑 행 목록 (신→구)
+    - canonical: 코드 → 체인의 최종 코드 (동일 과목 판별용 ID)
+    """
+    
+    def __init__(self, rows: List[Dict], version: int = 0, max_depth: int = 10):
+        self.rows = rows
+        self.version = version
+        self.max_depth = max_depth
+        self.forward: Dict[str, List[Dict]] = {}
+        self.backward: Dict[str, List[Dict]] = {}
+        self.names: Dict[str, str] = {}
+        self.canonical: Dict[str, str] = {}
+        
+        for row in rows:
+            old_code = row['old_course_code']
+            new_code = row['new_course_code']
+            self.forward.setdefault(old_code, []).append(row)
+            self.backward.setdefault(new_code, []).append(row)
+            self.names.setdefault(old_code, row.get('old_course_name'))
+            self.names.setdefault(new_code, row.get('new_course_name'))
+        
+        # 모든 코드의 동일 과목 ID 미리 계산
+        for code in self.names:
+            self.canonical[code] = self._resolve_canonical(code)
+    
+    def _resolve_canonical(self, course_code: str) -> str:
+        """체인의 최종 코드 (순환 체인이면 순환 구간의 가장 작은 코드)"""
+        codes = [item['code'] for item in self.walk(course_code)]
+        last_code = codes[-1]
+        
+        if last_code in codes[:-1]:
+            return min(codes[codes.index(last_code):])
+        return last_code
+    
+    def walk(self, course_code: str, max_depth: Optional[int] = None) -> List[Dict]:
+        """
+        구→신 체인 추적 (첫 번째 매핑 행 기준, 순환 참조 방지)
+        
+        Returns:
+            [{"code", "name", "mapping_type"}, ...] (시작 과목 포함)
+        """
+        if max_depth is None:
+            max_depth = self.max_depth
+        
+        chain = [{
+            "code": course_code,
+            "name": self.names.get(course_code),
+            "mapping_type": None
+        }]
+        current_code = course_code
+        visited = set()
+        
+        while len(chain) - 1 < max_depth:
+            if current_code in visited:
+                print(f"⚠️ 순환 참조 감지: {current_code}")
+                break
+            
+            visited.add(current_code)
+            
+            edges = self.forward.get(current_code)
+            if not edges:
+                break
+            
+            equiv = edges[0]
+            current_code = equiv['new_course_code']
+            chain.append({
+                "code": current_code,
+                "name": equiv['new_course_name'],
+                "mapping_type": equiv['mapping_type']
+            })
+        
+        return chain
+    
+    def canonical_id(self, course_code: str) -> str:
+        """동일 과목 판별용 ID (체인의 최종 코드)"""
+        return self.canonical.get(course_code, course_code)
 
 
 class EquivalentCourseService:
     """동일대체교과목 관리"""
     
+    def __init__(self):
+        self._graph: Optional[EquivalenceGraph] = None
+        self._empty_graph = EquivalenceGraph([])
+        self._failed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._version = 0
+    
+    # ===== 그래프 로딩 =====
+    @property
+    def is_loaded(self) -> bool:
+        """그래프 로딩 성공 여부"""
+        return self._graph is not None
+    
+    @property
+    def graph(self) -> EquivalenceGraph:
+        """
+        메모리 그래프 반환 (최초 접근 시 한 번만 로드)
+        
+        로딩에 실패하면 LOAD_RETRY_SECONDS 동안은 재시도하지 않고 빈 그래프를 반환한다.
+        """
+        if self._graph is None and not self._in_backoff():
+            with self._lock:
+                if self._graph is None and not self._in_backoff():
+                    self._load_graph()
+        return self._graph or self._empty_graph
+    
+    def _in_backoff(self) -> bool:
+        return self._failed_at is not None and time.monotonic() - self._failed_at < LOAD_RETRY_SECONDS
+    
+    def _load_graph(self):
+        """equivalent_courses 전체를 한 번에 조회해서 그래프 생성"""
+        try:
+            rows = repository.fetch_equivalent_courses()
+        except Exception as e:
+            # 실패 시각 기록 → LOAD_RETRY_SECONDS 뒤에 재시도
+            self._failed_at = time.monotonic()
+            print(f"❌ 동일대체 그래프 로딩 실패 ({LOAD_RETRY_SECONDS}초 뒤 재시도): {e}")
+            return
+        
+        self._failed_at = None
+        self._version += 1
+        self._graph = EquivalenceGraph(rows, version=self._version)
+        print(f"✅ 동일대체 그래프 로딩 완료: {len(self._graph.rows)}개 매핑, {len(self._graph.names)}개 과목 (v{self._version})")
+    
+    async def aload(self) -> EquivalenceGraph:
+        """graph의 async 버전 (로드가 필요할 때만 DB 스레드 풀에서 실행)"""
+        if self._graph is not None:
+            return self._graph
+        if self._in_backoff():
+            return self._empty_graph
+        
+        return await repository.run(lambda: self.graph)
+    
+    def reload(self) -> Dict[str, int]:
+        """
+        equivalent_courses 테이블 변경 시 그래프 재로딩
+        
+        Returns:
+            {"version": 2, "mappings": 120, "courses": 210}
+        """
+        with self._lock:
+            self._load_graph()
+        
+        graph = self.graph
+        return {
+            "version": graph.version,
+            "mappings": len(graph.rows),
+            "courses": len(graph.names)
+        }
+    
+    # ===== 조회 =====
     def get_equivalent_course(
         self, 
         course_code: str,
@@ -31,24 +190,51 @@ class EquivalentCourseService:
                 "allow_retake": True
             }
         """
-        try:
-            if direction == "old_to_new":
-                result = supabase.table('equivalent_courses')\
-                    .select('*')\
-                    .eq('old_course_code', course_code)\
-                    .execute()
-            else:  # new_to_old
-                result = supabase.table('equivalent_courses')\
-                    .select('*')\
-                    .eq('new_course_code', course_code)\
-                    .execute()
+        mappings = self.get_mappings(course_code, direction)
+        return mappings[0] if mappings else None
+    
+    def get_mappings(
+        self,
+        course_code: str,
+        direction: str = "old_to_new"
+    ) -> List[Dict]:
+        """
+        과목 코드의 매핑 행 전체 조회
+        
+        Args:
+            course_code: 과목 코드
+            direction: "old_to_new" (이 과목이 구 과목인 행)
+                       or "new_to_old" (이 과목이 신 과목인 행)
+        """
+        if direction == "old_to_new":
+            return list(self.graph.forward.get(course_code, []))
+        return list(self.graph.backward.get(course_code, []))
+        
+    def get_successor_mappings(self, course_code: str) -> List[Dict]:
+        """
+        이 과목 이후의 모든 매핑 행 (구→신 방향 체인 전체, 분기 포함)
+        
+        Example:
+            get_successor_mappings("CS0116")
+            → [CS0116→CS0612 행, CS0612→CS0863 행]
+        """
+        graph = self.graph
+        mappings = []
+        visited = {course_code}
+        queue = [course_code]
+        
+        while queue:
+            current_code = queue.pop(0)
             
-            if result.data and len(result.data) > 0:
-                return result.data[0]
-            return None
-        except Exception as e:
-            print(f"❌ 대체 과목 조회 실패: {e}")
-            return None
+            for row in graph.forward.get(current_code, []):
+                mappings.append(row)
+                new_code = row['new_course_code']
+                
+                if new_code not in visited:
+                    visited.add(new_code)
+                    queue.append(new_code)
+        
+        return mappings
         
     def get_latest_course_code(
         self, 
@@ -56,7 +242,7 @@ class EquivalentCourseService:
         max_depth: int = 10
     ) -> str:
         """
-        재귀적으로 최신 과목 코드 찾기
+        최신 과목 코드 찾기 (메모리 그래프 체인 추적)
         
         Args:
             course_code: 시작 과목 코드
@@ -70,30 +256,7 @@ class EquivalentCourseService:
             → CS0116 → CS0612 → CS0863
             → 반환: "CS0863"
         """
-        current_code = course_code
-        visited = set()  # 무한루프 방지
-        depth = 0
-        
-        while depth < max_depth:
-            if current_code in visited:
-                # 순환 참조 감지
-                print(f"⚠️ 순환 참조 감지: {current_code}")
-                break
-            
-            visited.add(current_code)
-            
-            # 다음 단계 조회
-            equiv = self.get_equivalent_course(current_code, "old_to_new")
-            
-            if equiv:
-                # 다음 코드로 이동
-                current_code = equiv['new_course_code']
-                depth += 1
-            else:
-                # 더 이상 변경 없음
-                break
-        
-        return current_code
+        return self.graph.walk(course_code, max_depth)[-1]['code']
     
     def get_course_history(
         self, 
@@ -122,38 +285,12 @@ class EquivalentCourseService:
                 }
             ]
         """
-        history = []
-        current_code = course_code
-        visited = set()
-        depth = 0
+        history = self.graph.walk(course_code, max_depth)
         
-        # 시작 과목 정보 조회 (curriculums 테이블에서)
-        start_course = self._get_course_info(current_code)
-        history.append({
-            "code": current_code,
-            "name": start_course['name'] if start_course else "알 수 없음",
-            "mapping_type": None
-        })
-        
-        while depth < max_depth:
-            if current_code in visited:
-                break
-            
-            visited.add(current_code)
-            
-            # 다음 단계 조회
-            equiv = self.get_equivalent_course(current_code, "old_to_new")
-            
-            if equiv:
-                history.append({
-                    "code": equiv['new_course_code'],
-                    "name": equiv['new_course_name'],
-                    "mapping_type": equiv['mapping_type']
-                })
-                current_code = equiv['new_course_code']
-                depth += 1
-            else:
-                break
+        # 그래프에 없는 과목만 curriculums 테이블에서 이름 조회
+        if not history[0]['name']:
+            start_course = self._get_course_info(course_code)
+            history[0]['name'] = start_course['name'] if start_course else "알 수 없음"
         
         return history
     
@@ -186,15 +323,8 @@ class EquivalentCourseService:
         curriculums 테이블에서 과목 정보 조회
         """
         try:
-            result = supabase.table('curriculums')\
-                .select('course_name')\
-                .eq('course_code', course_code)\
-                .limit(1)\
-                .execute()
-            
-            if result.data and len(result.data) > 0:
-                return {"name": result.data[0]['course_name']}
-            return None
+            course_name = repository.fetch_course_name(course_code)
+            return {"name": course_name} if course_name else None
         except:
             return None
     
@@ -213,31 +343,18 @@ class EquivalentCourseService:
         if code1 == code2:
             return True
         
-        # code1의 최종 코드
-        latest1 = self.get_latest_course_code(code1)
-        
-        # code2의 최종 코드
-        latest2 = self.get_latest_course_code(code2)
-        
-        # 최종 코드가 같으면 동일
-        if latest1 == latest2:
-            return True
-        
-        # code1의 전체 히스토리
-        history1 = [h['code'] for h in self.get_course_history(code1)]
-        
-        # code2가 code1 히스토리에 있으면 True
-        if code2 in history1:
-            return True
-        
-        # code2의 전체 히스토리
-        history2 = [h['code'] for h in self.get_course_history(code2)]
-        
-        # code1이 code2 히스토리에 있으면 True
-        if code1 in history2:
-            return True
+        # 최종 코드가 같으면 동일 (체인 중간 코드 포함)
+        graph = self.graph
+        return graph.canonical_id(code1) == graph.canonical_id(code2)
+    
+    def canonical_id(self, course_code: str) -> str:
+        """
+        동일/대체 과목끼리 같은 값을 갖는 ID (체인의 최종 코드)
         
-        return False
+        Example:
+            canonical_id("CS0116") == canonical_id("CS0612") == "CS0863"
+        """
+        return self.graph.canonical_id(course_code)
     
     def resolve_course_code(self, course_code: str) -> str:
         """
@@ -255,8 +372,7 @@ class EquivalentCourseService:
         Returns:
             ["CS0116", "CS0612", "CS0863"]
         """
-        history = self.get_course_history(course_code)
-        return [item['code'] for item in history]
+        return [item['code'] for item in self.graph.walk(course_code)]
     
     
     def get_mapping_info(self, course_code: str) -> Optional[str]:
@@ -266,23 +382,14 @@ class EquivalentCourseService:
         Returns:
             "CS0116 컴퓨터그래픽스 → CS0612 컴퓨터그래픽스 (동일) → CS0863 HCI(AR/VR/XR) (대체)"
         """
-        history = self.get_course_history(course_code)
-        
-        if len(history) <= 1:
+        if len(self.graph.walk(course_code)) <= 1:
             return None
         
         return self.format_course_history(course_code)
     
     def get_all_equivalents(self) -> List[Dict]:
         """모든 대체 과목 조회"""
-        try:
-            result = supabase.table('equivalent_courses')\
-                .select('*')\
-                .execute()
-            return result.data if result.data else []
-        except Exception as e:
-            print(f"❌ 전체 대체 과목 조회 실패: {e}")
-            return []
+        return list(self.graph.rows)
 
 
 # 전역 서비스
@@ -0,0 +1,143 @@
+"""
+LLM 호출 동시성 제한
+
+OpenAI 호출을 전역 세마포어 뒤에서 실행한다.
+- 동시에 실행되는 호출 수: llm_max_concurrency
+- 빈 자리를 기다리는 요청 수: llm_max_queue (넘치면 즉시 거절)
+- 대기 시간: llm_queue_timeout (넘으면 거절)
+- 호출 시간: llm_timeout (넘으면 LLMTimeoutError)
+거절은 LLMOverloadedError → API에서 503 + Retry-After 로 응답한다.
+"""
+import asyncio
+import time
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+from app.config import settings
+
+
+class LLMOverloadedError(Exception):
+    """LLM 대기열이 가득 찼거나 대기 시간 초과 (잠시 후 재시도)"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(Exception):
+    """LLM 호출 시간 초과"""
+
+
+class LLMLimiter:
+    """LLM 호출 세마포어 + 제한된 대기열 + 호출 타임아웃"""
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        queue_timeout: float = 10,
+        call_timeout: float = 30,
+        retry_after: int = 5
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.call_timeout = call_timeout
+        self.retry_after = retry_after
+
+        # 이벤트 루프별 세마포어 (서버 루프, 동기 래퍼 전용 루프가 따로 씀)
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.completed = 0
+
+    def is_saturated(self) -> bool:
+        """빈 자리도 대기열 자리도 없음 (새 요청은 거절될 상태)"""
+        return self.active + self.waiting >= self.max_concurrency + self.max_queue
+
+    async def run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """자리를 얻어 LLM 호출 실행 (타임아웃 적용)"""
+        await self._acquire()
+        try:
+            return await asyncio.wait_for(call(), timeout=self.call_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise LLMTimeoutError(f"LLM 응답 시간 초과 ({self.call_timeout}s)")
+        finally:
+            self._release()
+
+    async def stream(self, call: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """자리를 얻어 LLM 스트리밍 (전체 스트림에 타임아웃 적용, 끝날 때까지 자리 유지)"""
+        await self._acquire()
+        try:
+            deadline = time.monotonic() + self.call_timeout
+            iterator = call().__aiter__()
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    break
+                yield chunk
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise LLMTimeoutError(f"LLM 응답 시간 초과 ({self.call_timeout}s)")
+        finally:
+            self._release()
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts
+        }
+
+    async def _acquire(self):
+        semaphore = self._semaphore()
+
+        # 실행 중 + 대기 중 요청 수로 판단 (세마포어 획득 전인 요청도 자리를 차지한 것으로 봄)
+        if self.active + self.waiting >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            raise LLMOverloadedError("LLM 대기열이 가득 찼습니다", self.retry_after)
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise LLMOverloadedError(f"LLM 대기 시간 초과 ({self.queue_timeout}s)", self.retry_after)
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+
+    def _release(self):
+        self.active -= 1
+        self.completed += 1
+        self._semaphore().release()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+
+# 전역 리미터
+llm_limiter = LLMLimiter(
+    max_concurrency=settings.llm_max_concurrency,
+    max_queue=settings.llm_max_queue,
+    queue_timeout=settings.llm_queue_timeout,
+    call_timeout=settings.llm_timeout,
+    retry_after=settings.llm_retry_after
+)
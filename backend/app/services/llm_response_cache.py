@@ -0,0 +1,183 @@
+"""
+LLM 응답 영구 캐시 (SQLite)
+
+모델 설정 + 완성된 프롬프트 메시지(검색 결과, 잘라낸 대화 이력, 질문 포함)의 해시를 키로
+응답을 저장한다. 프롬프트가 글자 하나까지 같을 때만 적중하고, 재시작 후에도 유지된다.
+- TTL(llm_response_cache_ttl)이 지난 항목은 조회하지 않고 정리
+- 항목 수가 llm_response_cache_max_entries를 넘으면 오래 안 쓴 것부터 삭제
+- bypass(llm_response_cache_bypass): 평가 실행용, 조회/저장 모두 건너뜀
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import resolve_path, settings
+
+# 이 횟수만큼 저장할 때마다 만료/초과 항목 정리
+PRUNE_EVERY = 50
+
+
+def make_key(kind: str, params: Dict[str, Any], messages: List[Tuple[str, str]]) -> str:
+    """호출 종류 + 모델 설정 + 프롬프트 메시지 → 캐시 키"""
+    payload = json.dumps(
+        {"kind": kind, "params": params, "messages": messages},
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """프롬프트 해시 → LLM 응답 (SQLite, TTL + 최대 항목 수)"""
+
+    def __init__(
+        self,
+        path: Optional[Path],
+        ttl_seconds: int = 604800,
+        max_entries: int = 10000,
+        bypass: bool = False
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.bypass = bypass
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_failed = False
+        self._lock = threading.Lock()
+        self._puts = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None and not self.bypass and not self._conn_failed
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """저장된 응답 (없거나 만료됐으면 None)"""
+        if not self.enabled:
+            return None
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is None or self._is_expired(row[1]):
+                    self.misses += 1
+                    return None
+
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+                self.hits += 1
+                return json.loads(row[0])
+        except Exception as e:
+            print(f"⚠️ LLM 응답 캐시 조회 실패 (무시): {e}")
+            return None
+
+    def put(self, key: str, kind: str, value: Dict[str, Any]):
+        """응답 저장"""
+        if not self.enabled or self.max_entries <= 0:
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, kind, value, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, kind, json.dumps(value, ensure_ascii=False), now, now)
+                )
+                conn.commit()
+
+                self._puts += 1
+                if self._puts % PRUNE_EVERY == 0:
+                    self._prune(conn)
+        except Exception as e:
+            print(f"⚠️ LLM 응답 캐시 저장 실패 (무시): {e}")
+
+    def clear(self) -> int:
+        """전체 삭제 (삭제된 항목 수)"""
+        if self.path is None or self._conn_failed:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            deleted = conn.execute("DELETE FROM responses").rowcount
+            conn.commit()
+        print(f"🗑️ LLM 응답 캐시 삭제: {deleted}개")
+        return deleted
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        result = {
+            "enabled": self.enabled,
+            "bypass": self.bypass,
+            "path": str(self.path) if self.path else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+        if self.path is not None and not self._conn_failed:
+            try:
+                with self._lock:
+                    rows = self._connect().execute(
+                        "SELECT kind, COUNT(*) FROM responses GROUP BY kind"
+                    ).fetchall()
+                result["entries"] = dict(rows)
+            except Exception as e:
+                result["error"] = str(e)
+        return result
+
+    def _connect(self) -> sqlite3.Connection:
+        """연결 (처음 한 번 파일/테이블 생성, 실패하면 캐시 비활성화)"""
+        if self._conn is not None:
+            return self._conn
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, kind TEXT, value TEXT, created_at REAL, last_used REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+            conn.commit()
+        except Exception:
+            self._conn_failed = True
+            raise
+
+        print(f"✅ LLM 응답 캐시 열기: {self.path}")
+        self._conn = conn
+        return conn
+
+    def _prune(self, conn: sqlite3.Connection):
+        """만료 항목 + 최대 항목 수 초과분(오래 안 쓴 순) 삭제"""
+        if self.ttl_seconds > 0:
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+
+        conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        conn.commit()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+
+# 전역 캐시 (경로가 비어 있으면 사용 안 함)
+llm_response_cache = LLMResponseCache(
+    path=resolve_path(settings.llm_response_cache_path) if settings.llm_response_cache_path else None,
+    ttl_seconds=settings.llm_response_cache_ttl,
+    max_entries=settings.llm_response_cache_max_entries,
+    bypass=settings.llm_response_cache_bypass
+)
@@ -0,0 +1,93 @@
+"""
+LLM 토큰 사용량 + 프롬프트 캐시 적중 기록
+
+OpenAI는 앞부분(1024토큰 이상)이 같은 프롬프트를 자동으로 캐시하고
+usage.prompt_tokens_details.cached_tokens 로 알려준다. (캐시된 입력 토큰은 절반 가격)
+호출 종류(answer, rewrite)별로 입력/캐시/출력 토큰을 모아 /metrics 로 보여준다.
+"""
+import threading
+from typing import Any, Dict
+from app.config import settings
+
+# 100만 토큰당 가격 (USD): (입력, 캐시된 입력, 출력)
+MODEL_PRICING = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+
+def extract_usage(message: Any) -> Dict[str, int]:
+    """AIMessage(또는 마지막 스트리밍 청크)에서 토큰 사용량 추출 (없으면 {})"""
+    usage = getattr(message, 'usage_metadata', None) or {}
+    if usage:
+        details = usage.get('input_token_details') or {}
+        return {
+            "api_prompt_tokens": usage.get('input_tokens', 0),
+            "cached_tokens": details.get('cache_read', 0) or 0,
+            "completion_tokens": usage.get('output_tokens', 0)
+        }
+
+    # usage_metadata가 없는 버전: OpenAI 원본 응답 필드
+    token_usage = (getattr(message, 'response_metadata', None) or {}).get('token_usage') or {}
+    if not token_usage:
+        return {}
+    details = token_usage.get('prompt_tokens_details') or {}
+    return {
+        "api_prompt_tokens": token_usage.get('prompt_tokens', 0),
+        "cached_tokens": details.get('cached_tokens', 0) or 0,
+        "completion_tokens": token_usage.get('completion_tokens', 0)
+    }
+
+
+def estimate_cost(model_name: str, usage: Dict[str, int]) -> float:
+    """사용량 → 예상 비용 (USD, 가격표에 없는 모델은 0)"""
+    pricing = MODEL_PRICING.get(model_name)
+    if not pricing or not usage:
+        return 0.0
+    input_price, cached_price, output_price = pricing
+    cached = usage.get('cached_tokens', 0)
+    uncached = usage.get('api_prompt_tokens', 0) - cached
+    return (
+        uncached * input_price
+        + cached * cached_price
+        + usage.get('completion_tokens', 0) * output_price
+    ) / 1_000_000
+
+
+class LLMUsageStats:
+    """호출 종류별 토큰 사용량 누적"""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, usage: Dict[str, int]):
+        if not usage:
+            return
+        with self._lock:
+            totals = self._totals.setdefault(kind, {
+                "calls": 0,
+                "api_prompt_tokens": 0,
+                "cached_tokens": 0,
+                "completion_tokens": 0
+            })
+            totals["calls"] += 1
+            for key in ("api_prompt_tokens", "cached_tokens", "completion_tokens"):
+                totals[key] += usage.get(key, 0)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            result = {}
+            for kind, totals in self._totals.items():
+                prompt = totals["api_prompt_tokens"]
+                result[kind] = {
+                    **totals,
+                    "cached_ratio": round(totals["cached_tokens"] / prompt, 4) if prompt else 0.0,
+                    "estimated_cost_usd": round(estimate_cost(self.model_name, totals), 6)
+                }
+            return result
+
+
+# 전역 통계
+llm_usage = LLMUsageStats(settings.model_name)
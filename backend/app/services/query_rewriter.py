@@ -0,0 +1,105 @@
+"""
+멀티턴 쿼리 재구성 판단 + 캐시
+
+대화 이력이 있어도 "그거", "거기" 같은 지시어나 생략이 없는 질문은 그대로 검색하면 되므로
+LLM 재구성 호출을 건너뛴다. 재구성 결과는 (최근 대화 4개 해시, 메시지)로 캐시한다.
+"""
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from app.config import settings
+from app.services.query_router import query_router
+
+# 이전 대화를 가리키는 지시어 (부분 문자열로 검사)
+ANAPHORA_KEYWORDS = [
+    '그거', '그것', '그건', '그게', '그걸',
+    '이거', '이것', '이건', '저거', '저것',
+    '거기', '그곳', '저기',
+    '그 과목', '그과목', '그 수업', '그 교수', '그분', '걔',
+    '아까', '방금'
+]
+
+# 다른 낱말 안에도 흔히 들어가는 지시어 → 조사만 붙은 독립 단어일 때만 ("여기서", "나머지는")
+_ANAPHORA_WORD_PATTERN = re.compile(r'^(?:여기|나머지)(?:에서|서|는|도|에|의|만|랑|가|이|를|은|요)?$')
+
+# 이어서 묻는 접속어 → 문장 첫 단어일 때만 ("그럼 2학기는?", "또 뭐 있어?")
+CONTINUATION_WORDS = {'그럼', '그러면', '그리고', '그래서', '또'}
+
+# 이 길이(공백 제외) 이하이고 주제 키워드가 없으면 생략된 질문으로 봄 ("과목코드 어떻게 돼?")
+SHORT_QUERY_LENGTH = 12
+
+_COURSE_CODE_PATTERN = re.compile(r'[A-Z]{2}\d{4}')
+
+
+def needs_rewrite(message: str) -> bool:
+    """이전 대화 없이는 검색할 수 없는 질문인지 (지시어/생략)"""
+    if any(kw in message for kw in ANAPHORA_KEYWORDS):
+        return True
+
+    words = re.findall(r'[가-힣A-Za-z0-9]+', message)
+    if words and words[0] in CONTINUATION_WORDS:
+        return True
+    if any(_ANAPHORA_WORD_PATTERN.match(word) for word in words):
+        return True
+
+    compact = message.replace(' ', '')
+    if len(compact) > SHORT_QUERY_LENGTH:
+        return False
+
+    # 짧아도 주제(카테고리 키워드, 과목 코드)가 있으면 그대로 검색
+    if query_router.detect_categories(message) or _COURSE_CODE_PATTERN.search(message.upper()):
+        return False
+    return True
+
+
+def history_key(history: List[Dict]) -> str:
+    """최근 대화 4개 해시"""
+    turns = [(msg.get('role'), msg.get('content')) for msg in history[-4:]]
+    return hashlib.sha1(json.dumps(turns, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class RewriteCache:
+    """(대화 해시, 메시지) → 재구성된 쿼리 LRU"""
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, history: List[Dict], message: str) -> Optional[str]:
+        key = (history_key(history), message.strip())
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, history: List[Dict], message: str, rewritten: str):
+        if self.max_size <= 0:
+            return
+        key = (history_key(history), message.strip())
+        with self._lock:
+            self._entries[key] = rewritten
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+# 전역 캐시
+rewrite_cache = RewriteCache(max_size=settings.rewrite_cache_size)
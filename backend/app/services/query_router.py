@@ -2,7 +2,7 @@
 사용자 질문을 분류하는 라우터
 """
 import re
-from typing import Literal
+from typing import List, Literal
 
 
 class QueryRouter:
@@ -45,6 +45,40 @@ class QueryRouter:
         '학번'
     ]
     
+    # 3. 일반 질문 → 문서 카테고리 (text_data의 ===CATEGORY: 값)
+    CATEGORY_KEYWORDS = {
+        '학사일정': [
+            '개강', '종강', '중간고사', '기말고사', '방학', '학사일정',
+            '수강신청', '계절학기', '입학식', '졸업식'
+        ],
+        '도서관': [
+            '도서관', '열람실', '자료관', '대출', '반납', '연장', '빌려', '빌릴', '예약'
+        ],
+        '통학버스': [
+            '통학', '버스', '셔틀', '노선', '정류장', '승차', '예약'
+        ],
+        '교내 연락처': [
+            '연락처', '전화', '번호', '사무실', '행정실', '문의', '교수'
+        ],
+        '장학금': [
+            '장학', '등록금', '학자금'
+        ],
+        '실험실': [
+            '실험실', '연구실', '랩실', '교수'
+        ],
+        '교양과목': [
+            '교양'
+        ],
+        '전공과목': [
+            '전공'
+        ],
+        '졸업 요건': [
+            '졸업', '요건', '이수'
+        ]
+    }
+    
+    # 이보다 많은 카테고리가 걸리면 라우팅하지 않음 (전체 검색)
+    MAX_ROUTED_CATEGORIES = 3
     
     def _has_course_info(self, query: str) -> bool:
         """과목 정보가 있는지 체크"""
@@ -133,6 +167,26 @@ class QueryRouter:
         print("  → 기본값: general")
         return "general"
     
+    def detect_categories(self, query: str) -> List[str]:
+        """
+        일반 질문의 문서 카테고리 추정 (키워드가 많이 걸린 순)
+        
+        Returns:
+            카테고리 목록 (빈 리스트면 전체 검색)
+        """
+        query_lower = query.lower()
+        
+        hits = {}
+        for category, keywords in self.CATEGORY_KEYWORDS.items():
+            count = sum(1 for kw in keywords if kw in query_lower)
+            if count:
+                hits[category] = count
+        
+        if not hits or len(hits) > self.MAX_ROUTED_CATEGORIES:
+            return []
+        
+        return sorted(hits, key=lambda category: -hits[category])
+    
     def needs_user_profile(self, query: str) -> bool:
         """사용자 프로필이 필요한 질문인지 확인"""
         personal_indicators = [
@@ -0,0 +1,97 @@
+"""
+졸업요건 매칭 인덱스
+
+학번별 졸업요건을 한 번 컴파일해서
+과목 동일 ID(체인의 최종 코드) → (영역, 요건 키, 매칭 종류) 해시 인덱스로 만든다.
+수강 과목 하나당 dict 조회 한 번으로 요건을 찾는다.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# (course_area, requirement_key, match_kind)
+# match_kind: "required_all" | "required_one_of" | "selectable"
+RequirementMatch = Tuple[str, str, str]
+
+
+class RequirementIndex:
+    """학번별 졸업요건 컴파일 결과"""
+
+    def __init__(
+        self,
+        admission_year: int,
+        total_credits: int,
+        major_requirements: Dict[str, Dict],
+        liberal_arts_requirements: Dict[str, Dict],
+        canonical_id: Callable[[str], str]
+    ):
+        self.admission_year = admission_year
+        self.total_credits = total_credits
+        self.major_requirements = major_requirements
+        self.liberal_arts_requirements = liberal_arts_requirements
+        self.canonical_id = canonical_id
+
+        # 동일 ID → 매칭 후보 (우선순위 순서)
+        self.entries: Dict[str, List[RequirementMatch]] = {}
+
+        # 전공: 요건 타입별로 필수 → 선택 순서
+        for req_type, info in major_requirements.items():
+            self._add('전공', req_type, 'required_all', info['required_all'])
+            self._add('전공', req_type, 'selectable', info['selectable_codes'])
+
+        # 교양: 트랙 순서대로 필수 → 택1 → 선택
+        for track, info in liberal_arts_requirements.items():
+            self._add('교양', track, 'required_all', info['required_all'])
+            self._add('교양', track, 'required_one_of', info['required_one_of'])
+            self._add('교양', track, 'selectable', info['selectable_codes'])
+
+    def _add(self, course_area: str, key: str, kind: str, codes: Iterable):
+        for code in _flatten(codes):
+            matches = self.entries.setdefault(self.canonical_id(code), [])
+            # 같은 요건에는 가장 먼저 나온 매칭 종류만 유지
+            if not any(m[0] == course_area and m[1] == key for m in matches):
+                matches.append((course_area, key, kind))
+
+    def match_major(
+        self,
+        course_code: str,
+        requirement_type: str
+    ) -> Optional[RequirementMatch]:
+        """전공 과목 → 해당 요건 타입 안에서 매칭"""
+        for match in self.entries.get(self.canonical_id(course_code), ()):
+            if match[0] == '전공' and match[1] == requirement_type:
+                return match
+        return None
+
+    def match_liberal_arts(self, course_code: str) -> Optional[RequirementMatch]:
+        """교양 과목 → 트랙 순서상 첫 번째 매칭"""
+        for match in self.entries.get(self.canonical_id(course_code), ()):
+            if match[0] == '교양':
+                return match
+        return None
+
+    def new_state(self) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """계산용 요건 구조 복사본 (taken/remaining/taken_courses 초기화)"""
+        return (
+            _fresh_copy(self.major_requirements),
+            _fresh_copy(self.liberal_arts_requirements)
+        )
+
+
+def _fresh_copy(requirements: Dict[str, Dict]) -> Dict[str, Dict]:
+    return {
+        key: {
+            **info,
+            'taken': 0,
+            'remaining': info['required'],
+            'taken_courses': []
+        }
+        for key, info in requirements.items()
+    }
+
+
+def _flatten(codes: Iterable) -> Iterable[str]:
+    """과목 코드 목록 (중첩 리스트 허용)"""
+    for code in codes or []:
+        if isinstance(code, (list, tuple)):
+            yield from _flatten(code)
+        elif code:
+            yield code
@@ -0,0 +1,75 @@
+"""
+text_data/*.txt 문서 파서
+
+===CATEGORY: / ===TITLE: 블록 형식의 텍스트 파일을 문서 목록으로 읽는다.
+임베딩 업로드(create_embeddings.py)와 BM25 인덱스가 같은 파서를 쓴다.
+"""
+import hashlib
+from pathlib import Path
+from typing import Dict, List
+from app.config import BACKEND_DIR
+
+# backend/data/text_data
+TEXT_DATA_DIR = BACKEND_DIR / "data" / "text_data"
+
+
+def parse_text_file(file_path: str) -> List[Dict]:
+    """
+    텍스트 파일 → 문서 목록
+
+    Returns:
+        [{"content": "...", "metadata": {"category": "...", "title": "..."}}, ...]
+    """
+    documents = []
+    current_doc = {}
+    content_lines = []
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip()
+
+            if line.startswith('===CATEGORY:'):
+                # 이전 문서 저장
+                if current_doc and content_lines:
+                    current_doc['content'] = '\n'.join(content_lines).strip()
+                    documents.append(current_doc)
+
+                # 새 문서 시작
+                current_doc = {
+                    'metadata': {
+                        'category': line.replace('===CATEGORY:', '').strip()
+                    }
+                }
+                content_lines = []
+
+            elif line.startswith('===TITLE:'):
+                if current_doc:
+                    current_doc['metadata']['title'] = line.replace('===TITLE:', '').strip()
+
+            elif line:
+                content_lines.append(line)
+
+    # 마지막 문서 저장
+    if current_doc and content_lines:
+        current_doc['content'] = '\n'.join(content_lines).strip()
+        documents.append(current_doc)
+
+    return documents
+
+
+def document_hash(content: str, metadata: Dict) -> str:
+    """카테고리 + 제목 + 본문 해시 (바뀐 문서만 다시 임베딩하기 위한 키)"""
+    key = '\n'.join([
+        metadata.get('category') or '',
+        metadata.get('title') or '',
+        content or ''
+    ])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def load_text_directory(directory: Path = TEXT_DATA_DIR) -> List[Dict]:
+    """디렉토리 내 모든 .txt 파일의 문서 (파일명 순)"""
+    documents = []
+    for txt_file in sorted(Path(directory).glob("*.txt")):
+        documents.extend(parse_text_file(str(txt_file)))
+    return documents
@@ -0,0 +1,118 @@
+"""
+프롬프트 토큰 예산
+
+시스템 프롬프트 + 검색 컨텍스트 + 현재 질문을 먼저 세고,
+남은 예산 안에 들어가는 최근 대화만 프롬프트에 넣는다. (긴 세션에서도 프롬프트 크기 일정)
+토큰 수는 tiktoken으로 세고, 없으면 UTF-8 바이트 수로 근사한다.
+"""
+from typing import Dict, List, Tuple
+from app.config import settings
+
+# 메시지 하나당 역할/구분자 토큰 (OpenAI chat 형식 기준 근사)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class TokenCounter:
+    """모델 토크나이저로 토큰 수 세기 (tiktoken 없으면 근사)"""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._encoding = None
+        self._loaded = False
+
+    @property
+    def backend(self) -> str:
+        return "tiktoken" if self._get_encoding() is not None else "approx"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        encoding = self._get_encoding()
+        if encoding is None:
+            # 한글 1글자(3바이트) ≈ 1토큰, 영문은 3글자 ≈ 1토큰 (실제보다 약간 크게 잡음)
+            return len(text.encode('utf-8')) // 3 + 1
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def count_message(self, content: str) -> int:
+        return self.count(content) + MESSAGE_OVERHEAD_TOKENS
+
+    def _get_encoding(self):
+        if self._loaded:
+            return self._encoding
+        try:
+            import tiktoken
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model_name)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            print(f"⚠️ tiktoken 로드 실패, 토큰 수 근사: {e}")
+            self._encoding = None
+        self._loaded = True
+        return self._encoding
+
+
+def fit_history(history: List[Dict], budget: int, counter: "TokenCounter") -> Tuple[List[Dict], int]:
+    """
+    예산 안에 들어가는 최근 대화만 남김 (오래된 것부터 버림)
+
+    Returns:
+        (남은 대화, 남은 대화의 토큰 수)
+    """
+    kept = []
+    used = 0
+    for msg in reversed(history):
+        tokens = counter.count_message(msg.get('content') or '')
+        if used + tokens > budget:
+            break
+        kept.append(msg)
+        used += tokens
+
+    kept.reverse()
+
+    # 챗봇 답변으로 시작하지 않도록 (질문 없이 답변만 남은 턴 제거)
+    while kept and kept[0].get('role') == 'assistant':
+        used -= counter.count_message(kept[0].get('content') or '')
+        kept.pop(0)
+
+    return kept, used
+
+
+def budget_prompt(
+    system_prompt: str,
+    context: str,
+    history: List[Dict],
+    message: str,
+    budget: int,
+    counter: "TokenCounter" = None
+) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    고정 부분(시스템 프롬프트, 컨텍스트, 질문)을 빼고 남은 예산만큼 최근 대화를 채움
+
+    Returns:
+        (프롬프트에 넣을 대화, 토큰 사용량)
+    """
+    counter = counter or token_counter
+
+    system_tokens = counter.count_message(system_prompt)
+    context_tokens = counter.count(context)
+    message_tokens = counter.count_message(message)
+
+    remaining = max(budget - system_tokens - context_tokens - message_tokens, 0)
+    kept, history_tokens = fit_history(history or [], remaining, counter)
+
+    usage = {
+        "system_tokens": system_tokens,
+        "context_tokens": context_tokens,
+        "history_tokens": history_tokens,
+        "message_tokens": message_tokens,
+        "prompt_tokens": system_tokens + context_tokens + history_tokens + message_tokens,
+        "history_messages": len(kept),
+        "history_dropped": len(history or []) - len(kept),
+        "budget": budget
+    }
+    return kept, usage
+
+
+# 전역 카운터
+token_counter = TokenCounter(settings.model_name)
@@ -0,0 +1,245 @@
+"""
+인프로세스 벡터 인덱스
+
+documents 테이블(수백 건)을 메모리에 올려두고 코사인 유사도 top-k를 직접 계산한다.
+match_documents RPC와 같은 필터(metadata @> filter)와 결과 형식을 따른다.
+
+디스크 아티팩트 (버전별, 디렉토리 하나):
+    embeddings-v{버전}.npy   정규화된 임베딩 행렬 (float16/float32) → 서버는 mmap으로 읽음
+    documents-v{버전}.json   id/content/metadata 사이드카
+    manifest.json            현재 버전 포인터 (마지막에 원자적으로 교체)
+여러 uvicorn 워커가 같은 .npy를 mmap하면 페이지 캐시 한 벌을 공유한다.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+# 유사도 계산 블록 크기 (행). float16 아티팩트는 블록 단위로만 float32로 올려 곱함
+SCORE_BLOCK_ROWS = 4096
+
+
+def _parse_embedding(value: Any) -> List[float]:
+    """pgvector 값 → float 리스트 (PostgREST는 '[0.1,0.2,...]' 문자열로 반환)"""
+    if isinstance(value, str):
+        return json.loads(value)
+    return list(value)
+
+
+def metadata_contains(metadata: Any, filter_json: Any) -> bool:
+    """jsonb @> 연산 (객체는 키별로 재귀 포함, 배열은 원소 포함, 나머지는 동등 비교)"""
+    if isinstance(filter_json, dict):
+        if not isinstance(metadata, dict):
+            return False
+        return all(
+            key in metadata and metadata_contains(metadata[key], value)
+            for key, value in filter_json.items()
+        )
+    if isinstance(filter_json, list):
+        if not isinstance(metadata, list):
+            return False
+        return all(any(metadata_contains(m, f) for m in metadata) for f in filter_json)
+    return metadata == filter_json
+
+
+class LocalVectorIndex:
+    """documents 행 → 정규화된 임베딩 행렬 (정확 검색)"""
+
+    def __init__(self, rows: List[Dict], embeddings: Optional[np.ndarray] = None, version: Optional[str] = None):
+        """
+        Args:
+            rows: documents 행 (embeddings가 없으면 각 행의 embedding 사용)
+            embeddings: 이미 정규화된 임베딩 행렬 (아티팩트 mmap 등)
+            version: 아티팩트 버전 (DB에서 만든 인덱스는 None)
+        """
+        if embeddings is None:
+            rows = [row for row in rows if row.get('embedding') is not None]
+
+        self.version = version
+        self.ids: List[Any] = [row.get('id') for row in rows]
+        self.contents: List[str] = [row.get('content', '') for row in rows]
+        self.metadatas: List[Dict] = [row.get('metadata') or {} for row in rows]
+
+        # 카테고리 → 행 위치 (카테고리 라우팅 시 후보 축소)
+        partitions: Dict[str, List[int]] = {}
+        for i, meta in enumerate(self.metadatas):
+            partitions.setdefault(meta.get('category'), []).append(i)
+        self.partitions: Dict[str, np.ndarray] = {
+            category: np.asarray(positions, dtype=np.int64)
+            for category, positions in partitions.items()
+        }
+
+        if embeddings is not None:
+            self.embeddings = embeddings
+        elif rows:
+            matrix = np.asarray([_parse_embedding(row['embedding']) for row in rows], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.embeddings = matrix / norms
+        else:
+            self.embeddings = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int = 3,
+        filter_json: Optional[Dict] = None,
+        categories: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        코사인 유사도 top-k
+
+        Args:
+            categories: 이 카테고리 파티션들 안에서만 검색 (None이면 전체)
+
+        Returns:
+            [{"id", "content", "metadata", "similarity"}, ...] (유사도 내림차순)
+        """
+        if not len(self) or k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        if categories:
+            parts = [self.partitions[c] for c in categories if c in self.partitions]
+            if not parts:
+                return []
+            candidates = np.unique(np.concatenate(parts))
+        else:
+            candidates = None
+
+        if filter_json:
+            positions = candidates if candidates is not None else range(len(self))
+            candidates = np.array(
+                [i for i in positions if metadata_contains(self.metadatas[i], filter_json)],
+                dtype=np.int64
+            )
+            if not len(candidates):
+                return []
+
+        candidate_scores = self._scores(query, candidates)
+        if candidates is None:
+            candidates = np.arange(len(self))
+        if k < len(candidates):
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-candidate_scores[top], kind='stable')]
+
+        return [
+            {
+                "id": self.ids[candidates[i]],
+                "content": self.contents[candidates[i]],
+                "metadata": self.metadatas[candidates[i]],
+                "similarity": float(candidate_scores[i])
+            }
+            for i in top
+        ]
+
+    def _scores(self, query: np.ndarray, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        후보 행(None이면 전체)과 쿼리의 내적 (float32)
+
+        float16 mmap 행렬에 float32 쿼리를 바로 곱하면 numpy가 행렬 전체를 float32로 복사하므로
+        SCORE_BLOCK_ROWS 행씩 잘라 블록만 float32로 올려 곱한다.
+        (float32 행렬의 연속 구간은 복사 없이 그대로 곱함)
+        """
+        count = len(self) if candidates is None else len(candidates)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, SCORE_BLOCK_ROWS):
+            stop = min(start + SCORE_BLOCK_ROWS, count)
+            if candidates is None:
+                block = self.embeddings[start:stop]
+            else:
+                block = self.embeddings[candidates[start:stop]]
+            scores[start:stop] = block.astype(np.float32, copy=False) @ query
+        return scores
+
+    # ===== 디스크 아티팩트 =====
+    def save(self, directory: str, dtype: str = "float16", keep_versions: int = 2) -> str:
+        """
+        버전별 .npy + 사이드카 저장 후 manifest 교체
+
+        Returns:
+            저장한 버전
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        now = time.time()
+        version = time.strftime('%Y%m%d%H%M%S', time.localtime(now)) + f"{int(now * 1000) % 1000:03d}"
+        matrix_file = f"embeddings-v{version}.npy"
+        sidecar_file = f"documents-v{version}.json"
+
+        # 임시 파일에 쓴 뒤 이름 변경 (다른 워커가 mmap 중인 파일을 덮어쓰지 않음)
+        tmp = directory / f"{matrix_file}.tmp"
+        with open(tmp, 'wb') as f:
+            np.save(f, np.asarray(self.embeddings, dtype=dtype))
+        os.replace(tmp, directory / matrix_file)
+
+        documents = [
+            {"id": self.ids[i], "content": self.contents[i], "metadata": self.metadatas[i]}
+            for i in range(len(self))
+        ]
+        tmp = directory / f"{sidecar_file}.tmp"
+        tmp.write_text(
+            json.dumps({"version": version, "documents": documents}, ensure_ascii=False),
+            encoding='utf-8'
+        )
+        os.replace(tmp, directory / sidecar_file)
+
+        manifest = {
+            "version": version,
+            "embeddings": matrix_file,
+            "documents": sidecar_file,
+            "count": len(self),
+            "dim": int(self.embeddings.shape[1]) if len(self) else 0,
+            "dtype": dtype
+        }
+        tmp = directory / "manifest.json.tmp"
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(tmp, directory / "manifest.json")
+
+        _remove_old_versions(directory, keep_versions)
+        return version
+
+    @classmethod
+    def load(cls, directory: str) -> "LocalVectorIndex":
+        """manifest가 가리키는 버전을 mmap으로 로드"""
+        directory = Path(directory)
+        manifest = json.loads((directory / "manifest.json").read_text(encoding='utf-8'))
+
+        embeddings = np.load(directory / manifest['embeddings'], mmap_mode='r')
+        sidecar = json.loads((directory / manifest['documents']).read_text(encoding='utf-8'))
+
+        if embeddings.shape[0] != len(sidecar['documents']):
+            raise ValueError(
+                f"아티팩트 불일치: 임베딩 {embeddings.shape[0]}행, 문서 {len(sidecar['documents'])}개"
+            )
+        return cls(sidecar['documents'], embeddings=embeddings, version=manifest['version'])
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return (Path(directory) / "manifest.json").exists()
+
+
+def _remove_old_versions(directory: Path, keep_versions: int):
+    """최근 keep_versions개 버전만 남김 (이미 mmap 중인 워커는 열린 파일을 계속 사용)"""
+    versions = sorted(
+        (p.name[len("embeddings-v"):-len(".npy")] for p in directory.glob("embeddings-v*.npy")),
+        reverse=True
+    )
+    for version in versions[keep_versions:]:
+        for name in (f"embeddings-v{version}.npy", f"documents-v{version}.json"):
+            try:
+                (directory / name).unlink()
+            except FileNotFoundError:
+                pass
@@ -1,60 +1,232 @@
 """
 벡터 검색 서비스
 """
-from typing import List, Dict, Any, Optional
-from sentence_transformers import SentenceTransformer
-from app.config import settings
-from app.database.supabase_client import supabase
+import threading
+import time
+from typing import List, Dict, Any, Optional, Union
+from app.config import resolve_path, settings
+from app.database.repository import repository
+from app.services.answer_cache import answer_cache
+from app.services.bm25_index import fuse_results, get_bm25_index
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import query_embedding_cache
+from app.services.embedding_model import load_embedding_model
+from app.services.vector_index import LocalVectorIndex
 
 
 class VectorSearchService:
     """벡터 검색 서비스"""
     
     def __init__(self):
-        print(f"🔧 임베딩 모델 로딩: {settings.embedding_model}")
-        self.model = SentenceTransformer(settings.embedding_model)
+        self.model = load_embedding_model()
         print("✅ 모델 로딩 완료")
+        
+        # 동시 쿼리 임베딩 마이크로 배처
+        self.batcher: Optional[EmbeddingBatcher] = None
+        if settings.embedding_batch_enabled:
+            self.batcher = EmbeddingBatcher(
+                self._encode_batch,
+                max_batch_size=settings.embedding_batch_max_size,
+                max_wait_ms=settings.embedding_batch_max_wait_ms
+            )
+        
+        # 검색 경로별 지연 시간
+        self.latency: Dict[str, Dict] = {}
+        
+        # 로컬 인덱스 (None이면 match_documents RPC 사용)
+        self.index: Optional[LocalVectorIndex] = None
+        if settings.vector_index_enabled:
+            self.load_index()
+    
+    def load_index(self, from_db: bool = False) -> bool:
+        """
+        로컬 벡터 인덱스 로드
+        
+        - 임베딩 아티팩트(settings.vector_index_path)가 있으면 mmap으로 로드
+        - 없거나 from_db=True면 documents 테이블에서 받아 아티팩트로 저장
+          (다음 시작/다른 워커는 DB 전체 조회 없이 아티팩트 사용)
+        
+        실패하면 기존 인덱스를 유지하고 False 반환
+        """
+        artifact_dir = resolve_path(settings.vector_index_path) if settings.vector_index_path else None
+        
+        try:
+            if artifact_dir and not from_db and LocalVectorIndex.exists(artifact_dir):
+                index = LocalVectorIndex.load(artifact_dir)
+                source = f"아티팩트 v{index.version}"
+            else:
+                index = LocalVectorIndex(repository.fetch_documents())
+                source = "documents 테이블"
+                if artifact_dir and len(index):
+                    self._save_artifact(index, artifact_dir)
+        except Exception as e:
+            print(f"❌ 로컬 벡터 인덱스 로딩 실패 (RPC 검색 사용): {e}")
+            return False
+        
+        if not len(index):
+            print(f"⚠️ 로컬 벡터 인덱스가 비어 있음 (RPC 검색 사용): {source}")
+            return False
+        
+        self.index = index
+        # 문서가 바뀌었을 수 있으므로 이전 답변은 버림
+        answer_cache.clear()
+        print(f"✅ 로컬 벡터 인덱스 로딩: {len(index)}개 문서 ({source})")
+        return True
+    
+    def _save_artifact(self, index: LocalVectorIndex, artifact_dir):
+        """DB에서 만든 인덱스를 아티팩트로 저장 (실패해도 검색에는 영향 없음)"""
+        try:
+            version = index.save(artifact_dir, dtype=settings.vector_index_dtype)
+            print(f"💾 임베딩 아티팩트 저장: {artifact_dir} (v{version})")
+        except Exception as e:
+            print(f"⚠️ 임베딩 아티팩트 저장 실패 (무시): {e}")
+    
+    def embed_query(self, query: str) -> List[float]:
+        """쿼리 임베딩 (LRU 캐시 → 미스면 배처/모델)"""
+        encoder = self.batcher.encode if self.batcher is not None else self.model.encode
+        return query_embedding_cache.get_or_compute(query, encoder)
+    
+    def _encode_batch(self, texts: List[str]) -> List[List[float]]:
+        """쿼리 여러 개 한 번에 encode"""
+        return self.model.encode(texts, batch_size=len(texts)).tolist()
     
     def search(
         self, 
         query: str, 
         k: int = 3,
-        category_filter: Optional[str] = None
+        category_filter: Optional[Union[str, List[str]]] = None,
+        mode: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
-        벡터 검색 수행
+        문서 검색 수행
         
         Args:
             query: 검색 쿼리
             k: 반환할 문서 수
-            category_filter: 카테고리 필터 (예: "도서관", "실험실")
+            category_filter: 카테고리 필터 (예: "도서관", 여러 개면 ["도서관", "교내 연락처"])
+            mode: "vector" | "bm25" | "hybrid" (기본: settings.retrieval_mode)
         
         Returns:
             검색 결과 리스트
         """
-        # 쿼리 임베딩 생성
-        query_embedding = self.model.encode(query).tolist()
+        mode = mode or settings.retrieval_mode
         
-        # Supabase RPC 호출
         filter_json = {}
-        if category_filter:
+        categories = None
+        if isinstance(category_filter, str):
             filter_json = {"category": category_filter}
+        elif category_filter:
+            categories = list(category_filter)
+        
+        results = self._search(query, k, filter_json, categories, mode)
+        
+        # 카테고리 라우팅이 빗나간 경우 전체 검색
+        if categories and not results:
+            print(f"⚠️ 카테고리 {categories}에서 결과 없음, 전체 검색")
+            results = self._search(query, k, filter_json, None, mode)
+        
+        return results
+    
+    def _search(
+        self,
+        query: str,
+        k: int,
+        filter_json: Dict,
+        categories: Optional[List[str]],
+        mode: str
+    ) -> List[Dict[str, Any]]:
+        if mode == "bm25":
+            return self._lexical_search(query, k, filter_json, categories)
         
         try:
-            result = supabase.rpc(
-                'match_documents',
-                {
-                    'query_embedding': query_embedding,
-                    'match_count': k,
-                    'filter': filter_json
-                }
-            ).execute()
-            
-            return result.data if result.data else []
+            vector_results = self._vector_search(query, k, filter_json, categories)
+        except Exception as e:
+            # 임베딩 모델 오류 → 어휘 검색으로 대체
+            print(f"⚠️ 쿼리 임베딩 실패, BM25 검색 사용: {e}")
+            return self._lexical_search(query, k, filter_json, categories)
+        
+        if mode == "hybrid":
+            lexical_results = self._lexical_search(query, k, filter_json, categories)
+            return fuse_results([vector_results, lexical_results], k)
+        
+        return vector_results
+    
+    def _vector_search(
+        self,
+        query: str,
+        k: int,
+        filter_json: Dict,
+        categories: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """벡터 검색 (로컬 인덱스 → 실패 시 match_documents RPC)"""
+        started = time.perf_counter()
+        
+        # 쿼리 임베딩 생성 (반복 질문은 캐시에서)
+        query_embedding = self.embed_query(query)
         
+        try:
+            # 로컬 인덱스 우선 (카테고리 파티션 안에서만 계산)
+            index = self.index
+            if index is not None:
+                try:
+                    return index.search(query_embedding, k, filter_json, categories)
+                except Exception as e:
+                    print(f"⚠️ 로컬 벡터 검색 실패, RPC 사용: {e}")
+            
+            try:
+                if not categories:
+                    return repository.match_documents(query_embedding, k, filter_json)
+                
+                # RPC 필터는 포함(@>) 조건 하나뿐 → 카테고리별로 조회 후 병합
+                merged = []
+                for category in categories:
+                    merged.extend(repository.match_documents(
+                        query_embedding, k, {**filter_json, "category": category}
+                    ))
+                merged.sort(key=lambda r: -r.get('similarity', 0))
+                return merged[:k]
+            
+            except Exception as e:
+                print(f"❌ 벡터 검색 실패: {e}")
+                return []
+        finally:
+            self._record_latency("vector", started)
+    
+    def _lexical_search(
+        self,
+        query: str,
+        k: int,
+        filter_json: Dict,
+        categories: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """BM25 검색 (임베딩 모델 불필요)"""
+        started = time.perf_counter()
+        try:
+            return get_bm25_index().search(query, k, filter_json, categories)
         except Exception as e:
-            print(f"❌ 벡터 검색 실패: {e}")
+            print(f"❌ BM25 검색 실패: {e}")
             return []
+        finally:
+            self._record_latency("bm25", started)
+    
+    def _record_latency(self, path: str, started: float):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = self.latency.setdefault(path, {"count": 0, "total_ms": 0.0, "last_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["last_ms"] = elapsed_ms
+        print(f"⏱️ {path} 검색: {elapsed_ms:.1f}ms")
+    
+    def latency_stats(self) -> Dict[str, Dict]:
+        """검색 경로별 지연 시간 (평균/최근, ms)"""
+        return {
+            path: {
+                "count": stats["count"],
+                "avg_ms": round(stats["total_ms"] / stats["count"], 2),
+                "last_ms": round(stats["last_ms"], 2)
+            }
+            for path, stats in self.latency.items()
+        }
     
     def format_search_results(self, results: List[Dict[str, Any]]) -> str:
         """검색 결과를 텍스트로 포맷팅"""
@@ -73,13 +245,21 @@ class VectorSearchService:
         return "\n".join(formatted)
 
 
-# 전역 서비스 (앱 시작 시 한 번만 로드)
+# 전역 서비스 (앱 시작 시 워밍업에서 한 번만 로드)
 vector_service = None
+_vector_service_lock = threading.Lock()
 
 
 def get_vector_service() -> VectorSearchService:
-    """벡터 서비스 싱글톤"""
+    """벡터 서비스 싱글톤 (동시 요청이 모델을 중복 로드하지 않도록 잠금)"""
     global vector_service
     if vector_service is None:
-        vector_service = VectorSearchService()
-    return vector_service
\ No newline at end of file
+        with _vector_service_lock:
+            if vector_service is None:
+                vector_service = VectorSearchService()
+    return vector_service
+
+
+def get_loaded_vector_service() -> Optional[VectorSearchService]:
+    """이미 로드된 벡터 서비스 (없으면 None, 모델 로드를 유발하지 않음 - 지표 조회용)"""
+    return vector_service
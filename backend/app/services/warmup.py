@@ -0,0 +1,166 @@
+"""
+앱 시작 워밍업 + 준비 상태
+
+임베딩 모델 로드, 교육과정/동일대체 캐시 채우기, 외부 연결 열기를 요청 전에 끝내고
+컴포넌트별 상태를 /ready 로 보고한다. (로드밸런서는 준비된 워커에만 트래픽 전달)
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+from app.config import settings
+from app.database.repository import repository
+from app.services.bm25_index import get_bm25_index
+from app.services.curriculum_cache import curriculum_cache
+from app.services.equivalent_course_service import equivalent_course_service
+from app.services.vector_service import get_vector_service
+
+# 실패하면 준비 완료로 보지 않는 컴포넌트 (나머지는 요청 시 지연 로드/대체 경로가 있음)
+REQUIRED_COMPONENTS = ("embedding_model", "llm")
+
+
+class WarmupState:
+    """워밍업 진행 상태 (컴포넌트별)"""
+
+    def __init__(self):
+        self.started_at = None
+        self.finished_at = None
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    async def arun(self, chatbot):
+        """
+        워밍업 실행 (서빙 이벤트 루프에서 백그라운드 태스크로)
+
+        모델/캐시 로드는 스레드에서 하고, OpenAI 연결은 요청이 쓰는 비동기 클라이언트로
+        이 루프에서 연다. 태스크를 취소해도 스레드는 멈추지 않으므로
+        종료 시 stop()을 호출하면 진행 중인 단계만 마치고 나머지 단계는 건너뛴다.
+        """
+        self.started_at = time.time()
+        print("🔥 워밍업 시작")
+
+        await asyncio.to_thread(self._run_blocking_steps, chatbot)
+        await self._astep("llm_connection", lambda: self._awarm_llm_connection(chatbot))
+
+        self.finished_at = time.time()
+        print(f"🔥 워밍업 완료 ({self.finished_at - self.started_at:.1f}s), 준비 상태: {self.is_ready()}")
+
+    def _run_blocking_steps(self, chatbot):
+        self._step("embedding_model", self._warm_embedding_model)
+        self._step("bm25_index", lambda: f"{len(get_bm25_index())}개 문서")
+        self._step("equivalent_courses", self._warm_equivalent_courses)
+        self._step("curriculum_cache", self._warm_curriculum_cache)
+        self._step("llm", lambda: self._warm_llm(chatbot))
+
+    def stop(self):
+        """남은 워밍업 단계 건너뛰기 (앱 종료 시)"""
+        self._stop.set()
+
+    def is_ready(self) -> bool:
+        if self.finished_at is None:
+            return False
+        return all(
+            self.components.get(name, {}).get("status") == "ready"
+            for name in REQUIRED_COMPONENTS
+        )
+
+    def report(self) -> Dict[str, Any]:
+        """/ready 응답 본문"""
+        return {
+            "ready": self.is_ready(),
+            "warmup": "done" if self.finished_at else ("running" if self.started_at else "pending"),
+            "components": dict(self.components)
+        }
+
+    def _step(self, name: str, action: Callable[[], Any]):
+        if not self._begin(name):
+            return
+
+        started = time.perf_counter()
+        try:
+            status = self._ready_status(action())
+        except Exception as e:
+            status = self._failed_status(name, e)
+        self._finish(name, status, started)
+
+    async def _astep(self, name: str, action: Callable[[], Awaitable[Any]]):
+        if not self._begin(name):
+            return
+
+        started = time.perf_counter()
+        try:
+            status = self._ready_status(await action())
+        except Exception as e:
+            status = self._failed_status(name, e)
+        self._finish(name, status, started)
+
+    def _begin(self, name: str) -> bool:
+        """단계 시작 표시 (종료 중이면 skipped로 기록하고 False)"""
+        with self._lock:
+            if self._stop.is_set():
+                self.components[name] = {"status": "skipped"}
+                return False
+            self.components[name] = {"status": "loading"}
+            return True
+
+    @staticmethod
+    def _ready_status(detail: Any) -> Dict[str, Any]:
+        status = {"status": "ready"}
+        if detail:
+            status["detail"] = detail
+        return status
+
+    @staticmethod
+    def _failed_status(name: str, error: Exception) -> Dict[str, Any]:
+        print(f"❌ 워밍업 실패 ({name}): {error}")
+        return {"status": "failed", "error": str(error)}
+
+    def _finish(self, name: str, status: Dict[str, Any], started: float):
+        status["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        with self._lock:
+            self.components[name] = status
+        print(f"  {'✅' if status['status'] == 'ready' else '⚠️'} {name}: {status['elapsed_ms']}ms")
+
+    def _warm_embedding_model(self) -> str:
+        """모델 + 로컬 벡터 인덱스 로드 후 더미 encode 한 번 (첫 요청의 지연 제거)"""
+        service = get_vector_service()
+        service.model.encode("워밍업")
+        index_size = len(service.index) if service.index is not None else 0
+        return f"{settings.embedding_backend}, 로컬 인덱스 {index_size}개 문서"
+
+    def _warm_equivalent_courses(self) -> str:
+        graph = equivalent_course_service.graph
+        if not equivalent_course_service.is_loaded:
+            raise RuntimeError("동일대체 그래프 로딩 실패")
+        return f"{len(graph.rows)}개 매핑"
+
+    def _warm_curriculum_cache(self) -> str:
+        years = _parse_years(settings.warmup_admission_years) or repository.fetch_admission_years()
+        for year in years:
+            snapshot = curriculum_cache.get_snapshot(year)
+            if snapshot.version < 0:
+                raise RuntimeError(f"{year}학번 스냅샷 로딩 실패")
+        return f"{years}"
+
+    def _warm_llm(self, chatbot) -> str:
+        chatbot._get_llm()
+        return settings.model_name
+
+    async def _awarm_llm_connection(self, chatbot) -> str:
+        """
+        OpenAI 연결 미리 열기 (토큰을 쓰지 않는 모델 정보 조회)
+
+        achat/achat_stream은 비동기 클라이언트(root_async_client)의 커넥션 풀을 쓰므로
+        동기 클라이언트가 아니라 이 클라이언트로 서빙 루프에서 연결을 맺어 둔다.
+        """
+        await chatbot._get_llm().root_async_client.models.retrieve(settings.model_name)
+        return "connected"
+
+
+def _parse_years(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+# 전역 상태
+warmup_state = WarmupState()
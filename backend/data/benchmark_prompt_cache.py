@@ -0,0 +1,137 @@
+"""
+답변 프롬프트 배치(layout) 벤치마크: 검색 결과를 시스템 프롬프트 중간에 넣던 방식(legacy) vs
+고정 지시문을 앞에 두고 대화/검색 결과/질문을 뒤에 붙이는 방식(prefix)
+
+같은 세션 질문들을 순서대로 보내며(이전 답변을 대화 이력으로 누적) 턴마다
+지연 시간, 입력/캐시된 입력/출력 토큰, 예상 비용을 잰다.
+OpenAI 프롬프트 캐시는 앞부분 1024토큰 이상이 같아야 적중하므로 대화가 쌓일수록 차이가 커진다.
+
+사용법:
+    python data/benchmark_prompt_cache.py
+    python data/benchmark_prompt_cache.py --layout prefix --rounds 3
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# 상위 디렉토리 추가
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.services.chatbot import ANSWER_SYSTEM_PROMPT, ANSWER_USER_TEMPLATE, chatbot
+from app.services.llm_usage import estimate_cost, extract_usage
+
+
+# 한 세션에서 이어지는 일반 질문
+SESSION_QUESTIONS = [
+    "도서관 운영시간 알려줘",
+    "책 몇 권 빌릴 수 있어?",
+    "열람실 24시간이야?",
+    "광주에서 학교 가는 통학버스 시간 알려줘",
+    "통학버스 예약은 어떻게 해?",
+    "학과사무실 전화번호 알려줘",
+    "국가장학금 신청 언제 해?",
+    "성적 장학금 받으려면?",
+    "AI 관련 실험실 있어?",
+    "기말고사 기간이 언제야",
+]
+
+
+def legacy_messages(context: str, history: List[Dict], message: str) -> List[Tuple[str, str]]:
+    """이전 배치: 시스템 프롬프트 = 지시문 + 검색 결과 → 대화 → 질문"""
+    messages = [("system", f"{ANSWER_SYSTEM_PROMPT}\n검색된 정보:\n{context}\n")]
+    messages += [(msg['role'], msg['content']) for msg in history]
+    messages.append(("user", message))
+    return messages
+
+
+def prefix_messages(context: str, history: List[Dict], message: str) -> List[Tuple[str, str]]:
+    """현재 배치: 고정 지시문 → 대화 → 검색 결과 + 질문"""
+    messages = [("system", ANSWER_SYSTEM_PROMPT)]
+    messages += [(msg['role'], msg['content']) for msg in history]
+    messages.append(("user", ANSWER_USER_TEMPLATE.format(context=context, message=message)))
+    return messages
+
+
+LAYOUTS = {
+    "legacy": legacy_messages,
+    "prefix": prefix_messages,
+}
+
+
+def run_session(layout: str, contexts: Dict[str, str]) -> List[Dict]:
+    """세션 질문을 순서대로 보내고 턴별 측정값 반환"""
+    llm = chatbot._get_llm()
+    build = LAYOUTS[layout]
+    history = []
+    turns = []
+
+    for question in SESSION_QUESTIONS:
+        messages = build(contexts[question], history, question)
+
+        started = time.perf_counter()
+        response = llm.invoke(messages)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        usage = extract_usage(response)
+        turns.append({
+            "latency_ms": elapsed_ms,
+            "cost": estimate_cost(settings.model_name, usage),
+            **usage
+        })
+
+        history.append({"role": "user", "content": question})
+        history.append({"role": "assistant", "content": response.content})
+
+    return turns
+
+
+def summarize(layout: str, turns: List[Dict]):
+    latencies = [t['latency_ms'] for t in turns]
+    prompt_tokens = sum(t.get('api_prompt_tokens', 0) for t in turns)
+    cached_tokens = sum(t.get('cached_tokens', 0) for t in turns)
+    cost = sum(t['cost'] for t in turns)
+
+    print(f"\n[{layout}] {len(turns)}회 호출")
+    print(f"  지연 시간: 평균 {statistics.mean(latencies):.0f}ms, 중앙값 {statistics.median(latencies):.0f}ms, 최대 {max(latencies):.0f}ms")
+    print(f"  입력 토큰: {prompt_tokens}, 캐시된 입력: {cached_tokens} ({cached_tokens / prompt_tokens:.1%})" if prompt_tokens else "  입력 토큰: 사용량 정보 없음")
+    print(f"  예상 비용: ${cost:.6f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="답변 프롬프트 배치별 지연 시간/프롬프트 캐시/비용 비교")
+    parser.add_argument("--layout", choices=["both", *LAYOUTS], default="both", help="측정할 배치 (기본: both)")
+    parser.add_argument("--rounds", type=int, default=2, help="세션 반복 횟수 (기본: 2, 두 번째부터 캐시가 데워진 상태)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"📊 프롬프트 캐시 벤치마크 ({settings.model_name})")
+    print("=" * 60)
+
+    # 검색은 한 번만 (두 배치가 같은 컨텍스트를 쓰도록)
+    print("\n🔍 검색 결과 준비 중...")
+    contexts = {
+        question: chatbot.vector_service.format_search_results(chatbot._retrieve(question))
+        for question in SESSION_QUESTIONS
+    }
+
+    layouts = list(LAYOUTS) if args.layout == "both" else [args.layout]
+    results = {layout: [] for layout in layouts}
+
+    for round_no in range(1, args.rounds + 1):
+        for layout in layouts:
+            print(f"\n⏳ {round_no}회차 - {layout}")
+            results[layout].extend(run_session(layout, contexts))
+
+    print("\n" + "=" * 60)
+    print("📈 결과")
+    print("=" * 60)
+    for layout in layouts:
+        summarize(layout, results[layout])
+
+
+if __name__ == "__main__":
+    main()
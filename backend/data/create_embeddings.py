@@ -1,16 +1,27 @@
 """
 텍스트 데이터를 읽어서 임베딩 생성 후 Supabase documents 테이블에 업로드
+
+사용법:
+    python data/create_embeddings.py             # 증분 동기화 (바뀐 문서만 임베딩)
+    python data/create_embeddings.py --dry-run   # 변경 내역만 출력
+    python data/create_embeddings.py --full      # 전체 삭제 후 재업로드
 """
+import argparse
 import sys
+import time
 from pathlib import Path
 from typing import List, Dict
 
 # 상위 디렉토리 추가
 sys.path.append(str(Path(__file__).parent.parent))
 
-from app.config import settings
+from app.config import resolve_path, settings
+from app.database.repository import SupabaseRepository
+from app.services.embedding_cache import query_embedding_cache
+from app.services.embedding_model import load_embedding_model
+from app.services.text_documents import document_hash, parse_text_file
+from app.services.vector_index import LocalVectorIndex
 from supabase import create_client, Client
-from sentence_transformers import SentenceTransformer
 
 
 class EmbeddingCreator:
@@ -21,50 +32,23 @@ class EmbeddingCreator:
             settings.supabase_url, 
             settings.supabase_service_key
         )
-        print(f"📦 임베딩 모델 로딩 중: {settings.embedding_model}")
-        self.model = SentenceTransformer(settings.embedding_model)
-        print("✅ 모델 로딩 완료")
+        self.repository = SupabaseRepository(self.supabase)
+        self._model = None
+    
+    @property
+    def model(self):
+        """임베딩 모델 (임베딩할 문서가 있을 때만 로드)"""
+        if self._model is None:
+            # 서비스와 같은 백엔드(torch/onnx)로 문서 임베딩
+            self._model = load_embedding_model()
+            print("✅ 모델 로딩 완료")
+        return self._model
     
     def load_from_text_file(self, file_path: str) -> List[Dict]:
-        documents = []
-        current_doc = {}
-        content_lines = []
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            print(f"  총 라인 수: {len(lines)}")  # 디버깅
-            
-            for idx, line in enumerate(lines):
-                line = line.rstrip()
-                
-                if line.startswith('===CATEGORY:'):
-                    print(f"  라인 {idx}: CATEGORY 발견")  # 디버깅
-                    # 이전 문서 저장
-                    if current_doc and content_lines:
-                        current_doc['content'] = '\n'.join(content_lines).strip()
-                        documents.append(current_doc)
-                        print(f"    문서 저장됨: {current_doc['metadata'].get('title', 'NO TITLE')}")  # 디버깅
-                    
-                    # 새 문서 시작
-                    current_doc = {
-                        'metadata': {
-                            'category': line.replace('===CATEGORY:', '').strip()
-                        }
-                    }
-                    content_lines = []
-                
-                elif line.startswith('===TITLE:'):
-                    current_doc['metadata']['title'] = line.replace('===TITLE:', '').strip()
-                
-                elif line:
-                    content_lines.append(line)
-        
-        # 마지막 문서 저장
-        if current_doc and content_lines:
-            current_doc['content'] = '\n'.join(content_lines).strip()
-            documents.append(current_doc)
-            print(f"  마지막 문서 저장됨: {current_doc['metadata'].get('title', 'NO TITLE')}")
-        
+        """===CATEGORY: / ===TITLE: 형식의 텍스트 파일에서 문서 로드"""
+        documents = parse_text_file(file_path)
+        for doc in documents:
+            print(f"    문서 로드: [{doc['metadata']['category']}] {doc['metadata'].get('title', 'NO TITLE')}")
         return documents
     
     def load_from_directory(self, directory: Path) -> List[Dict]:
@@ -175,11 +159,7 @@ class EmbeddingCreator:
             # Supabase 형식에 맞게 변환
             upload_data = []
             for doc in batch:
-                upload_data.append({
-                    'content': doc['content'],
-                    'metadata': doc['metadata'],
-                    'embedding': doc['embedding']
-                })
+                upload_data.append(self._to_row(doc))
             
             try:
                 result = self.supabase.table('documents').insert(upload_data).execute()
@@ -193,12 +173,137 @@ class EmbeddingCreator:
         
         print(f"✅ 총 {total_uploaded}개 문서 업로드 완료")
     
+    def _to_row(self, doc: Dict) -> Dict:
+        """documents 테이블 행 (metadata에 content_hash 포함)"""
+        return {
+            'content': doc['content'],
+            'metadata': {
+                **doc['metadata'],
+                'content_hash': document_hash(doc['content'], doc['metadata'])
+            },
+            'embedding': doc['embedding']
+        }
+    
+    # ===== 증분 동기화 =====
+    def plan_sync(self, documents: List[Dict]) -> Dict[str, List]:
+        """
+        파싱한 문서와 documents 테이블 비교
+        
+        Returns:
+            {
+                "unchanged": [행],
+                "changed": [(행 id, 새 문서)],   # 같은 (카테고리, 제목)인데 내용이 바뀜
+                "added": [새 문서],
+                "removed": [행]
+            }
+        """
+        rows = self.repository.fetch_documents(columns='id, content, metadata')
+        
+        # 해시 → 기존 행 (중복 문서는 목록으로)
+        rows_by_hash: Dict[str, List[Dict]] = {}
+        for row in rows:
+            metadata = row.get('metadata') or {}
+            row_hash = metadata.get('content_hash') or document_hash(row.get('content'), metadata)
+            rows_by_hash.setdefault(row_hash, []).append(row)
+        
+        unchanged = []
+        pending = []
+        for doc in documents:
+            matches = rows_by_hash.get(document_hash(doc['content'], doc['metadata']))
+            if matches:
+                unchanged.append(matches.pop())
+            else:
+                pending.append(doc)
+        
+        # 남은 행을 (카테고리, 제목)으로 묶어서 바뀐 문서는 같은 행을 갱신
+        leftover: Dict[tuple, List[Dict]] = {}
+        for matches in rows_by_hash.values():
+            for row in matches:
+                metadata = row.get('metadata') or {}
+                leftover.setdefault((metadata.get('category'), metadata.get('title')), []).append(row)
+        
+        changed = []
+        added = []
+        for doc in pending:
+            matches = leftover.get((doc['metadata'].get('category'), doc['metadata'].get('title')))
+            if matches:
+                changed.append((matches.pop()['id'], doc))
+            else:
+                added.append(doc)
+        
+        removed = [row for matches in leftover.values() for row in matches]
+        
+        return {
+            "unchanged": unchanged,
+            "changed": changed,
+            "added": added,
+            "removed": removed
+        }
+    
+    def print_sync_plan(self, plan: Dict[str, List]):
+        """변경 내역 요약"""
+        print("\n📋 변경 내역:")
+        print(f"   = 유지: {len(plan['unchanged'])}개")
+        print(f"   ~ 변경: {len(plan['changed'])}개")
+        for _, doc in plan['changed']:
+            print(f"      ~ [{doc['metadata']['category']}] {doc['metadata'].get('title', 'NO TITLE')}")
+        print(f"   + 추가: {len(plan['added'])}개")
+        for doc in plan['added']:
+            print(f"      + [{doc['metadata']['category']}] {doc['metadata'].get('title', 'NO TITLE')}")
+        print(f"   - 삭제: {len(plan['removed'])}개")
+        for row in plan['removed']:
+            metadata = row.get('metadata') or {}
+            print(f"      - [{metadata.get('category')}] {metadata.get('title', 'NO TITLE')}")
+    
+    def apply_sync(self, plan: Dict[str, List]):
+        """바뀐/추가된 문서만 임베딩 → 갱신/추가, 사라진 문서 삭제"""
+        changed_docs = [doc for _, doc in plan['changed']]
+        to_embed = changed_docs + plan['added']
+        
+        if to_embed:
+            self.create_embeddings(to_embed)
+        
+        # 변경: 같은 id로 upsert
+        batch_size = 100
+        for i in range(0, len(plan['changed']), batch_size):
+            batch = plan['changed'][i:i + batch_size]
+            upsert_data = [{'id': row_id, **self._to_row(doc)} for row_id, doc in batch]
+            try:
+                self.supabase.table('documents').upsert(upsert_data).execute()
+                print(f"  ✅ 변경 {i + 1} ~ {i + len(batch)} 갱신 완료")
+            except Exception as e:
+                print(f"  ❌ 변경 배치 {i} 갱신 실패: {e}")
+        
+        # 추가
+        if plan['added']:
+            self.upload_to_supabase(plan['added'], clear_existing=False)
+        
+        # 삭제
+        removed_ids = [row['id'] for row in plan['removed']]
+        for i in range(0, len(removed_ids), batch_size):
+            batch = removed_ids[i:i + batch_size]
+            try:
+                self.supabase.table('documents').delete().in_('id', batch).execute()
+                print(f"  ✅ 삭제 {i + 1} ~ {i + len(batch)} 완료")
+            except Exception as e:
+                print(f"  ❌ 삭제 배치 {i} 실패: {e}")
+    
+    def save_index_artifact(self, directory: Path):
+        """documents 테이블 전체를 임베딩 아티팩트(.npy + 사이드카)로 저장 → 서버가 mmap으로 사용"""
+        print(f"\n💾 임베딩 아티팩트 저장 중: {directory}")
+        try:
+            index = LocalVectorIndex(self.repository.fetch_documents())
+            version = index.save(directory, dtype=settings.vector_index_dtype)
+            print(f"✅ {len(index)}개 문서 저장 완료 (v{version}, {settings.vector_index_dtype})")
+        except Exception as e:
+            print(f"  ❌ 아티팩트 저장 실패: {e}")
+    
     def test_search(self, query: str, k: int = 3):
         """임베딩 검색 테스트"""
         print(f"\n🔍 테스트 검색: '{query}'")
         
-        # 쿼리 임베딩 생성
-        query_embedding = self.model.encode(query).tolist()
+        # 쿼리 임베딩 생성 (서비스와 같은 캐시 사용 → 반복 쿼리는 모델 호출 생략)
+        query_embedding = query_embedding_cache.get_or_compute(query, self.model.encode)
         
         # Supabase에서 검색
         try:
@@ -228,32 +333,22 @@ class EmbeddingCreator:
 
 def main():
     """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="text_data 문서 임베딩 → Supabase documents 동기화")
+    parser.add_argument("--full", action="store_true", help="기존 데이터 전체 삭제 후 재업로드")
+    parser.add_argument("--dry-run", action="store_true", help="변경 내역만 출력 (DB 변경 없음)")
+    parser.add_argument("--skip-test", action="store_true", help="검색 테스트 생략")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("🎯 벡터 임베딩 생성 및 업로드")
     print("=" * 60)
     
+    started = time.perf_counter()
     creator = EmbeddingCreator()
     
     # 데이터 디렉토리
     text_data_dir = Path(__file__).parent / "text_data"
     
-    # 사용자에게 선택 옵션 제공
-    print("\n업로드 모드를 선택하세요:")
-    print("1. 전체 재업로드 (기존 데이터 삭제 후 전체 업로드)")
-    print("2. 증분 업로드 (기존 데이터 유지하고 새 데이터만 추가)")
-    
-    choice = input("\n선택 (1 또는 2): ").strip()
-    
-    if choice == "1":
-        clear_existing = True
-        print("\n✅ 전체 재업로드 모드")
-    elif choice == "2":
-        clear_existing = False
-        print("\n✅ 증분 업로드 모드")
-    else:
-        print("\n❌ 잘못된 선택. 기본값(증분 업로드) 사용")
-        clear_existing = False
-    
     # 1. text_data 디렉토리의 모든 .txt 파일 로드
     print(f"\n📂 {text_data_dir} 디렉토리에서 텍스트 파일 로드 중...")
     text_documents = creator.load_from_directory(text_data_dir)
@@ -283,39 +378,65 @@ def main():
     all_documents = text_documents + db_documents
     print(f"\n📚 최종 총 {len(all_documents)}개 문서")
     
-    # 3. 임베딩 생성
-    documents_with_embeddings = creator.create_embeddings(all_documents)
-    
-    if not documents_with_embeddings:
-        print("\n❌ 임베딩 생성 실패!")
-        return
-    
-    # 4. Supabase에 업로드
-    # clear_existing=True로 설정하면 기존 데이터를 모두 삭제하고 새로 업로드
-    # clear_existing=False로 설정하면 기존 데이터에 추가
-    creator.upload_to_supabase(
-        documents_with_embeddings, 
-        clear_existing=True  # 기존 데이터 삭제 후 업로드
-    )
+    if args.full:
+        # 3. 전체 임베딩 생성 → 기존 데이터 삭제 후 업로드
+        print("\n✅ 전체 재업로드 모드")
+        if args.dry_run:
+            print(f"   (dry-run) {len(all_documents)}개 문서를 다시 임베딩해서 업로드합니다.")
+            return
+        
+        documents_with_embeddings = creator.create_embeddings(all_documents)
+        
+        if not documents_with_embeddings:
+            print("\n❌ 임베딩 생성 실패!")
+            return
+        
+        creator.upload_to_supabase(documents_with_embeddings, clear_existing=True)
+    else:
+        # 3. 증분 동기화: 해시가 같은 문서는 건너뜀
+        print("\n✅ 증분 동기화 모드")
+        plan = creator.plan_sync(all_documents)
+        creator.print_sync_plan(plan)
+        
+        if args.dry_run:
+            print("\n   (dry-run) DB는 변경하지 않았습니다.")
+            return
+        
+        if plan['changed'] or plan['added'] or plan['removed']:
+            creator.apply_sync(plan)
+        else:
+            print("\n✅ 변경된 문서가 없습니다.")
+            if not settings.vector_index_path or LocalVectorIndex.exists(resolve_path(settings.vector_index_path)):
+                return
     
-    # 5. 테스트 검색
-    print("\n" + "=" * 60)
-    print("🧪 검색 테스트")
-    print("=" * 60)
+    # 임베딩 아티팩트 갱신 (설정된 경우)
+    if settings.vector_index_path:
+        creator.save_index_artifact(resolve_path(settings.vector_index_path))
     
-    test_queries = [
-        "광주에서 학교 가는 통학버스 시간 알려줘",
-        "통학버스 예약은 어떻게 해?",
-        "순천 통학버스 노선 알려줘"
-    ]
+    print(f"\n⏱️ 동기화 소요 시간: {time.perf_counter() - started:.1f}s")
     
-    for query in test_queries:
-        creator.test_search(query, k=2)
-        print()
+    # 4. 테스트 검색
+    if not args.skip_test:
+        print("\n" + "=" * 60)
+        print("🧪 검색 테스트")
+        print("=" * 60)
+        
+        test_queries = [
+            "광주에서 학교 가는 통학버스 시간 알려줘",
+            "통학버스 예약은 어떻게 해?",
+            "순천 통학버스 노선 알려줘"
+        ]
+        
+        for query in test_queries:
+            creator.test_search(query, k=2)
+            print()
+        
+        print(f"📈 쿼리 임베딩 캐시: {query_embedding_cache.stats()}")
     
     print("=" * 60)
     print("\n✅ 모든 작업 완료!")
     print(f"\n💡 Supabase 대시보드에서 확인: {settings.supabase_url}")
+    print("💡 서버가 실행 중이면 POST /documents/reload 로 벡터 인덱스와 답변 캐시를 갱신하세요.")
 
 
 if __name__ == "__main__":
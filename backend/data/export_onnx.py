@@ -0,0 +1,170 @@
+"""
+임베딩 모델(ko-sroberta)을 ONNX + int8 동적 양자화로 내보내고 PyTorch와 비교하는 스크립트
+
+사용법:
+    python data/export_onnx.py                  # 내보내기 + 벤치마크
+    python data/export_onnx.py --skip-export    # 이미 내보낸 모델로 벤치마크만
+    python data/export_onnx.py --quantization avx512_vnni
+
+내보낸 뒤 .env 에 EMBEDDING_BACKEND=onnx 를 설정하면 서비스가 ONNX 모델을 사용한다.
+(필요 패키지: pip install -r requirements-onnx.txt, 서비스 실행에도 필요)
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 상위 디렉토리 추가
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.services.embedding_model import resolve_onnx_path
+from app.services.text_documents import load_text_directory
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+
+# 벤치마크용 질문 (자주 들어오는 일반 질문)
+BENCHMARK_QUERIES = [
+    "개강일 언제야?",
+    "1학기 시작일 알려줘",
+    "기말고사 기간이 언제야",
+    "도서관 운영시간 알려줘",
+    "책 몇 권 빌릴 수 있어?",
+    "열람실 24시간이야?",
+    "광주에서 학교 가는 통학버스 시간 알려줘",
+    "통학버스 예약은 어떻게 해?",
+    "학과사무실 전화번호 알려줘",
+    "국가장학금 신청 언제 해?",
+    "성적 장학금 받으려면?",
+    "AI 관련 실험실 있어?",
+    "2025학번 졸업 요건 알려줘",
+    "자료구조 무슨 과목이야?",
+    "교양 과목 추천해줘",
+]
+
+
+def export(output_dir: Path, quantization: str):
+    """ONNX 내보내기 → int8 동적 양자화"""
+    print(f"\n📦 ONNX 내보내기: {settings.embedding_model} → {output_dir}")
+    model = SentenceTransformer(settings.embedding_model, backend="onnx")
+    model.save(str(output_dir))
+    print("✅ ONNX(fp32) 저장 완료")
+
+    print(f"\n🔧 int8 동적 양자화 ({quantization})")
+    export_dynamic_quantized_onnx_model(model, quantization, str(output_dir))
+    print(f"✅ 저장 완료: {output_dir / 'onnx' / f'model_qint8_{quantization}.onnx'}")
+
+
+def measure_latency(model: SentenceTransformer, queries, runs: int):
+    """질문 하나씩 encode (서비스의 요청당 호출과 같은 방식) → ms 목록"""
+    # 워밍업
+    model.encode(queries[0])
+
+    timings = []
+    for _ in range(runs):
+        for query in queries:
+            started = time.perf_counter()
+            model.encode(query)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def top_k(query_embeddings: np.ndarray, doc_embeddings: np.ndarray, k: int) -> np.ndarray:
+    """코사인 유사도 top-k 문서 위치"""
+    q = query_embeddings / np.linalg.norm(query_embeddings, axis=1, keepdims=True)
+    d = doc_embeddings / np.linalg.norm(doc_embeddings, axis=1, keepdims=True)
+    return np.argsort(-(q @ d.T), axis=1)[:, :k]
+
+
+def benchmark(model_dir: Path, onnx_file: str, k: int, runs: int):
+    """PyTorch vs ONNX int8: encode 지연 시간 + top-k 일치율"""
+    print("\n" + "=" * 60)
+    print("🧪 PyTorch vs ONNX 벤치마크")
+    print("=" * 60)
+
+    torch_model = SentenceTransformer(settings.embedding_model)
+    onnx_model = SentenceTransformer(
+        str(model_dir),
+        backend="onnx",
+        model_kwargs={"file_name": onnx_file}
+    )
+
+    # 1. 지연 시간
+    print(f"\n⏱️ encode 지연 시간 (질문 {len(BENCHMARK_QUERIES)}개 x {runs}회)")
+    for name, model in [("torch", torch_model), ("onnx", onnx_model)]:
+        timings = measure_latency(model, BENCHMARK_QUERIES, runs)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"   {name:5s}: 평균 {statistics.mean(timings):6.2f}ms | 중앙값 {statistics.median(timings):6.2f}ms | p95 {p95:6.2f}ms")
+
+    # 2. 임베딩 유사도
+    torch_queries = torch_model.encode(BENCHMARK_QUERIES)
+    onnx_queries = onnx_model.encode(BENCHMARK_QUERIES)
+    cosine = np.sum(torch_queries * onnx_queries, axis=1) / (
+        np.linalg.norm(torch_queries, axis=1) * np.linalg.norm(onnx_queries, axis=1)
+    )
+    print(f"\n📐 질문 임베딩 코사인 유사도 (torch vs onnx): 평균 {cosine.mean():.4f} | 최소 {cosine.min():.4f}")
+
+    # 3. top-k 일치율 (text_data 문서 기준)
+    documents = load_text_directory()
+    contents = [doc['content'] for doc in documents]
+    print(f"\n📚 text_data 문서 {len(contents)}개 임베딩 중...")
+    torch_docs = torch_model.encode(contents, batch_size=32)
+    onnx_docs = onnx_model.encode(contents, batch_size=32)
+
+    # 서비스와 같은 조건: 문서는 DB에 저장된(torch) 임베딩, 질문만 onnx
+    reference = top_k(torch_queries, torch_docs, k)
+    mixed = top_k(onnx_queries, torch_docs, k)
+    full_onnx = top_k(onnx_queries, onnx_docs, k)
+
+    def agreement(a: np.ndarray, b: np.ndarray) -> float:
+        return float(np.mean([len(set(x) & set(y)) / k for x, y in zip(a, b)]))
+
+    def top1(a: np.ndarray, b: np.ndarray) -> float:
+        return float(np.mean(a[:, 0] == b[:, 0]))
+
+    print(f"\n🎯 top-{k} 일치율 (torch 기준)")
+    print(f"   onnx 질문 + torch 문서: top-{k} {agreement(reference, mixed):.1%} | top-1 {top1(reference, mixed):.1%}")
+    print(f"   onnx 질문 + onnx 문서 : top-{k} {agreement(reference, full_onnx):.1%} | top-1 {top1(reference, full_onnx):.1%}")
+
+
+def main():
+    """메인 실행 함수"""
+    parser = argparse.ArgumentParser(description="임베딩 모델 ONNX int8 내보내기 + 벤치마크")
+    parser.add_argument("--output", default=str(resolve_onnx_path()), help="내보낼 디렉토리")
+    parser.add_argument("--quantization", default="avx2", choices=["arm64", "avx2", "avx512", "avx512_vnni"])
+    parser.add_argument("--skip-export", action="store_true", help="내보내기 생략 (벤치마크만)")
+    parser.add_argument("--k", type=int, default=3, help="top-k 일치율의 k")
+    parser.add_argument("--runs", type=int, default=5, help="지연 시간 측정 반복 횟수")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output)
+    onnx_file = f"onnx/model_qint8_{args.quantization}.onnx"
+
+    print("=" * 60)
+    print("🎯 임베딩 모델 ONNX 내보내기")
+    print("=" * 60)
+
+    if not args.skip_export:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        export(output_dir, args.quantization)
+
+    if not (output_dir / onnx_file).exists():
+        print(f"\n❌ ONNX 모델이 없습니다: {output_dir / onnx_file}")
+        return
+
+    benchmark(output_dir, onnx_file, args.k, args.runs)
+
+    print("\n" + "=" * 60)
+    print("✅ 완료!")
+    print("\n💡 서비스에서 사용하려면 .env 에 다음을 추가하세요:")
+    print("   EMBEDDING_BACKEND=onnx")
+    print(f"   EMBEDDING_ONNX_PATH={output_dir}")
+    print(f"   EMBEDDING_ONNX_FILE={onnx_file}")
+
+
+if __name__ == "__main__":
+    main()
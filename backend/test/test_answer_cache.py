@@ -0,0 +1,52 @@
+"""
+시맨틱 답변 캐시 테스트
+(모델/DB 없이 실행: python -m pytest test/test_answer_cache.py)
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.answer_cache import SemanticAnswerCache, numeric_tokens
+
+
+# 숫자만 다른 질문은 ko-sroberta에서 거의 같은 임베딩 → 같은 벡터로 가정
+SAME_EMBEDDING = [0.6, 0.8, 0.0]
+
+
+def build_cache():
+    return SemanticAnswerCache(max_size=10, ttl_seconds=0, threshold=0.92)
+
+
+def test_numeric_tokens():
+    assert numeric_tokens("2024학번 1학기 개강일") == ("1", "2024")
+    assert numeric_tokens("1학기 2024학번") == ("1", "2024")
+    assert numeric_tokens("03학번") == ("3",)
+    assert numeric_tokens("도서관 운영시간") == ()
+
+
+def test_similar_question_without_numbers_hits():
+    cache = build_cache()
+    cache.store(SAME_EMBEDDING, "개강 언제야?", {"message": "3월 2일이에요", "sources": []})
+
+    hit = cache.lookup([0.61, 0.79, 0.01], "개강일 알려줘")
+    assert hit is not None
+    assert hit["message"] == "3월 2일이에요"
+
+
+def test_different_semester_does_not_hit():
+    cache = build_cache()
+    cache.store(SAME_EMBEDDING, "1학기 개강일", {"message": "1학기는 3월 2일", "sources": []})
+
+    assert cache.lookup(SAME_EMBEDDING, "2학기 개강일") is None
+    assert cache.lookup(SAME_EMBEDDING, "1학기 개강일")["message"] == "1학기는 3월 2일"
+
+
+def test_different_admission_year_picks_matching_entry():
+    cache = build_cache()
+    cache.store(SAME_EMBEDDING, "2023학번 졸업학점", {"message": "2023: 130학점", "sources": []})
+    cache.store(SAME_EMBEDDING, "2024학번 졸업학점", {"message": "2024: 120학점", "sources": []})
+
+    assert cache.lookup(SAME_EMBEDDING, "2024학번 졸업학점")["message"] == "2024: 120학점"
+    assert cache.lookup(SAME_EMBEDDING, "2023학번 졸업학점")["message"] == "2023: 130학점"
+    assert cache.lookup(SAME_EMBEDDING, "2025학번 졸업학점") is None
@@ -0,0 +1,68 @@
+"""
+BM25 토크나이저 / 검색 / RRF 결합 테스트
+(모델/DB 없이 실행: python -m pytest test/test_bm25_index.py)
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.bm25_index import BM25Index, fuse_results, tokenize
+
+
+def _doc(title, content, category="일반"):
+    return {"id": title, "content": content, "metadata": {"category": category, "title": title}}
+
+
+def test_tokenize_mixed_korean_english():
+    # 한글은 글자 bigram, 영문/숫자는 소문자 단어
+    assert tokenize("AI 실험실") == ["ai", "실험", "험실"]
+    assert tokenize("C언어 CS0614") == ["c", "언어", "cs0614"]
+    assert tokenize("061-750-3114") == ["061", "750", "3114"]
+    # 한 글자 한글은 그대로, 기호는 버림
+    assert tokenize("책 / HCI!") == ["책", "hci"]
+    assert tokenize("") == []
+
+
+def test_search_ranks_keyword_match_first():
+    index = BM25Index([
+        _doc("학과사무실", "학과사무실 전화번호는 061-750-3620 입니다", "연락처"),
+        _doc("도서관", "중앙도서관 운영시간은 09시부터 22시까지", "시설"),
+        _doc("통학버스", "광주 노선 통학버스는 07시 30분 출발", "통학버스"),
+    ])
+
+    results = index.search("도서관 운영시간", k=2)
+    assert results[0]["metadata"]["title"] == "도서관"
+    assert results[0]["similarity"] == 1.0
+
+    # 카테고리 제한
+    results = index.search("도서관 운영시간", categories=["연락처"])
+    assert all(r["metadata"]["category"] == "연락처" for r in results)
+
+    assert index.search("없는단어zzz") == []
+
+
+def test_fuse_results_order_and_dedup():
+    a = _doc("A", "a")
+    b = _doc("B", "b")
+    c = _doc("C", "c")
+    d = _doc("D", "d")
+
+    vector = [dict(a, similarity=0.9), dict(b, similarity=0.8), dict(c, similarity=0.7)]
+    lexical = [dict(b, bm25_score=5.0), dict(d, bm25_score=3.0), dict(a, bm25_score=1.0)]
+
+    fused = fuse_results([vector, lexical], k=4)
+    titles = [r["metadata"]["title"] for r in fused]
+
+    # B: 1/62 + 1/61, A: 1/61 + 1/63, C: 1/63, D: 1/62
+    assert titles == ["B", "A", "D", "C"]
+
+    # 같은 문서는 한 번만, 먼저 나온 목록의 필드 유지 + fused_score 추가
+    assert len(set(titles)) == len(titles)
+    b_result = fused[0]
+    assert b_result["similarity"] == 0.8
+    assert "bm25_score" not in b_result
+    assert abs(b_result["fused_score"] - (1 / 62 + 1 / 61)) < 1e-12
+
+    assert len(fuse_results([vector, lexical], k=2)) == 2
+    assert fuse_results([[], []]) == []
@@ -0,0 +1,79 @@
+"""
+과목명 인메모리 검색 인덱스 테스트
+(DB 없이 실행: python -m pytest test/test_course_name_index.py)
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.course_name_index import CourseNameIndex
+
+
+ROWS = [
+    {"course_code": "CS0603", "course_name": "자료구조"},
+    {"course_code": "CS0620", "course_name": "데이터베이스"},
+    {"course_code": "CS0621", "course_name": "데이터베이스설계"},
+    {"course_code": "CS0700", "course_name": "인공지능개론"},
+    {"course_code": "CS0701", "course_name": "컴퓨터 그래픽스"},
+    {"course_code": "CS0702", "course_name": "HCI"},
+]
+
+
+def build_index():
+    return CourseNameIndex(ROWS)
+
+
+def test_exact_match_ignores_spaces_and_case():
+    index = build_index()
+
+    row, score = index.search("자료 구조")
+    assert row["course_code"] == "CS0603"
+    assert score == 1.0
+
+    row, score = index.search("컴퓨터그래픽스")
+    assert row["course_code"] == "CS0701"
+
+    row, score = index.search("hci")
+    assert row["course_code"] == "CS0702"
+    assert score == 1.0
+
+
+def test_partial_match_prefers_shortest_containing_name():
+    index = build_index()
+
+    # "데이터베이스"는 두 과목명에 포함 → 정확 일치가 우선
+    row, score = index.search("데이터베이스")
+    assert row["course_code"] == "CS0620"
+
+    # 검색어 길이 / 과목명 길이 = 4 / 6 ≥ 0.6
+    row, score = index.search("인공지능")
+    assert row["course_code"] == "CS0700"
+    assert abs(score - 4 / 6) < 1e-9
+
+
+def test_partial_match_below_threshold_is_rejected():
+    index = build_index()
+
+    # "베이스" 3 / 6 = 0.5 < 0.6 이고 오타 보정 점수도 낮음
+    assert index.search("베이스") is None
+
+
+def test_typo_match():
+    index = build_index()
+
+    # 편집 거리 1 / 6 → 0.833 ≥ 0.75
+    row, score = index.search("데이타베이스")
+    assert row["course_code"] == "CS0620"
+    assert 0.75 <= score < 1.0
+
+    row, score = index.search("자료구종")
+    assert row["course_code"] == "CS0603"
+
+
+def test_no_match():
+    index = build_index()
+
+    assert index.search("운영체제") is None
+    assert index.search("자") is None  # 한 글자는 검색 안 함
+    assert index.search("") is None
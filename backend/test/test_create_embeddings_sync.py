@@ -0,0 +1,141 @@
+"""
+create_embeddings.py 증분 동기화 테스트
+
+plan_sync가 유지/변경/추가/삭제를 올바르게 나누는지, --dry-run이 DB를 건드리지 않는지 확인
+(Supabase/모델 없이 가짜 객체로 실행: python -m pytest test/test_create_embeddings_sync.py)
+"""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / "data"))
+
+import create_embeddings
+from app.services.text_documents import document_hash
+
+
+class FakeQuery:
+    """supabase 테이블 쿼리 기록용"""
+
+    def __init__(self, log, table):
+        self.log = log
+        self.table = table
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            if method != 'execute':
+                self.log.append((self.table, method, args))
+            return self if method != 'execute' else SimpleNamespace(data=[])
+        return call
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.log = []
+
+    def table(self, name):
+        return FakeQuery(self.log, name)
+
+    @property
+    def writes(self):
+        return [entry for entry in self.log if entry[1] in ('insert', 'upsert', 'update', 'delete')]
+
+
+class FakeModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        return np.zeros((len(texts), 3), dtype=np.float32)
+
+
+def _doc(category, title, content):
+    return {'content': content, 'metadata': {'category': category, 'title': title}}
+
+
+def _row(row_id, doc, with_hash=True):
+    metadata = dict(doc['metadata'])
+    if with_hash:
+        metadata['content_hash'] = document_hash(doc['content'], doc['metadata'])
+    return {'id': row_id, 'content': doc['content'], 'metadata': metadata}
+
+
+KEEP = _doc('시설', '도서관', '운영시간 09~22시')
+KEEP_OLD_ROW = _doc('연락처', '학과사무실', '061-750-3620')   # content_hash 없는 예전 행
+CHANGED_OLD = _doc('통학버스', '광주 노선', '07:30 출발')
+CHANGED_NEW = _doc('통학버스', '광주 노선', '07:40 출발')
+ADDED = _doc('장학금', '성적장학금', '평점 4.0 이상')
+REMOVED = _doc('학사일정', '폐지된 일정', '더 이상 없음')
+
+ROWS = [
+    _row(1, KEEP),
+    _row(2, KEEP_OLD_ROW, with_hash=False),
+    _row(3, CHANGED_OLD),
+    _row(4, REMOVED),
+]
+DOCUMENTS = [KEEP, KEEP_OLD_ROW, CHANGED_NEW, ADDED]
+
+
+def build_creator(rows=ROWS):
+    creator = create_embeddings.EmbeddingCreator.__new__(create_embeddings.EmbeddingCreator)
+    creator.supabase = FakeSupabase()
+    creator.repository = SimpleNamespace(fetch_documents=lambda columns=None: [dict(r) for r in rows])
+    creator._model = FakeModel()
+    return creator
+
+
+def test_plan_sync_classifies_documents():
+    plan = build_creator().plan_sync([dict(d) for d in DOCUMENTS])
+
+    assert sorted(row['id'] for row in plan['unchanged']) == [1, 2]
+    assert [(row_id, doc['content']) for row_id, doc in plan['changed']] == [(3, '07:40 출발')]
+    assert [doc['metadata']['title'] for doc in plan['added']] == ['성적장학금']
+    assert [row['id'] for row in plan['removed']] == [4]
+
+
+def test_plan_sync_nothing_changed():
+    plan = build_creator().plan_sync([KEEP, KEEP_OLD_ROW, CHANGED_OLD, REMOVED])
+
+    assert len(plan['unchanged']) == 4
+    assert plan['changed'] == [] and plan['added'] == [] and plan['removed'] == []
+
+
+def test_apply_sync_writes_only_the_diff():
+    creator = build_creator()
+    plan = creator.plan_sync([dict(d) for d in DOCUMENTS])
+    creator.apply_sync(plan)
+
+    # 바뀐/추가된 문서만 임베딩
+    assert creator._model.encoded == ['07:40 출발', '평점 4.0 이상']
+
+    writes = creator.supabase.writes
+    upserts = [args[0] for table, method, args in writes if method == 'upsert']
+    inserts = [args[0] for table, method, args in writes if method == 'insert']
+    deletes = [entry for entry in writes if entry[1] == 'delete']
+    assert [row['id'] for row in upserts[0]] == [3]
+    assert [row['content'] for row in inserts[0]] == ['평점 4.0 이상']
+    assert len(deletes) == 1
+    assert ('documents', 'in_', ('id', [4])) in creator.supabase.log
+
+
+def test_dry_run_performs_no_writes(monkeypatch, tmp_path):
+    creator = build_creator()
+    creator._model = None
+    monkeypatch.setattr(create_embeddings, 'EmbeddingCreator', lambda: creator)
+    monkeypatch.setattr(creator, 'load_from_directory', lambda directory: [dict(d) for d in DOCUMENTS], raising=False)
+    monkeypatch.setattr(creator, 'load_from_db_tables', lambda: [], raising=False)
+
+    saved = []
+    monkeypatch.setattr(creator, 'save_index_artifact', lambda directory: saved.append(directory), raising=False)
+
+    for flags in (['--dry-run'], ['--dry-run', '--full']):
+        monkeypatch.setattr(sys, 'argv', ['create_embeddings.py', *flags])
+        create_embeddings.main()
+
+    assert creator.supabase.writes == []
+    assert creator._model is None  # 임베딩 모델도 로드하지 않음
+    assert saved == []
@@ -0,0 +1,81 @@
+"""
+학번별 교육과정 스냅샷 캐시 테스트 (로딩 실패 시 재시도 간격)
+(DB 없이 실행: python -m pytest test/test_curriculum_cache.py)
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services import curriculum_cache as cache_module
+from app.services.curriculum_cache import CurriculumCache
+
+
+class FlakyRepository:
+    """fail=True 동안 조회 실패하는 가짜 저장소"""
+
+    def __init__(self):
+        self.fail = True
+        self.calls = 0
+
+    def fetch_curriculums(self, admission_year):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("supabase down")
+        return [{"course_code": "CS0603", "course_name": "자료구조"}]
+
+    def fetch_graduation_requirements(self, admission_year):
+        return [{"requirement_type": "총졸업학점", "course_area": "전체", "required_credits": 130}]
+
+
+def test_failed_load_is_not_retried_until_backoff_expires(monkeypatch):
+    repo = FlakyRepository()
+    monkeypatch.setattr(cache_module, "repository", repo)
+    cache = CurriculumCache(ttl_seconds=0)
+
+    # 실패 → 빈 스냅샷, 재시도 간격 안에서는 DB를 다시 조회하지 않음
+    for _ in range(5):
+        snapshot = cache.get_snapshot(2024)
+        assert snapshot.version < 0
+        assert snapshot.curriculums == []
+    assert repo.calls == 1
+
+    # DB가 복구돼도 재시도 간격 안에서는 빈 스냅샷 유지
+    repo.fail = False
+    assert cache.get_snapshot(2024).version < 0
+    assert repo.calls == 1
+
+    # 재시도 간격이 지나면 다시 로드
+    monkeypatch.setattr(cache_module, "LOAD_RETRY_SECONDS", 0)
+    snapshot = cache.get_snapshot(2024)
+    assert snapshot.version > 0
+    assert snapshot.get_course("CS0603")["course_name"] == "자료구조"
+    assert repo.calls == 2
+
+    # 성공한 스냅샷은 TTL 동안 캐시
+    assert cache.get_snapshot(2024) is snapshot
+    assert repo.calls == 2
+
+
+def test_failed_snapshot_not_reported_as_cached(monkeypatch):
+    repo = FlakyRepository()
+    monkeypatch.setattr(cache_module, "repository", repo)
+    cache = CurriculumCache(ttl_seconds=0)
+
+    cache.get_snapshot(2023)
+    repo.fail = False
+    cache.get_snapshot(2024)
+
+    assert cache.refresh(2025)["cached_years"] == [2024]
+
+
+def test_backoff_is_per_year(monkeypatch):
+    repo = FlakyRepository()
+    monkeypatch.setattr(cache_module, "repository", repo)
+    cache = CurriculumCache(ttl_seconds=0)
+
+    assert cache.get_snapshot(2023).version < 0
+    repo.fail = False
+    assert cache.get_snapshot(2024).version > 0
+    assert cache.get_snapshot(2023).version < 0
+    assert repo.calls == 2
@@ -0,0 +1,47 @@
+"""
+쿼리 임베딩 LRU 캐시 테스트
+(모델/DB 없이 실행: python -m pytest test/test_embedding_cache.py)
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.embedding_cache import QueryEmbeddingCache
+
+
+class RecordingEncoder:
+    """encode에 넘어온 문자열을 기록하는 가짜 모델"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return [float(len(text)), float(sum(map(ord, text)) % 97)]
+
+
+def test_encodes_original_query_not_cache_key():
+    cache = QueryEmbeddingCache(max_size=10, ttl_seconds=0)
+    encoder = RecordingEncoder()
+
+    cache.get_or_compute("  AR/VR   수업 알려줘 ", encoder, model_name="m")
+
+    # 정규화된 키가 아니라 원문 그대로 encode
+    assert encoder.calls == ["  AR/VR   수업 알려줘 "]
+
+
+def test_whitespace_variants_hit_but_case_variants_do_not():
+    cache = QueryEmbeddingCache(max_size=10, ttl_seconds=0)
+    encoder = RecordingEncoder()
+
+    first = cache.get_or_compute("HCI 과목", encoder, model_name="m")
+    again = cache.get_or_compute("  HCI   과목 ", encoder, model_name="m")
+    assert again == first
+    assert len(encoder.calls) == 1
+
+    # 대소문자가 다르면 모델 결과도 다를 수 있으므로 따로 계산
+    cache.get_or_compute("hci 과목", encoder, model_name="m")
+    assert encoder.calls[-1] == "hci 과목"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
@@ -164,6 +164,18 @@ CHAIN_TESTS = [
         ),
         "expected": "[CS0116, CS0612, CS0863]"
     },
+    
+    # 14. 그래프 재로딩 후에도 체인 유지
+    {
+        "id": 15,
+        "name": "그래프 재로딩 (reload)",
+        "test_func": lambda: (
+            equivalent_course_service.reload(),
+            equivalent_course_service.is_equivalent("CS0612", "CS0116")
+        ),
+        "evaluation": lambda result: result[0]['mappings'] > 0 and result[1] == True,
+        "expected": "재로딩 후 CS0612 = CS0116"
+    },
 ]
 
 
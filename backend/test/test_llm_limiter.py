@@ -0,0 +1,122 @@
+"""
+LLM 호출 동시성 제한 테스트
+(OpenAI 없이 가짜 코루틴으로 실행: python -m pytest test/test_llm_limiter.py)
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.llm_limiter import LLMLimiter, LLMOverloadedError, LLMTimeoutError
+
+
+def build_limiter(**kwargs):
+    options = dict(max_concurrency=1, max_queue=1, queue_timeout=1, call_timeout=1, retry_after=7)
+    options.update(kwargs)
+    return LLMLimiter(**options)
+
+
+async def _answer(value, delay=0.0):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def _tokens(count, delay=0.0):
+    for i in range(count):
+        await asyncio.sleep(delay)
+        yield i
+
+
+def test_run_returns_result_and_releases_slot():
+    limiter = build_limiter()
+
+    async def scenario():
+        assert await limiter.run(lambda: _answer("ok")) == "ok"
+        assert await limiter.run(lambda: _answer("again")) == "again"
+
+    asyncio.run(scenario())
+    stats = limiter.stats()
+    assert stats["active"] == 0 and stats["waiting"] == 0
+    assert stats["completed"] == 2
+
+
+def test_queue_full_is_rejected_immediately():
+    limiter = build_limiter(max_queue=1)
+
+    async def scenario():
+        release = asyncio.Event()
+        running = asyncio.create_task(limiter.run(release.wait))   # 실행 중 1
+        queued = asyncio.create_task(limiter.run(lambda: _answer("queued")))   # 대기 1
+        await asyncio.sleep(0.01)
+        assert limiter.is_saturated()
+
+        with pytest.raises(LLMOverloadedError) as exc_info:
+            await limiter.run(lambda: _answer("rejected"))
+        assert exc_info.value.retry_after == 7
+
+        release.set()
+        await running
+        assert await queued == "queued"
+
+    asyncio.run(scenario())
+    assert limiter.stats()["rejected"] == 1
+    assert limiter.active == 0 and limiter.waiting == 0
+
+
+def test_queue_timeout_is_rejected():
+    limiter = build_limiter(queue_timeout=0.05)
+
+    async def scenario():
+        release = asyncio.Event()
+        running = asyncio.create_task(limiter.run(release.wait))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(LLMOverloadedError):
+            await limiter.run(lambda: _answer("late"))
+        assert limiter.waiting == 0
+
+        release.set()
+        await running
+
+    asyncio.run(scenario())
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_call_timeout_raises_and_releases_slot():
+    limiter = build_limiter(call_timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(LLMTimeoutError):
+            await limiter.run(lambda: _answer("slow", delay=1))
+        # 자리가 반환되어 다음 호출이 바로 실행됨
+        assert await limiter.run(lambda: _answer("fast")) == "fast"
+
+        with pytest.raises(LLMTimeoutError):
+            async for _ in limiter.stream(lambda: _tokens(100, delay=0.02)):
+                pass
+
+    asyncio.run(scenario())
+    assert limiter.stats()["timeouts"] == 2
+    assert limiter.active == 0
+
+
+def test_stream_closed_early_releases_slot():
+    limiter = build_limiter(queue_timeout=0.1)
+
+    async def scenario():
+        stream = limiter.stream(lambda: _tokens(10))
+        assert await stream.__anext__() == 0
+        assert limiter.active == 1
+
+        # 클라이언트 연결이 끊겨 스트림을 중간에 닫은 경우
+        await stream.aclose()
+        assert limiter.active == 0
+
+        # 자리가 반환되지 않았다면 대기 시간 초과로 거절됨
+        assert [t async for t in limiter.stream(lambda: _tokens(3))] == [0, 1, 2]
+
+    asyncio.run(scenario())
+    assert limiter.stats()["completed"] == 2
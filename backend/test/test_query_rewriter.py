@@ -0,0 +1,40 @@
+"""
+멀티턴 쿼리 재구성 판단(needs_rewrite) 테스트
+(모델/DB 없이 실행: python -m pytest test/test_query_rewriter.py)
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.query_rewriter import needs_rewrite
+
+
+@pytest.mark.parametrize("message", [
+    "거기 운영시간은?",
+    "그 과목 학점은?",
+    "그거 언제까지 신청해?",
+    "여기서 제일 가까운 정류장은?",
+    "나머지는 몇 학점이야?",
+    "그럼 2학기는?",
+    "또 뭐 있어?",
+    "과목코드 어떻게 돼?",
+    "다른 건?",
+])
+def test_needs_rewrite(message):
+    assert needs_rewrite(message)
+
+
+@pytest.mark.parametrize("message", [
+    "다른 학과 전공도 졸업학점으로 인정되나요?",
+    "또는 복수전공 신청 방법 알려줘",
+    "도서관 운영시간 알려줘",
+    "컴퓨터공학과 사무실 위치가 어디예요?",
+    "교환학생 다녀와서 그리고 휴학하면 등록금은 어떻게 되나요?",
+    "CS0614 선수과목 알려줘",
+    "장학금 종류",
+])
+def test_does_not_need_rewrite(message):
+    assert not needs_rewrite(message)
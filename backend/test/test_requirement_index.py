@@ -0,0 +1,131 @@
+"""
+졸업요건 매칭 인덱스 테스트
+
+RequirementIndex의 매칭 결과가 이전 방식(요건 목록 순차 탐색 + is_equivalent)과 같은지 확인
+(DB 없이 실행: python -m pytest test/test_requirement_index.py)
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.requirement_index import RequirementIndex
+
+
+# 동일대체: 구 코드 → 체인의 최종 코드
+CANONICAL = {
+    "OLD01": "CS0601",
+    "OLD02": "CS0603",
+    "OLD03": "XG0101",
+}
+
+
+def canonical_id(code):
+    return CANONICAL.get(code, code)
+
+
+def _info(required_all=(), required_one_of=(), selectable=()):
+    return {
+        'required': 9,
+        'required_all': list(required_all),
+        'required_one_of': list(required_one_of),
+        'selectable_codes': list(selectable),
+    }
+
+
+MAJOR = {
+    # CS0603은 전공필수와 전공선택 양쪽에 있음
+    '전공필수': _info(required_all=["CS0601", "CS0603"], selectable=["CS0610"]),
+    '전공선택': _info(selectable=["CS0603", "CS0700", "CS0701"]),
+}
+
+# 트랙 순서가 우선순위 (XG0101은 기초와 핵심-인문학 양쪽, XG0300은 택1과 선택 양쪽)
+LIBERAL_ARTS = {
+    '기초': _info(required_all=["XG0101"], selectable=["XG0102"]),
+    '핵심-인문학': _info(required_one_of=["XG0101", "XG0300"], selectable=["XG0201"]),
+    '심화교양': _info(selectable=["XG0300", "XG0400"]),
+}
+
+ALL_CODES = [
+    "CS0601", "CS0603", "CS0610", "CS0700", "CS0701", "CS9999",
+    "OLD01", "OLD02", "OLD03",
+    "XG0101", "XG0102", "XG0201", "XG0300", "XG0400", "XG9999",
+]
+
+
+def _is_equivalent(a, b):
+    return canonical_id(a) == canonical_id(b)
+
+
+# ===== 이전 방식 (순차 탐색) =====
+
+def legacy_match_major(course_code, requirement_type):
+    req_info = MAJOR.get(requirement_type)
+    if req_info is None:
+        return None
+    for code in req_info['required_all']:
+        if _is_equivalent(course_code, code):
+            return ('전공', requirement_type, 'required_all')
+    for code in req_info['selectable_codes']:
+        if _is_equivalent(course_code, code):
+            return ('전공', requirement_type, 'selectable')
+    return None
+
+
+def legacy_match_liberal_arts(course_code):
+    for track, info in LIBERAL_ARTS.items():
+        groups = [
+            ('required_all', info['required_all']),
+            ('required_one_of', info['required_one_of']),
+            ('selectable', info['selectable_codes']),
+        ]
+        for kind, codes in groups:
+            for code in codes:
+                if _is_equivalent(course_code, code):
+                    return ('교양', track, kind)
+    return None
+
+
+def build_index():
+    return RequirementIndex(2024, 130, MAJOR, LIBERAL_ARTS, canonical_id)
+
+
+# ===== 테스트 =====
+
+def test_match_major_equals_legacy_scan():
+    index = build_index()
+    for code in ALL_CODES:
+        for req_type in ('전공필수', '전공선택', '없는요건'):
+            assert index.match_major(code, req_type) == legacy_match_major(code, req_type), (code, req_type)
+
+
+def test_match_liberal_arts_equals_legacy_scan():
+    index = build_index()
+    for code in ALL_CODES:
+        assert index.match_liberal_arts(code) == legacy_match_liberal_arts(code), code
+
+
+def test_duplicate_area_priority():
+    index = build_index()
+
+    # 전공필수 안에서는 필수 매칭이 선택보다 먼저
+    assert index.match_major("CS0603", '전공필수') == ('전공', '전공필수', 'required_all')
+    # 같은 과목이 전공선택에도 있으면 그 요건 타입으로 물었을 때만 매칭
+    assert index.match_major("CS0603", '전공선택') == ('전공', '전공선택', 'selectable')
+
+    # 교양은 트랙 순서상 첫 번째 (기초 > 핵심-인문학), 구 코드도 같은 결과
+    assert index.match_liberal_arts("XG0101") == ('교양', '기초', 'required_all')
+    assert index.match_liberal_arts("OLD03") == ('교양', '기초', 'required_all')
+    assert index.match_liberal_arts("XG0300") == ('교양', '핵심-인문학', 'required_one_of')
+
+
+def test_new_state_is_fresh_copy():
+    index = build_index()
+    major, liberal_arts = index.new_state()
+    major['전공필수']['taken'] = 3
+    major['전공필수']['taken_courses'].append("CS0601")
+
+    major_again, _ = index.new_state()
+    assert major_again['전공필수']['taken'] == 0
+    assert major_again['전공필수']['taken_courses'] == []
+    assert liberal_arts['기초']['remaining'] == 9
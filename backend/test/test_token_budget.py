@@ -0,0 +1,89 @@
+"""
+프롬프트 토큰 예산 테스트
+(tiktoken 없이 글자 수 카운터로 실행: python -m pytest test/test_token_budget.py)
+"""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.token_budget import MESSAGE_OVERHEAD_TOKENS, budget_prompt
+
+
+class CharCounter:
+    """글자 수 = 토큰 수로 세는 가짜 카운터"""
+
+    def count(self, text):
+        return len(text or "")
+
+    def count_message(self, content):
+        return self.count(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+COUNTER = CharCounter()
+SYSTEM = "s" * 50
+CONTEXT = "c" * 100
+MESSAGE = "질문" * 5
+
+
+def _history(turns):
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"질문{i} " + "q" * 20})
+        history.append({"role": "assistant", "content": f"답변{i} " + "a" * 40})
+    return history
+
+
+def test_everything_fits():
+    history = _history(2)
+    kept, usage = budget_prompt(SYSTEM, CONTEXT, history, MESSAGE, 10_000, COUNTER)
+
+    assert kept == history
+    assert usage["history_dropped"] == 0
+    assert usage["prompt_tokens"] == (
+        COUNTER.count_message(SYSTEM) + len(CONTEXT)
+        + sum(COUNTER.count_message(m["content"]) for m in history)
+        + COUNTER.count_message(MESSAGE)
+    )
+
+
+def test_oldest_turns_dropped_first_and_stays_under_budget():
+    history = _history(10)
+    budget = 400
+
+    kept, usage = budget_prompt(SYSTEM, CONTEXT, history, MESSAGE, budget, COUNTER)
+
+    # 남은 대화는 원래 대화의 가장 최근 부분 (순서 유지)
+    assert 0 < len(kept) < len(history)
+    assert kept == history[-len(kept):]
+    assert kept[0]["role"] == "user"
+    assert kept[-1]["content"].startswith("답변9")
+
+    assert usage["prompt_tokens"] <= budget
+    assert usage["history_dropped"] == len(history) - len(kept)
+
+    # 예산이 늘면 더 오래된 대화까지 포함
+    more, _ = budget_prompt(SYSTEM, CONTEXT, history, MESSAGE, budget + 200, COUNTER)
+    assert len(more) > len(kept)
+    assert more[-len(kept):] == kept
+
+
+def test_drops_leading_assistant_message():
+    history = _history(3)
+    # 마지막 답변 + 질문 하나 + 답변 하나 정도만 들어가는 예산
+    fixed = COUNTER.count_message(SYSTEM) + len(CONTEXT) + COUNTER.count_message(MESSAGE)
+    last_two = sum(COUNTER.count_message(m["content"]) for m in history[-2:])
+    extra_assistant = COUNTER.count_message(history[-3]["content"])
+
+    kept, usage = budget_prompt(SYSTEM, CONTEXT, history, MESSAGE, fixed + last_two + extra_assistant, COUNTER)
+
+    assert kept == history[-2:]
+    assert usage["prompt_tokens"] == fixed + last_two
+
+
+def test_fixed_parts_over_budget_keeps_no_history():
+    kept, usage = budget_prompt(SYSTEM, CONTEXT, _history(3), MESSAGE, 10, COUNTER)
+
+    assert kept == []
+    assert usage["history_tokens"] == 0
+    assert usage["history_dropped"] == 6
@@ -0,0 +1,134 @@
+"""
+인프로세스 벡터 인덱스 테스트 (카테고리/필터 검색, 아티팩트 저장/로드)
+(DB/모델 없이 실행: python -m pytest test/test_vector_index.py)
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services import vector_index as vector_index_module
+from app.services.vector_index import LocalVectorIndex
+
+
+CATEGORIES = ["시설", "연락처", "장학금"]
+
+
+def build_rows(count=30, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(count):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        rows.append({
+            "id": i,
+            "content": f"문서 {i}",
+            "metadata": {"category": category, "title": f"{category}-{i}", "tags": ["공지"] if i % 5 == 0 else []},
+            "embedding": rng.normal(size=dim).tolist()
+        })
+    return rows
+
+
+def reference_top_k(rows, query, k, keep=lambda row: True):
+    """정규화 후 전체 내적으로 계산한 기대 결과"""
+    query = np.asarray(query, dtype=np.float64)
+    query /= np.linalg.norm(query)
+    scored = []
+    for row in rows:
+        if not keep(row):
+            continue
+        vector = np.asarray(row["embedding"], dtype=np.float64)
+        scored.append((float(vector @ query / np.linalg.norm(vector)), row["id"]))
+    scored.sort(key=lambda pair: -pair[0])
+    return [row_id for _, row_id in scored[:k]]
+
+
+def test_search_matches_brute_force():
+    rows = build_rows()
+    index = LocalVectorIndex(rows)
+    query = rows[4]["embedding"]
+
+    results = index.search(query, k=5)
+    assert [r["id"] for r in results] == reference_top_k(rows, query, 5)
+    assert results[0]["id"] == 4
+    assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-5)
+    assert results[0]["content"] == "문서 4"
+
+
+def test_category_and_filter_search():
+    rows = build_rows()
+    index = LocalVectorIndex(rows)
+    query = rows[7]["embedding"]
+
+    results = index.search(query, k=4, categories=["연락처"])
+    assert all(r["metadata"]["category"] == "연락처" for r in results)
+    assert [r["id"] for r in results] == reference_top_k(
+        rows, query, 4, keep=lambda row: row["metadata"]["category"] == "연락처"
+    )
+
+    # 여러 카테고리 + metadata @> filter (배열 원소 포함)
+    results = index.search(query, k=10, categories=["시설", "장학금"], filter_json={"tags": ["공지"]})
+    expected = reference_top_k(
+        rows, query, 10,
+        keep=lambda row: row["metadata"]["category"] in ("시설", "장학금") and "공지" in row["metadata"]["tags"]
+    )
+    assert [r["id"] for r in results] == expected
+
+    assert index.search(query, k=3, categories=["없는카테고리"]) == []
+    assert index.search(query, k=3, filter_json={"category": "없음"}) == []
+
+
+@pytest.mark.parametrize("dtype", ["float16", "float32"])
+def test_save_and_load_round_trip(tmp_path, dtype):
+    rows = build_rows()
+    index = LocalVectorIndex(rows)
+    version = index.save(str(tmp_path), dtype=dtype)
+
+    assert LocalVectorIndex.exists(str(tmp_path))
+    loaded = LocalVectorIndex.load(str(tmp_path))
+
+    assert loaded.version == version
+    assert len(loaded) == len(index)
+    assert isinstance(loaded.embeddings, np.memmap)
+    assert loaded.embeddings.dtype == np.dtype(dtype)
+
+    for probe in (0, 11, 25):
+        query = rows[probe]["embedding"]
+        expected = index.search(query, k=5, categories=["시설", "연락처"])
+        actual = loaded.search(query, k=5, categories=["시설", "연락처"])
+        assert [r["id"] for r in actual] == [r["id"] for r in expected]
+        assert [r["metadata"] for r in actual] == [r["metadata"] for r in expected]
+        for a, e in zip(actual, expected):
+            assert a["similarity"] == pytest.approx(e["similarity"], abs=2e-3)
+
+
+def test_block_scoring_matches_single_block(tmp_path, monkeypatch):
+    rows = build_rows(count=50)
+    LocalVectorIndex(rows).save(str(tmp_path), dtype="float16")
+    loaded = LocalVectorIndex.load(str(tmp_path))
+    query = rows[3]["embedding"]
+
+    whole = loaded.search(query, k=8)
+    monkeypatch.setattr(vector_index_module, "SCORE_BLOCK_ROWS", 7)
+    blocked = loaded.search(query, k=8)
+    blocked_category = loaded.search(query, k=8, categories=["시설"])
+
+    assert [r["id"] for r in blocked] == [r["id"] for r in whole]
+    assert [r["similarity"] for r in blocked] == pytest.approx([r["similarity"] for r in whole], abs=1e-6)
+    assert all(isinstance(r["similarity"], float) for r in blocked)
+    assert all(r["metadata"]["category"] == "시설" for r in blocked_category)
+
+
+def test_keeps_latest_versions_only(tmp_path):
+    index = LocalVectorIndex(build_rows(count=5))
+    versions = []
+    for _ in range(3):
+        versions.append(index.save(str(tmp_path), keep_versions=2))
+        time.sleep(0.01)  # 버전 이름은 밀리초 단위
+
+    remaining = sorted(p.name for p in tmp_path.glob("embeddings-v*.npy"))
+    assert len(remaining) == 2
+    assert LocalVectorIndex.load(str(tmp_path)).version == versions[-1]